@@ -1,148 +1,279 @@
 import json
-import re
-import requests
+import logging
+import os
+import time
 
-async def analyze_transcript(transcript: str, context: dict = None):
-    """
-    Analyze transcript using local Ollama with smart regex fallback
-    """
-    
-    print(f"🤖 Sarah analyzing with Ollama: {transcript[:60]}...")
-    
-    try:
-        # Clean, simple prompt
-        prompt = f"""You are a meeting analysis assistant.
+import httpx
 
-Analyze this transcript:
-"{transcript}"
+from analysis_cache import analysis_cache, cache_key
+from context_window import ContextWindow
+from extraction import DedupeIndex, extract_regex_items, intent_score, scan_intents
+from json_stream import ArrayItemParser
+from metrics import OLLAMA_REQUESTS, STAGE_SECONDS
+from ollama_client import OLLAMA_MODEL, OllamaUnavailable, ollama
+
+logger = logging.getLogger(__name__)
 
-Extract ONLY what you find:
+
+# Prompt layout: a static instruction prefix that never changes (so Ollama
+# can reuse its evaluated tokens) followed by the per-utterance part
+PROMPT_VERSION = "2"
+
+# Utterances scoring below this on the regex pre-screen never reach the LLM
+# (0 sends everything)
+PRESCREEN_THRESHOLD = float(os.getenv("PRESCREEN_THRESHOLD", "0.3"))
+
+prescreen_stats = {"escalated": 0, "skipped": 0}
+
+ANALYSIS_OPTIONS = {
+    "temperature": 0.1,
+    "num_predict": 300
+}
+
+PROMPT_PREFIX = """You are a meeting analysis assistant.
+
+You will get some earlier meeting context and a NEW transcript.
+Extract ONLY what you find in the NEW transcript:
 - Action items: who will do what by when
 - Parking lot: items to discuss later (look for "park", "discuss later", "table")
 - Decisions: commitments made (look for "decided", "agreed", "let's use")
 
+Use the earlier context only to work out who "he", "she", "they" or "I" refers to.
+Never extract items from the earlier context itself.
+
 IMPORTANT: If you find NOTHING, return empty array. Do NOT make up examples.
 
 Return JSON:
-{{
+{
   "items": [
     // Only items ACTUALLY found in the transcript
   ]
-}}
+}
 
 Formats:
-- Action: {{"type": "action_item", "speaker": "PersonName", "task": "description", "deadline": "when"}}
-- Parking: {{"type": "parking_lot", "item": "what to park"}}
-- Decision: {{"type": "decision", "decision": "what was decided"}}"""
-
-        # Call Ollama
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llama3.2:3b",
-                "prompt": prompt,
-                "stream": False,
-                "format": "json",
-                "options": {
-                    "temperature": 0.1,
-                    "num_predict": 300
-                }
-            },
-            timeout=30
-        )
-        
-        result = response.json()
-        raw_response = result.get("response", "")
+- Action: {"type": "action_item", "speaker": "PersonName", "task": "description", "deadline": "when"}
+- Parking: {"type": "parking_lot", "item": "what to park"}
+- Decision: {"type": "decision", "decision": "what was decided"}
+"""
+
+
+def build_prompt(transcript: str, context: ContextWindow = None) -> str:
+    """Per-utterance part of the prompt (goes after PROMPT_PREFIX)"""
+    context_block = context.render() if context else ""
+    if not context_block:
+        context_block = "(start of meeting)"
+    return f"""
+{context_block}
+
+NEW transcript:
+"{transcript}"
+"""
+
+
+def is_valid_item(item: dict) -> bool:
+    """Filter out placeholder/noise items the model sometimes echoes back"""
+    item_str = json.dumps(item).lower()
+    
+    # Expanded placeholder detection
+    placeholders = [
+        "name will", "do something", "task description",
+        "what to park", "what was decided", 
+        "nothing", "no items", "none", "n/a",
+        "example", "placeholder", "nothing to",
+        "parking"
+    ]
+    
+    if any(placeholder in item_str for placeholder in placeholders):
+        logger.debug(f"⚠️ Skipping Ollama placeholder/noise: {item}")
+        return False
+    
+    # Validate item content
+    item_type = item.get("type", "")
+    
+    if item_type == "parking_lot":
+        parking_item = item.get("item", "").strip()
         
-        print(f"📥 Ollama raw: {raw_response[:300]}")
+        # Strict validation
+        blacklist = ["nothing", "none", "n/a", "parking", "items", "item", "lot"]
         
-        # Parse Ollama response
-        ollama_data = json.loads(raw_response)
-        items = ollama_data.get("items", [])
+        if (len(parking_item) < 4 or 
+            parking_item.lower() in blacklist or
+            any(word == parking_item.lower() for word in blacklist)):
+            logger.debug(f"⚠️ Skipping invalid parking item: '{parking_item}'")
+            return False
+    
+    elif item_type == "action_item":
+        task = item.get("task", "").strip()
+        deadline = item.get("deadline", "").strip()
+        speaker = item.get("speaker", "").strip()
         
-        # Filter out placeholder/noise data
-        filtered_items = []
-        for item in items:
-            item_str = json.dumps(item).lower()
-            
-            # Expanded placeholder detection
-            placeholders = [
-                "name will", "do something", "task description",
-                "what to park", "what was decided", 
-                "nothing", "no items", "none", "n/a",
-                "example", "placeholder", "nothing to",
-                "parking"
-            ]
-            
-            if any(placeholder in item_str for placeholder in placeholders):
-                print(f"⚠️ Skipping Ollama placeholder/noise: {item}")
-                continue
-            
-            # Validate item content
-            item_type = item.get("type", "")
-            
-            if item_type == "parking_lot":
-                parking_item = item.get("item", "").strip()
-                
-                # Strict validation
-                blacklist = ["nothing", "none", "n/a", "parking", "items", "item", "lot"]
-                
-                if (len(parking_item) < 4 or 
-                    parking_item.lower() in blacklist or
-                    any(word == parking_item.lower() for word in blacklist)):
-                    print(f"⚠️ Skipping invalid parking item: '{parking_item}'")
-                    continue
-            
-            elif item_type == "action_item":
-                task = item.get("task", "").strip()
-                deadline = item.get("deadline", "").strip()
-                speaker = item.get("speaker", "").strip()
-                
-                if (len(task) < 3 or 
-                    not deadline or 
-                    speaker.lower() in ["name", "we", "person", ""]):
-                    print(f"⚠️ Skipping incomplete action item")
-                    continue
+        if (len(task) < 3 or 
+            not deadline or 
+            speaker.lower() in ["name", "we", "person", ""]):
+            logger.debug(f"⚠️ Skipping incomplete action item")
+            return False
+    
+    elif item_type == "decision":
+        decision = item.get("decision", "").strip()
+        if len(decision) < 3:
+            logger.debug(f"⚠️ Skipping empty decision")
+            return False
+    
+    return True
+
+
+class PartialAnswer(Exception):
+    """
+    The stream broke (or its JSON did) after some items were already pushed
+    to the client; they are kept so the meeting record matches what was shown
+    """
+
+    def __init__(self, items: list, error: Exception):
+        super().__init__(f"{len(items)} items before: {error}")
+        self.items = items
+
+
+async def stream_items(prompt: str, on_intervention, **extra) -> list:
+    """
+    Stream the model's answer, pushing each valid item out as soon as its
+    JSON object closes; returns every valid item once generation is done
+    Raises PartialAnswer if it fails after items were pushed
+    """
+    parser = ArrayItemParser()
+    raw_parts = []
+    items = []
+    
+    try:
+        async for chunk in ollama.generate_stream(prompt, format="json", options=ANALYSIS_OPTIONS, **extra):
+            text = chunk.get("response", "")
+            raw_parts.append(text)
             
-            elif item_type == "decision":
-                decision = item.get("decision", "").strip()
-                if len(decision) < 3:
-                    print(f"⚠️ Skipping empty decision")
+            for item in parser.feed(text):
+                if not isinstance(item, dict) or not is_valid_item(item):
                     continue
-            
-            filtered_items.append(item)
+                items.append(item)
+                for intervention in convert_ollama_format({"items": [item]})["interventions"]:
+                    await on_intervention(intervention)
+        
+        raw_response = "".join(raw_parts)
+        logger.debug(f"📥 Ollama raw: {raw_response[:300]}")
+        
+        # The whole answer must still be valid JSON, same as the non-streaming path
+        json.loads(raw_response)
+    except Exception as e:
+        if items:
+            raise PartialAnswer(items, e) from e
+        raise
+    return items
+
+
+async def ask_ollama(transcript: str, context: ContextWindow = None, on_intervention=None) -> list:
+    """One LLM round trip, returns the valid items the model found"""
+    # Circuit open: don't even prime, go straight to the regex fallback
+    if not ollama.available():
+        OLLAMA_REQUESTS.inc(outcome="circuit_open")
+        raise OllamaUnavailable("Ollama circuit is open")
+    
+    # Static prefix is evaluated once, then reused via Ollama's context tokens
+    prefix_context = await ollama.prime(PROMPT_PREFIX)
+    prompt = build_prompt(transcript, context)
+    extra = {"context": prefix_context}
+    if prefix_context is None:
+        prompt = PROMPT_PREFIX + prompt
+        extra = {}
+    
+    if on_intervention is not None:
+        return await stream_items(prompt, on_intervention, **extra)
+    
+    # Call Ollama (non-blocking, shared connection pool)
+    result = await ollama.generate(prompt, format="json", options=ANALYSIS_OPTIONS, **extra)
+    
+    raw_response = result.get("response", "")
+    
+    logger.debug(f"📥 Ollama raw: {raw_response[:300]}")
+    
+    # Parse Ollama response
+    items = json.loads(raw_response).get("items", [])
+    return [item for item in items if is_valid_item(item)]
+
+
+async def analyze_transcript(transcript: str, context: ContextWindow = None, on_intervention=None):
+    """
+    Analyze transcript using local Ollama with smart regex fallback
+    context: the meeting's rolling window (recent utterances + summary),
+    the caller adds the utterance to it afterwards
+    on_intervention: optional async callback, turns on streaming - it gets
+    each LLM intervention as soon as the model has produced it
+    """
+    
+    # Small talk with no extractable intent doesn't need the LLM
+    # (the regex hits are found once and reused by the fallback below)
+    hits = scan_intents(transcript)
+    score = intent_score(transcript, hits)
+    if score < PRESCREEN_THRESHOLD:
+        prescreen_stats["skipped"] += 1
+        logger.info(f"⏭️ Pre-screen: nothing to extract (score {score:.2f}), skipping Ollama")
+        return get_fallback_response(transcript, hits)
+    prescreen_stats["escalated"] += 1
+    
+    logger.info(f"🤖 Sarah analyzing with Ollama: {transcript[:60]}...")
+    
+    try:
+        # Same (normalized) transcript, model and prompt -> same LLM answer
+        key = cache_key(transcript, OLLAMA_MODEL, PROMPT_VERSION, context.render() if context else "")
+        filtered_items = await analysis_cache.get(key)
         
-        ollama_data["items"] = filtered_items
-        print(f"✅ Ollama found {len(filtered_items)} valid items")
+        if filtered_items is not None:
+            logger.info(f"⚡ Analysis cache hit ({len(filtered_items)} items)")
+            if on_intervention is not None:
+                for intervention in convert_ollama_format({"items": filtered_items})["interventions"]:
+                    await on_intervention(intervention)
+        else:
+            try:
+                filtered_items = await ask_ollama(transcript, context, on_intervention)
+                analysis_cache.put(key, filtered_items)
+            except PartialAnswer as e:
+                # Already on the client's screen: keep them, but don't cache a cut-off answer
+                logger.warning(f"⚠️ Ollama stream failed after {len(e.items)} items, keeping them: {e.__cause__}")
+                filtered_items = e.items
+        
+        ollama_data = {"items": filtered_items}
+        logger.info(f"✅ Ollama found {len(filtered_items)} valid items")
         
         # Convert to our format
         analysis = convert_ollama_format(ollama_data)
         
         # Add regex fallback
-        analysis = enhance_with_regex_fallback(transcript, analysis)
+        analysis = enhance_with_regex_fallback(transcript, analysis, hits)
         
         # Log final results
         num_actions = len(analysis.get("state", {}).get("actions", []))
         num_parking = len(analysis.get("state", {}).get("parking_lot", []))
         num_decisions = len(analysis.get("state", {}).get("decisions", []))
         
-        print(f"✅ Final: {num_actions} actions, {num_parking} parked, {num_decisions} decisions")
+        logger.info(f"✅ Final: {num_actions} actions, {num_parking} parked, {num_decisions} decisions")
         
         return analysis
         
-    except requests.exceptions.ConnectionError:
-        print("❌ Cannot connect to Ollama! Using regex fallback...")
-        return get_fallback_response(transcript)
+    except OllamaUnavailable:
+        logger.info("🔌 Ollama circuit open, serving regex fallback...")
+        return get_fallback_response(transcript, hits)
+        
+    except httpx.ConnectError:
+        logger.error("❌ Cannot connect to Ollama! Using regex fallback...")
+        return get_fallback_response(transcript, hits)
+        
+    except httpx.TimeoutException:
+        logger.info("⏱️ Ollama timed out! Using regex fallback...")
+        return get_fallback_response(transcript, hits)
         
     except json.JSONDecodeError as e:
-        print(f"⚠️ Ollama JSON error: {e}")
-        return get_fallback_response(transcript)
+        logger.warning(f"⚠️ Ollama JSON error: {e}")
+        return get_fallback_response(transcript, hits)
         
     except Exception as e:
-        print(f"⚠️ Ollama error: {e}")
-        import traceback
-        traceback.print_exc()
-        return get_fallback_response(transcript)
+        logger.exception(f"⚠️ Ollama error: {e}")
+        return get_fallback_response(transcript, hits)
 
 
 def convert_ollama_format(ollama_data: dict) -> dict:
@@ -219,180 +350,81 @@ def convert_ollama_format(ollama_data: dict) -> dict:
     return analysis
 
 
-def enhance_with_regex_fallback(transcript: str, analysis: dict) -> dict:
+def enhance_with_regex_fallback(transcript: str, analysis: dict, hits: list = None) -> dict:
     """
     Add regex detection to catch what Ollama might have missed
+    hits: scan_intents() of the transcript, if the caller already has it
     """
     
-    print("🔍 Running regex fallback...")
+    logger.debug("🔍 Running regex fallback...")
+    started = time.perf_counter()
     
-    # Track what Ollama already found
-    existing_parking = set(item.lower().strip() for item in analysis["state"]["parking_lot"])
-    existing_actions = set(
-        f"{a['speaker'].lower()}:{a['task'].lower()}" 
-        for a in analysis["state"]["actions"]
+    # Track what Ollama already found (normalized keys, O(1) lookups)
+    existing_parking = DedupeIndex(analysis["state"]["parking_lot"])
+    existing_actions = DedupeIndex(
+        f"{a['speaker']} {a['task']}" for a in analysis["state"]["actions"]
     )
-    existing_decisions = set(d.lower().strip() for d in analysis["state"]["decisions"])
-    
-    # ==========================================
-    # PARKING LOT PATTERNS - ENHANCED FOR "DISCUSS IT LATER"
-    # ==========================================
+    existing_decisions = DedupeIndex(analysis["state"]["decisions"])
     
-    # Pattern 1: Specific items to park
-    specific_parking_patterns = [
-        r"park\s+(?:the\s+)?([a-z\s]+?)\s+(?:discussion|for\s+(?:next|later|another))",
-        r"discuss\s+(?:the\s+)?([a-z\s]+?)\s+(?:later|another\s+time|next\s+(?:time|meeting))",
-        r"table\s+(?:the\s+)?([a-z\s]+?)(?:\s+for|$)",
-    ]
-    
-    for pattern in specific_parking_patterns:
-        for match in re.finditer(pattern, transcript, re.IGNORECASE):
-            item = match.group(1).strip()
-            
-            # Remove "the" prefix
-            if item.lower().startswith("the "):
-                item = item[4:]
-            
-            item = item.strip()
-            item_lower = item.lower()
-            
-            # Check if already exists
-            similar_exists = any(
-                item_lower in existing or existing in item_lower
-                for existing in existing_parking
-            )
+    # One compiled pass over the transcript for every pattern
+    for item in extract_regex_items(transcript, hits):
+        item_type = item["type"]
+        
+        if item_type == "parking_lot":
+            parking_item = item["item"]
             
-            if len(item) > 3 and not similar_exists:
-                print(f"🅿️ Regex caught parking: '{item}'")
-                existing_parking.add(item_lower)
+            if len(parking_item) > 3 and parking_item not in existing_parking:
+                logger.debug(f"🅿️ Regex caught parking: '{parking_item}'")
+                existing_parking.add(parking_item)
                 
-                analysis["state"]["parking_lot"].append(item)
+                analysis["state"]["parking_lot"].append(parking_item)
                 analysis["interventions"].append({
                     "type": "parking_lot",
                     "confidence": 0.85,
                     "speaker": "Team",
-                    "content": f"Parked for later: {item}",
-                    "details": {"item": item}
+                    "content": f"Parked for later: {parking_item}",
+                    "details": {"item": parking_item}
                 })
-    
-    # Pattern 2: General "discuss it/this/that later"
-    general_parking_patterns = [
-        r"discuss\s+(?:it|this|that)\s+later",
-        r"we\s+(?:will|can|should)\s+discuss\s+(?:it|this|that)\s+later",
-        r"(?:let's|we'll)\s+discuss\s+(?:it|this|that)\s+later",
-    ]
-    
-    for pattern in general_parking_patterns:
-        if re.search(pattern, transcript, re.IGNORECASE):
-            item = "discussion topic"
-            item_lower = item.lower()
+        
+        elif item_type == "action_item":
+            who = item["speaker"]
+            what = item["task"]
+            when = item["deadline"]
+            key = f"{who} {what}"
+            
+            if key in existing_actions:
+                logger.debug(f"⚠️ Regex skipping duplicate: {who} will {what}")
+                continue
             
-            if item_lower not in existing_parking:
-                print(f"🅿️ Regex caught general parking: '{item}'")
-                existing_parking.add(item_lower)
+            if "something" not in what.lower() and " and " not in what.lower():
+                logger.debug(f"📋 Regex caught action: {who} will {what} by {when}")
+                existing_actions.add(key)
+                
+                analysis["state"]["actions"].append({
+                    "speaker": who,
+                    "task": what,
+                    "deadline": when,
+                    "confidence": 0.85
+                })
                 
-                analysis["state"]["parking_lot"].append(item)
                 analysis["interventions"].append({
-                    "type": "parking_lot",
+                    "type": "action_item",
                     "confidence": 0.85,
-                    "speaker": "Team",
-                    "content": f"Parked for later: {item}",
-                    "details": {"item": item}
+                    "speaker": who,
+                    "content": f"{who} will {what} by {when}",
+                    "details": {"task": what, "deadline": when}
                 })
-            break  # Only add once even if multiple patterns match
-    
-    # ==========================================
-    # ACTION PATTERNS
-    # ==========================================
-    action_pattern = r"(\w+)\s+will\s+(.+?)\s+by\s+(\w+(?:\s+\w+)?)"
-    
-    for match in re.finditer(action_pattern, transcript, re.IGNORECASE):
-        who = match.group(1).strip().capitalize()
-        what = match.group(2).strip()
-        when = match.group(3).strip().capitalize()
-        
-        # Clean up
-        when = re.sub(r'\s+(and|but|or|then)$', '', when, flags=re.IGNORECASE).strip()
-        what = re.sub(r'\s+(and|but|or|then)$', '', what, flags=re.IGNORECASE).strip()
-        
-        # Check if already exists
-        key_base = f"{who.lower()}:{what.lower()}"
         
-        already_exists = False
-        for existing_key in existing_actions:
-            if (key_base in existing_key or existing_key in key_base):
-                already_exists = True
-                print(f"⚠️ Regex skipping duplicate: {who} will {what}")
-                break
-        
-        if (not already_exists and 
-            "something" not in what.lower() and 
-            " and " not in what.lower()):
-            
-            print(f"📋 Regex caught action: {who} will {what} by {when}")
-            existing_actions.add(key_base)
-            
-            analysis["state"]["actions"].append({
-                "speaker": who,
-                "task": what,
-                "deadline": when,
-                "confidence": 0.85
-            })
-            
-            analysis["interventions"].append({
-                "type": "action_item",
-                "confidence": 0.85,
-                "speaker": who,
-                "content": f"{who} will {what} by {when}",
-                "details": {"task": what, "deadline": when}
-            })
-    
-    # ==========================================
-    # DECISION PATTERNS - HANDLES ANY NAME
-    # ==========================================
-    decision_patterns = [
-        # "NAME decided to X"
-        (r"(\w+)\s+decided\s+to\s+(.+?)(?:\.|,|$)", True),
-        
-        # "we/team decided to X"
-        (r"(?:we|team)\s+decided\s+to\s+(.+?)(?:\.|,|$)", False),
-        
-        # "we/team agreed to X"
-        (r"(?:we|team)\s+agreed\s+to\s+(.+?)(?:\.|,|$)", False),
-        
-        # "let's/we'll use/go with X"
-        (r"(?:let's|we'll)\s+(?:go with|use)\s+(.+?)(?:\.|,|$)", False),
-    ]
-    
-    for pattern, has_speaker in decision_patterns:
-        for match in re.finditer(pattern, transcript, re.IGNORECASE):
-            groups = match.groups()
-            
-            if has_speaker and len(groups) >= 2:
-                # "Mary decided to use frontend"
-                speaker_name = groups[0].capitalize()
-                decision_content = groups[1].strip().rstrip('.')
-                decision_text = f"use {decision_content}"
-                speaker = speaker_name
-                
-                print(f"💡 Regex caught decision: '{speaker}' - '{decision_text}'")
-            else:
-                # "we decided to X"
-                decision_content = groups[0].strip().rstrip('.')
-                decision_text = decision_content
-                speaker = "Team"
-                
-                print(f"💡 Regex caught decision: '{decision_text}'")
+        elif item_type == "decision":
+            decision_text = item["decision"]
+            speaker = item["speaker"]
             
-            # Check if already exists
-            decision_lower = decision_content.lower()
-            similar_exists = any(
-                decision_lower in existing.lower() or existing.lower() in decision_lower
-                for existing in existing_decisions
-            )
+            similar_exists = decision_text in existing_decisions or item["what"] in existing_decisions
             
             if len(decision_text) > 3 and not similar_exists:
-                existing_decisions.add(decision_text.lower())
+                logger.debug(f"💡 Regex caught decision: '{speaker}' - '{decision_text}'")
+                existing_decisions.add(decision_text)
+                existing_decisions.add(item["what"])
                 
                 analysis["state"]["decisions"].append(decision_text)
                 analysis["interventions"].append({
@@ -403,14 +435,15 @@ def enhance_with_regex_fallback(transcript: str, analysis: dict) -> dict:
                     "details": {"what": decision_text}
                 })
     
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage="regex")
     return analysis
 
 
-def get_fallback_response(transcript: str):
+def get_fallback_response(transcript: str, hits: list = None):
     """
     Pure regex fallback if Ollama fails
     """
-    print("🔄 Using 100% regex fallback...")
+    logger.debug("🔄 Using 100% regex fallback...")
     
     analysis = {
         "interventions": [],
@@ -424,4 +457,4 @@ def get_fallback_response(transcript: str):
         }
     }
     
-    return enhance_with_regex_fallback(transcript, analysis)
\ No newline at end of file
+    return enhance_with_regex_fallback(transcript, analysis, hits)
\ No newline at end of file
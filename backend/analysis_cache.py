@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from extraction import normalize_key
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "512"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "3600"))   # seconds
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "")             # sqlite file, empty = memory only
+
+# Who these refer to depends on the earlier conversation (the prompt has the
+# model work out "I" and "you" from it too), so the context becomes part of
+# the key for transcripts that use them
+PERSON_REFERENCE = re.compile(
+    r"\b(he|she|they|him|her|them|his|hers|their|theirs|he'll|she'll|they'll|"
+    r"i|i'll|i'm|i've|i'd|me|my|mine|we|we'll|we're|us|our|ours|"
+    r"you|you'll|you're|your|yours)\b", re.IGNORECASE
+)
+
+
+def cache_key(transcript: str, model: str, prompt_version: str, context: str = "") -> str:
+    """
+    sha256 of the normalized transcript + model + prompt version, plus the
+    context when the transcript refers to people by pronoun
+    """
+    parts = [model, prompt_version, normalize_key(transcript)]
+    if context and PERSON_REFERENCE.search(transcript):
+        parts.append(context)
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    LRU + TTL cache of LLM results, in front of the Ollama call
+    - In memory: OrderedDict bounded to max_size entries, oldest evicted first
+    - Optional sqlite tier (ANALYSIS_CACHE_PATH) so results survive restarts;
+      it never runs on the event loop: reads go to a thread, writes are
+      queued for a single writer task that commits them in batches
+    """
+
+    def __init__(self, max_size: int = ANALYSIS_CACHE_SIZE, ttl: float = ANALYSIS_CACHE_TTL,
+                 path: str = ANALYSIS_CACHE_PATH):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._pending = []              # rows waiting for the writer
+        self._writer = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM analysis_cache WHERE stored_at < ?", (time.time() - ttl,))
+            self._db.commit()
+            logger.info(f"💾 Analysis cache on disk: {path}")
+
+    async def get(self, key: str):
+        """Cached value or None (expired entries count as misses)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if time.time() - stored_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._read, key)
+            if row and time.time() - row[1] <= self.ttl:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value):
+        stored_at = time.time()
+        self._remember(key, value, stored_at)
+
+        if self._db is not None:
+            self._pending.append((key, json.dumps(value), stored_at))
+            if self._writer is None or self._writer.done():
+                self._writer = asyncio.get_running_loop().create_task(self._write_pending())
+
+    async def _write_pending(self):
+        """Single writer: whatever queued up meanwhile goes in one commit"""
+        while self._pending:
+            rows, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Analysis cache write failed ({len(rows)} entries): {e}")
+
+    def _read(self, key: str):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT value, stored_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _write(self, rows: list):
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, stored_at) VALUES (?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, value, stored_at: float):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "disk": self._db is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self):
+        if self._db is not None:
+            # Writes the writer task hasn't picked up yet
+            rows, self._pending = self._pending, []
+            if rows:
+                self._write(rows)
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+
+# Shared by every meeting
+analysis_cache = AnalysisCache()
@@ -0,0 +1,216 @@
+"""
+Offline backfill: run recorded meetings through the live analysis pipeline
+
+    cd backend && python batch.py recordings/ --out results.jsonl
+    python batch.py transcripts/ --out results.jsonl --workers 8 --roster team.txt
+
+Each audio file (webm/wav/mp3/...) is one meeting: decoded with ffmpeg, cut
+into utterances by the same VAD as /ws/audio, transcribed with Whisper and
+analyzed utterance by utterance with the meeting's context, exactly like the
+live path. A .txt file is a meeting transcript, one utterance per line.
+
+Results go to a JSONL file, one line per meeting, written as each finishes.
+Re-running with the same --out skips meetings that are already in it, so an
+interrupted backfill picks up where it stopped (failed meetings are retried).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+AUDIO_EXTENSIONS = {".webm", ".wav", ".mp3", ".m4a", ".ogg", ".flac", ".mp4"}
+TEXT_EXTENSIONS = {".txt"}
+DECODE_TIMEOUT = 600   # seconds, whole recordings go through ffmpeg at once
+VAD_CHUNK_SECONDS = 30  # audio handed to the segmenter at a time
+
+# Per worker process (set up by _init_worker)
+_loop = None
+_roster = []
+
+
+def _init_worker(cpu_threads: int, roster: list, log_level: str):
+    """
+    Runs once in each worker before anything is imported: one Whisper
+    thread per process, the cores split between processes, and one event
+    loop kept for the process's lifetime (the shared clients are bound to it)
+    """
+    global _loop, _roster
+    os.environ["WHISPER_WORKERS"] = "1"
+    os.environ["WHISPER_CPU_THREADS"] = str(cpu_threads)
+    os.environ["LOG_LEVEL"] = log_level
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    _roster = roster
+
+
+async def _transcribe_meeting(path: Path, meeting_id: str) -> tuple:
+    """Decode + VAD + Whisper, returns (utterance texts, audio seconds)"""
+    from segmenter import StreamingSegmenter
+    from transcription import SAMPLE_RATE, decode_audio, transcribe_pcm
+
+    audio = await decode_audio(path.read_bytes(), timeout=DECODE_TIMEOUT)
+    segmenter = StreamingSegmenter(partials=False)
+    texts = []
+
+    async def transcribe(utterance):
+        result = await transcribe_pcm(utterance.audio, meeting_id)
+        if result.get("error"):
+            raise RuntimeError(f"transcription failed: {result['error']}")
+        if result["text"].strip():
+            texts.append(result["text"])
+
+    # A chunk at a time, each utterance transcribed and let go as soon as it
+    # closes, so memory stays at the recording plus one utterance
+    chunk = VAD_CHUNK_SECONDS * SAMPLE_RATE
+    for start in range(0, len(audio), chunk):
+        for utterance in segmenter.feed(audio[start:start + chunk]):
+            await transcribe(utterance)
+    tail = segmenter.flush()
+    if tail is not None:
+        await transcribe(tail)
+    return texts, len(audio) / SAMPLE_RATE
+
+
+async def process_meeting(path: Path) -> dict:
+    """One meeting through the same steps as respond_to_speech"""
+    from agent import analyze_transcript
+    from main import extract_speaker_name
+    from meeting_state import MeetingState
+
+    started = time.perf_counter()
+    meeting = MeetingState(meeting_id=path.stem)
+    if _roster:
+        meeting.register_participants(_roster)
+
+    if path.suffix.lower() in TEXT_EXTENSIONS:
+        texts = [line.strip() for line in path.read_text().splitlines() if line.strip()]
+        audio_seconds = 0.0
+    else:
+        texts, audio_seconds = await _transcribe_meeting(path, meeting.meeting_id)
+
+    utterances = []
+    for transcript in texts:
+        speaker = extract_speaker_name(transcript, meeting.roster)
+        meeting.record_turn(speaker)
+        analysis = await analyze_transcript(transcript, meeting.context)
+        meeting.context.add(transcript, speaker)
+        meeting.apply(analysis)
+        utterances.append({
+            "speaker": speaker,
+            "transcript": transcript,
+            "interventions": analysis.get("interventions", [])
+        })
+
+    return {
+        "meeting_id": meeting.meeting_id,
+        "utterances": utterances,
+        "state": meeting.snapshot(),
+        "audio_seconds": round(audio_seconds, 2),
+        "processing_seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def _process_file(path: str) -> dict:
+    return _loop.run_until_complete(process_meeting(Path(path)))
+
+
+def load_checkpoint(out: Path) -> set:
+    """Meetings already written successfully (a torn last line is ignored)"""
+    done = set()
+    if not out.exists():
+        return done
+
+    with open(out, "rb") as f:
+        data = f.read()
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "error" not in record:
+            done.add(record["file"])
+
+    if data and not data.endswith(b"\n"):
+        # Crashed mid-write: start the next record on its own line
+        with open(out, "ab") as f:
+            f.write(b"\n")
+    return done
+
+
+def find_meetings(root: Path) -> list:
+    extensions = AUDIO_EXTENSIONS | TEXT_EXTENSIONS
+    return sorted(path for path in root.rglob("*") if path.is_file() and path.suffix.lower() in extensions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, help="directory of recordings and/or .txt transcripts")
+    parser.add_argument("--out", type=Path, default=Path("results.jsonl"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (default: one per core)")
+    parser.add_argument("--roster", type=Path, help="participant names, one per line, for speaker detection")
+    parser.add_argument("--verbose", action="store_true", help="pipeline logs from the workers")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger = logging.getLogger("batch")
+
+    meetings = find_meetings(args.input)
+    done = load_checkpoint(args.out)
+    todo = [path for path in meetings if str(path.relative_to(args.input)) not in done]
+    logger.info(f"📂 {len(meetings)} meetings found, {len(meetings) - len(todo)} already in {args.out}, "
+                f"{len(todo)} to process on {args.workers} workers")
+    if not todo:
+        return
+
+    roster = []
+    if args.roster:
+        roster = [line.strip() for line in args.roster.read_text().splitlines() if line.strip()]
+    cpu_threads = max(1, (os.cpu_count() or 1) // args.workers)
+
+    started = time.perf_counter()
+    totals = {"ok": 0, "failed": 0, "utterances": 0, "audio_seconds": 0.0}
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(cpu_threads, roster, "INFO" if args.verbose else "WARNING")
+    ) as pool, open(args.out, "a") as out:
+        futures = {pool.submit(_process_file, str(path)): path for path in todo}
+
+        for future in as_completed(futures):
+            name = str(futures[future].relative_to(args.input))
+            try:
+                record = dict(file=name, **future.result())
+                totals["ok"] += 1
+                totals["utterances"] += len(record["utterances"])
+                totals["audio_seconds"] += record["audio_seconds"]
+                logger.info(f"✅ {name}: {len(record['utterances'])} utterances in {record['processing_seconds']}s")
+            except Exception as e:
+                record = {"file": name, "error": f"{type(e).__name__}: {e}"}
+                totals["failed"] += 1
+                logger.error(f"❌ {name}: {record['error']}")
+
+            # Checkpoint: every finished meeting is on disk before we move on
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"\n📊 {totals['ok']} meetings done, {totals['failed']} failed in {elapsed:.1f}s\n"
+        f"   {totals['ok'] / elapsed * 60:.1f} meetings/min, {totals['utterances'] / elapsed:.1f} utterances/s"
+        + (f", {totals['audio_seconds'] / elapsed:.1f}x real time" if totals["audio_seconds"] else "")
+    )
+    if totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
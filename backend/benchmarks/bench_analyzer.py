@@ -0,0 +1,173 @@
+"""
+Per-utterance analyzer hot path: time and allocations per call
+
+Covers enhance_with_regex_fallback, convert_ollama_format, the placeholder
+filter (is_valid_item over the model's items) and main.extract_speaker_name
+on transcripts of 10 to 10,000 words and item lists of 1 to 1,000 entries.
+
+    cd backend && python benchmarks/bench_analyzer.py --save baseline.json
+    # ...change something...
+    python benchmarks/bench_analyzer.py --compare baseline.json   # exits 1 on a regression
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent import convert_ollama_format, enhance_with_regex_fallback, is_valid_item  # noqa: E402
+from bench_regex import SENTENCES, empty_analysis, make_transcript  # noqa: E402
+from main import extract_speaker_name  # noqa: E402
+
+WORD_COUNTS = [10, 100, 1000, 10000]
+ITEM_COUNTS = [1, 10, 100, 1000]
+
+# What the model returns: mostly real items, some placeholders it echoes back
+ITEM_TEMPLATES = [
+    {"type": "action_item", "speaker": "Sarah", "task": "send the report {n}", "deadline": "Friday"},
+    {"type": "decision", "decision": "use React for project {n}"},
+    {"type": "parking_lot", "item": "budget discussion {n}"},
+    {"type": "action_item", "speaker": "Name", "task": "do something", "deadline": "when"},
+    {"type": "action_item", "speaker": "John", "task": "fix login bug {n}", "deadline": "next Monday"},
+    {"type": "parking_lot", "item": "what to park"},
+]
+
+# Sentences with no known name, so the speaker lookup scans everything
+NAMELESS = [s for s in SENTENCES if not any(name in s for name in ("Sarah", "Mary", "John"))]
+
+
+def make_items(count: int) -> list:
+    items = []
+    for n in range(count):
+        template = ITEM_TEMPLATES[n % len(ITEM_TEMPLATES)]
+        items.append({k: v.format(n=n) for k, v in template.items()})
+    return items
+
+
+def make_nameless_transcript(words: int) -> str:
+    out = []
+    count = 0
+    while count < words:
+        sentence = NAMELESS[len(out) % len(NAMELESS)].lower()
+        out.append(sentence)
+        count += len(sentence.split())
+    return " ".join(out)
+
+
+def prefilled_analysis(items: int) -> dict:
+    """Analysis already holding the model's items, so the regex pass has to dedupe"""
+    valid = [item for item in make_items(items) if is_valid_item(item)]
+    return convert_ollama_format({"items": valid})
+
+
+def measure(fn, make_args, number: int, repeat: int = 3) -> dict:
+    """
+    Best-of-repeat seconds per call, plus peak/retained memory of one call
+    Arguments are built before the clock starts (fn may mutate them)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        calls = [make_args() for _ in range(number)]
+        started = time.perf_counter()
+        for args in calls:
+            fn(*args)
+        best = min(best, (time.perf_counter() - started) / number)
+
+    args = make_args()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = fn(*args)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {
+        "us_per_call": round(best * 1e6, 2),
+        "peak_kib": round((peak - before) / 1024, 2),
+        "retained_kib": round((after - before) / 1024, 2),
+    }
+
+
+def cases():
+    """(name, size, fn, make_args, calls per timing run)"""
+    for words in WORD_COUNTS:
+        transcript = make_transcript(words)
+        number = max(5, 20000 // words)
+        yield ("regex_fallback/words", words, enhance_with_regex_fallback,
+               lambda t=transcript: (t, empty_analysis()), number)
+
+    transcript = make_transcript(100)
+    for items in ITEM_COUNTS:
+        yield ("regex_fallback/items", items, enhance_with_regex_fallback,
+               lambda t=transcript, n=items: (t, prefilled_analysis(n)), max(5, 2000 // items))
+
+    for items in ITEM_COUNTS:
+        data = {"items": [item for item in make_items(items) if is_valid_item(item)]}
+        yield ("convert_ollama_format", items, convert_ollama_format,
+               lambda d=data: (d,), max(5, 20000 // items))
+
+    for items in ITEM_COUNTS:
+        raw = make_items(items)
+        yield ("placeholder_filter", items, lambda r: [item for item in r if is_valid_item(item)],
+               lambda r=raw: (r,), max(5, 20000 // items))
+
+    for words in WORD_COUNTS:
+        named, nameless = make_transcript(words), make_nameless_transcript(words)
+        number = max(5, 50000 // words)
+        yield ("speaker_name", words, extract_speaker_name, lambda t=named: (t,), number)
+        yield ("speaker_name/no_match", words, extract_speaker_name, lambda t=nameless: (t,), number)
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Cases that got slower or allocate more than the tolerance allows"""
+    previous = {(r["case"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["case"], result["size"]))
+        if old is None:
+            continue
+        for field in ("us_per_call", "peak_kib"):
+            # max(..., 1.0): ignore sub-microsecond / sub-KiB noise
+            if result[field] > max(old[field], 1.0) * (1 + tolerance):
+                regressions.append(f"{result['case']} [{result['size']}] {field}: {old[field]} -> {result[field]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth (0.25 = 25%%)")
+    parser.add_argument("--only", help="run cases whose name starts with this")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'case':<24} {'size':>6} {'us/call':>12} {'peak KiB':>10} {'kept KiB':>10}")
+    for name, size, fn, make_args, number in cases():
+        if args.only and not name.startswith(args.only):
+            continue
+        result = {"case": name, "size": size, **measure(fn, make_args, number)}
+        results.append(result)
+        print(f"{name:<24} {size:>6} {result['us_per_call']:>12.2f} "
+              f"{result['peak_kib']:>10.2f} {result['retained_kib']:>10.2f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"Saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Regex extraction benchmark: single-pass engine vs the old per-pattern scans
+
+    cd backend && python benchmarks/bench_regex.py
+"""
+import logging
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent import enhance_with_regex_fallback  # noqa: E402
+
+logger = logging.getLogger("bench_regex")
+
+# Roughly one sentence in three carries something to extract, like a real meeting
+SENTENCES = [
+    "Sarah will send the report by Friday.",
+    "The weather was nice and everyone had coffee before the call started.",
+    "So yeah I think that covers most of it from my side.",
+    "We will discuss it later.",
+    "Can everyone see my screen now or should I share again?",
+    "The numbers from last quarter look roughly the same as before.",
+    "Let's park the budget discussion for next week.",
+    "I was out on Monday so I missed the previous sync.",
+    "Mary decided to use React, the team agreed to hire two people.",
+    "Thanks everyone, that was a really useful conversation today.",
+    "John will fix the login bug by next Monday.",
+    "Sorry, my connection dropped for a second there.",
+    "Let's table the hiring plan for now.",
+    "Okay, moving on to the next item on the agenda.",
+]
+
+
+def make_transcript(words: int) -> str:
+    out = []
+    count = 0
+    i = 0
+    while count < words:
+        sentence = SENTENCES[i % len(SENTENCES)]
+        out.append(sentence)
+        count += len(sentence.split())
+        i += 1
+    return " ".join(out)
+
+
+def empty_analysis() -> dict:
+    return {"interventions": [], "state": {"actions": [], "decisions": [], "parking_lot": []}}
+
+
+def legacy_enhance(transcript: str, analysis: dict) -> dict:
+    """
+    The previous implementation: 11 scans + substring dedupe
+    Logs at debug level and builds the same interventions as the engine,
+    so both sides do the same work
+    """
+    logger.debug("🔍 Running regex fallback...")
+    state = analysis["state"]
+    existing_parking = set(item.lower().strip() for item in state["parking_lot"])
+    existing_actions = set(f"{a['speaker'].lower()}:{a['task'].lower()}" for a in state["actions"])
+    existing_decisions = set(d.lower().strip() for d in state["decisions"])
+
+    for pattern in [
+        r"park\s+(?:the\s+)?([a-z\s]+?)\s+(?:discussion|for\s+(?:next|later|another))",
+        r"discuss\s+(?:the\s+)?([a-z\s]+?)\s+(?:later|another\s+time|next\s+(?:time|meeting))",
+        r"table\s+(?:the\s+)?([a-z\s]+?)(?:\s+for|$)",
+    ]:
+        for match in re.finditer(pattern, transcript, re.IGNORECASE):
+            item = match.group(1).strip()
+            if item.lower().startswith("the "):
+                item = item[4:]
+            item = item.strip()
+            item_lower = item.lower()
+            if len(item) > 3 and not any(item_lower in e or e in item_lower for e in existing_parking):
+                logger.debug(f"🅿️ Regex caught parking: '{item}'")
+                existing_parking.add(item_lower)
+                state["parking_lot"].append(item)
+                analysis["interventions"].append({
+                    "type": "parking_lot",
+                    "confidence": 0.85,
+                    "speaker": "Team",
+                    "content": f"Parked for later: {item}",
+                    "details": {"item": item}
+                })
+
+    for pattern in [
+        r"discuss\s+(?:it|this|that)\s+later",
+        r"we\s+(?:will|can|should)\s+discuss\s+(?:it|this|that)\s+later",
+        r"(?:let's|we'll)\s+discuss\s+(?:it|this|that)\s+later",
+    ]:
+        if re.search(pattern, transcript, re.IGNORECASE):
+            if "discussion topic" not in existing_parking:
+                existing_parking.add("discussion topic")
+                state["parking_lot"].append("discussion topic")
+                analysis["interventions"].append({
+                    "type": "parking_lot",
+                    "confidence": 0.85,
+                    "speaker": "Team",
+                    "content": "Parked for later: discussion topic",
+                    "details": {"item": "discussion topic"}
+                })
+            break
+
+    for match in re.finditer(r"(\w+)\s+will\s+(.+?)\s+by\s+(\w+(?:\s+\w+)?)", transcript, re.IGNORECASE):
+        who = match.group(1).strip().capitalize()
+        what = re.sub(r'\s+(and|but|or|then)$', '', match.group(2).strip(), flags=re.IGNORECASE).strip()
+        when = re.sub(r'\s+(and|but|or|then)$', '', match.group(3).strip().capitalize(), flags=re.IGNORECASE).strip()
+        key_base = f"{who.lower()}:{what.lower()}"
+        if any(key_base in k or k in key_base for k in existing_actions):
+            logger.debug(f"⚠️ Regex skipping duplicate: {who} will {what}")
+            continue
+        if "something" not in what.lower() and " and " not in what.lower():
+            logger.debug(f"📋 Regex caught action: {who} will {what} by {when}")
+            existing_actions.add(key_base)
+            state["actions"].append({"speaker": who, "task": what, "deadline": when, "confidence": 0.85})
+            analysis["interventions"].append({
+                "type": "action_item",
+                "confidence": 0.85,
+                "speaker": who,
+                "content": f"{who} will {what} by {when}",
+                "details": {"task": what, "deadline": when}
+            })
+
+    for pattern, speaker_group in [
+        (r"(\w+)\s+decided\s+to\s+(.+?)(?:\.|,|$)", True),
+        (r"(?:we|team)\s+decided\s+to\s+(.+?)(?:\.|,|$)", False),
+        (r"(?:we|team)\s+agreed\s+to\s+(.+?)(?:\.|,|$)", False),
+        (r"(?:let's|we'll)\s+(?:go with|use)\s+(.+?)(?:\.|,|$)", False),
+    ]:
+        for match in re.finditer(pattern, transcript, re.IGNORECASE):
+            groups = match.groups()
+            if speaker_group:
+                speaker = groups[0].capitalize()
+                content = groups[1].strip().rstrip('.')
+                text = f"use {content}"
+            else:
+                speaker = "Team"
+                content = groups[0].strip().rstrip('.')
+                text = content
+            lower = content.lower()
+            if len(text) > 3 and not any(lower in e or e in lower for e in existing_decisions):
+                logger.debug(f"💡 Regex caught decision: '{speaker}' - '{text}'")
+                existing_decisions.add(text.lower())
+                state["decisions"].append(text)
+                analysis["interventions"].append({
+                    "type": "decision",
+                    "confidence": 0.85,
+                    "speaker": speaker,
+                    "content": f"Decision: {text}",
+                    "details": {"what": text}
+                })
+
+    return analysis
+
+
+def substring_dedupe(interventions: list) -> list:
+    """
+    The legacy dedupe applied on top of the engine's output: drop an item
+    whose key contains, or is contained in, one already kept of its type
+    The engine's normalized-key dedupe is the one intended behavior change
+    """
+    kept = []
+    seen = {}
+    for intervention in interventions:
+        details = intervention["details"]
+        if intervention["type"] == "action_item":
+            key = f"{intervention['speaker']}:{details['task']}".lower()
+        else:
+            key = (details.get("item") or details["what"]).lower()
+        keys = seen.setdefault(intervention["type"], [])
+        if not any(key in k or k in key for k in keys):
+            keys.append(key)
+            kept.append(intervention)
+    return kept
+
+
+def check_equivalent(transcript: str):
+    """Both extractors find the same items, apart from the dedupe change"""
+    legacy = legacy_enhance(transcript, empty_analysis())["interventions"]
+    engine = enhance_with_regex_fallback(transcript, empty_analysis())["interventions"]
+    assert legacy, "benchmark corpus found nothing to extract"
+    assert legacy == substring_dedupe(engine), (legacy, engine)
+
+
+def bench(fn, transcript: str, number: int) -> float:
+    """Seconds per call (best of 3)"""
+    def run():
+        fn(transcript, empty_analysis())
+    return min(timeit.repeat(run, number=number, repeat=3)) / number
+
+
+def main():
+    print(f"{'words':>8} {'legacy ms':>12} {'engine ms':>12} {'speedup':>9}")
+    for words in [10, 100, 1000, 10000]:
+        transcript = make_transcript(words)
+        number = max(1, 20000 // words)
+        check_equivalent(transcript)
+        legacy = bench(legacy_enhance, transcript, number)
+        engine = bench(enhance_with_regex_fallback, transcript, number)
+        print(f"{words:>8} {legacy * 1000:>12.3f} {engine * 1000:>12.3f} {legacy / engine:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
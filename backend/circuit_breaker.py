@@ -0,0 +1,101 @@
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))        # consecutive failures that trip it
+BREAKER_RESET_SECONDS = float(os.getenv("OLLAMA_BREAKER_RESET", "15"))   # open -> half-open after this
+LATENCY_SLO_SECONDS = float(os.getenv("OLLAMA_LATENCY_SLO", "8"))        # slower first tokens count as failures
+GENERATION_SLO_SECONDS = float(os.getenv("OLLAMA_GENERATION_SLO", "25"))  # same for whole non-streamed answers
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Closed: requests go through, consecutive failures are counted
+    Open: requests are refused straight away (callers use the regex fallback)
+    Half-open: after a cool-down one probe request is let through;
+    success closes the breaker, failure opens it again
+    A success slower than its SLO counts as a failure: time to first token
+    for streamed answers, the whole generation for non-streamed ones
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES,
+                 reset_seconds: float = BREAKER_RESET_SECONDS,
+                 latency_slo: float = LATENCY_SLO_SECONDS,
+                 generation_slo: float = GENERATION_SLO_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.latency_slo = latency_slo
+        self.generation_slo = generation_slo
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.trips = 0
+        self.slow_calls = 0
+        self.last_error = None
+
+    def _refresh(self):
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def available(self) -> bool:
+        """Would a request be let through right now (doesn't claim the probe)"""
+        self._refresh()
+        if self.state == OPEN:
+            return False
+        return not (self.state == HALF_OPEN and self._probe_in_flight)
+
+    def acquire(self) -> bool:
+        """Ask to send a request; in half-open only one probe at a time"""
+        if not self.available():
+            return False
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency: float, whole_answer: bool = False):
+        """latency: time to first token, or to the whole answer if whole_answer"""
+        self._probe_in_flight = False
+        slo = self.generation_slo if whole_answer else self.latency_slo
+        if latency > slo:
+            self.slow_calls += 1
+            self.record_failure(f"slow response ({latency:.1f}s > {slo:.1f}s SLO)")
+            return
+        self.failures = 0
+        if self.state != CLOSED:
+            logger.info("✅ Ollama circuit closed")
+        self.state = CLOSED
+
+    def record_failure(self, error: str):
+        self._probe_in_flight = False
+        self.failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+                logger.warning(f"🔌 Ollama circuit open: {error}")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Request abandoned (e.g. cancelled) without a verdict"""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        self._refresh()
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "slow_calls": self.slow_calls,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,61 @@
+import os
+from collections import deque
+
+CONTEXT_UTTERANCES = int(os.getenv("CONTEXT_UTTERANCES", "6"))
+CONTEXT_SUMMARY_CHARS = int(os.getenv("CONTEXT_SUMMARY_CHARS", "600"))
+SUMMARY_LINE_CHARS = 120
+
+
+class ContextWindow:
+    """
+    Bounded conversation context for one meeting
+    - The last K utterances verbatim
+    - A rolling summary of older ones, capped at a fixed number of characters
+    Prompt size stays flat no matter how long the meeting runs
+    """
+
+    def __init__(self, max_utterances: int = CONTEXT_UTTERANCES,
+                 summary_chars: int = CONTEXT_SUMMARY_CHARS):
+        self.recent = deque(maxlen=max_utterances)
+        self.summary = deque()
+        self.summary_chars = summary_chars
+        self._summary_size = 0
+
+    def add(self, transcript: str, speaker: str = None):
+        """Record an utterance once it has been analyzed"""
+        line = f"{speaker}: {transcript}" if speaker and speaker != "Unknown" else transcript
+
+        if len(self.recent) == self.recent.maxlen:
+            self._summarize(self.recent[0])
+        self.recent.append(line)
+
+    def _summarize(self, line: str):
+        """Fold an utterance that fell out of the window into the summary"""
+        if len(line) > SUMMARY_LINE_CHARS:
+            line = line[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+
+        self.summary.append(line)
+        self._summary_size += len(line)
+
+        # Oldest summary lines go first once we're over budget
+        while self._summary_size > self.summary_chars and self.summary:
+            self._summary_size -= len(self.summary.popleft())
+
+    def render(self) -> str:
+        """Context block for the prompt (empty string at meeting start)"""
+        parts = []
+        if self.summary:
+            parts.append("Earlier in the meeting (summary):\n" + "\n".join(f"- {l}" for l in self.summary))
+        if self.recent:
+            parts.append("Recent conversation:\n" + "\n".join(f"- {l}" for l in self.recent))
+        return "\n\n".join(parts)
+
+    def to_dict(self) -> dict:
+        return {"recent": list(self.recent), "summary": list(self.summary)}
+
+    def load(self, data: dict):
+        """Restore what to_dict() saved"""
+        self.recent.extend(data.get("recent", []))
+        for line in data.get("summary", []):
+            self.summary.append(line)
+            self._summary_size += len(line)
@@ -0,0 +1,245 @@
+import re
+
+# ==========================================
+# ONE COMPILED PASS FOR EVERY REGEX INTENT
+# ==========================================
+# Scanning the transcript with every intent pattern is slow in Python's re:
+# patterns like "(\w+)\s+will" are tried at every character. Instead we do one
+# pass with a plain literal keyword alternation over the lowercased text (no
+# groups, so re can use its fast literal-prefix search), then run the full
+# precompiled pattern only where a keyword was found.
+
+TRIGGERS = re.compile(r"will|decided|agreed|park|discuss|table|let's|we'll")
+# Same pass for text whose lowercase form changes length (rare unicode)
+TRIGGERS_ANYCASE = re.compile(TRIGGERS.pattern, re.IGNORECASE)
+
+INTENT_PATTERNS = {
+    # Parking: specific items
+    "park": re.compile(r"park\s+(?:the\s+)?([a-z\s]+?)\s+(?:discussion|for\s+(?:next|later|another))", re.IGNORECASE),
+    "discuss": re.compile(r"discuss\s+(?:the\s+)?([a-z\s]+?)\s+(?:later|another\s+time|next\s+(?:time|meeting))", re.IGNORECASE),
+    "table": re.compile(r"table\s+(?:the\s+)?([a-z\s]+?)(?:\s+for|$)", re.IGNORECASE),
+
+    # Parking: general "discuss it/this/that later"
+    "general": re.compile(r"discuss\s+(?:it|this|that)\s+later", re.IGNORECASE),
+
+    # Actions: "NAME will X by WHEN"
+    "action": re.compile(r"(\w+)\s+will\s+(.+?)\s+by\s+(\w+(?:\s+\w+)?)", re.IGNORECASE),
+
+    # Decisions: "NAME/we/team decided to X", "we agreed to X", "let's use X"
+    "decided": re.compile(r"(\w+)\s+decided\s+to\s+(.+?)(?:\.|,|$)", re.IGNORECASE),
+    "agreed": re.compile(r"(?:we|team)\s+agreed\s+to\s+(.+?)(?:\.|,|$)", re.IGNORECASE),
+    "lets": re.compile(r"(?:let's|we'll)\s+(?:go with|use)\s+(.+?)(?:\.|,|$)", re.IGNORECASE),
+}
+
+# Intents each keyword can open, tried in order ("we decided" is covered by NAME decided)
+TRIGGER_INTENTS = {
+    "will": ["action"],
+    "decided": ["decided"],
+    "agreed": ["agreed"],
+    "park": ["park"],
+    "discuss": ["discuss", "general"],
+    "table": ["table"],
+    "let's": ["lets"],
+    "we'll": ["lets"],
+}
+
+# These patterns start at the word before their keyword
+STARTS_AT_PREVIOUS_WORD = {"action", "decided", "agreed"}
+
+# Results are reported grouped by intent in this order (parking, actions, decisions)
+INTENT_ORDER = {
+    name: i for i, name in enumerate(
+        ["park", "discuss", "table", "general", "action", "decided", "agreed", "lets"]
+    )
+}
+
+# ==========================================
+# PRE-SCREEN: IS THERE ANYTHING TO EXTRACT?
+# ==========================================
+# Cheap cues that an utterance might hold an action, decision or parked topic.
+# Each cue belongs to a category; the score is the sum of the categories seen.
+# A lone commitment or deadline cue ("I will grab a coffee", "due to traffic")
+# stays below the default PRESCREEN_THRESHOLD of 0.3; together they reach it.
+INTENT_CUES = re.compile(
+    r"\b(?:can you|could you|please|will|won't|going to|gonna|need to|needs to|have to|has to|should|must|i'll|we'll|you'll|"
+    r"he'll|she'll|they'll|by (?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|tomorrow|tonight|"
+    r"today|next|end of|eod|eow|noon|the end)|deadline|due|decided?|decision|agreed?|agreement|go with|"
+    r"settled?|approved?|finali[sz]ed?|park|parking|table|later|offline|revisit|follow[ -]up|next meeting|"
+    r"another time|action item|todo|to-do|assign(?:ed)?|take care of|owns?|let's)\b",
+    re.IGNORECASE
+)
+
+CUE_CATEGORIES = {
+    "commitment": ("can you", "could you", "please", "will", "won't", "going to", "gonna", "need to", "needs to", "have to", "has to",
+                   "should", "must", "i'll", "we'll", "you'll", "he'll", "she'll", "they'll",
+                   "take care of", "own", "owns"),
+    "deadline": ("by ", "deadline", "due"),
+    "decision": ("decide", "decided", "decision", "agree", "agreed", "agreement", "go with", "settle",
+                 "settled", "approve", "approved", "finalise", "finalised", "finalize", "finalized", "let's"),
+    "parking": ("park", "parking", "table", "later", "offline", "revisit", "next meeting", "another time"),
+    "task": ("action item", "todo", "to-do", "assign", "assigned", "follow up", "follow-up"),
+}
+
+CUE_WEIGHTS = {"commitment": 0.2, "deadline": 0.2, "decision": 0.5, "parking": 0.5, "task": 0.6}
+
+TRAILING_CONJUNCTION = re.compile(r"\s+(and|but|or|then)$", re.IGNORECASE)
+PUNCTUATION = str.maketrans({c: " " for c in "!\"#$%&'()*+,-./:;<=>?@[\\]^`{|}~"})
+ARTICLES = {"the", "a", "an"}
+
+
+def _previous_word_start(transcript: str, keyword_start: int) -> int:
+    """Index where the word before the keyword starts (-1 if there isn't one)"""
+    i = keyword_start
+    while i > 0 and transcript[i - 1].isspace():
+        i -= 1
+    if i == keyword_start:
+        return -1   # keyword isn't preceded by whitespace
+    word_end = i
+    while i > 0 and (transcript[i - 1].isalnum() or transcript[i - 1] == "_"):
+        i -= 1
+    return i if i < word_end else -1
+
+
+def scan_intents(transcript: str) -> list:
+    """
+    Find every regex intent with a single keyword pass
+    Returns (intent, match) pairs grouped in INTENT_ORDER; like separate
+    finditer() calls, matches of the same intent never overlap
+    """
+    lowered = transcript.lower()
+    if len(lowered) == len(transcript):
+        triggers = TRIGGERS.finditer(lowered)
+    else:
+        triggers = TRIGGERS_ANYCASE.finditer(transcript)
+
+    hits = []
+    last_end = {}
+
+    for trigger in triggers:
+        for intent in TRIGGER_INTENTS[trigger.group().lower()]:
+            pattern = INTENT_PATTERNS[intent]
+            floor = last_end.get(intent, 0)
+            match = None
+
+            if intent in STARTS_AT_PREVIOUS_WORD:
+                start = _previous_word_start(transcript, trigger.start())
+                if start < 0:
+                    continue
+                # Leftmost start inside that word, as re.finditer would pick
+                for i in range(max(start, floor), trigger.start()):
+                    match = pattern.match(transcript, i)
+                    if match:
+                        break
+            elif trigger.start() >= floor:
+                match = pattern.match(transcript, trigger.start())
+
+            if match:
+                hits.append((intent, match))
+                last_end[intent] = match.end()
+
+    hits.sort(key=lambda hit: INTENT_ORDER[hit[0]])
+    return hits
+
+
+def normalize_key(text: str) -> str:
+    """Lowercase, drop punctuation and articles, collapse whitespace"""
+    words = text.lower().translate(PUNCTUATION).split()
+    return " ".join(word for word in words if word not in ARTICLES)
+
+
+class DedupeIndex:
+    """Set of normalized keys, so 'the Budget' and 'budget' count as the same item"""
+
+    def __init__(self, items=()):
+        self._keys = set(normalize_key(item) for item in items)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_key(text) in self._keys
+
+    def add(self, text: str):
+        self._keys.add(normalize_key(text))
+
+
+def extract_regex_items(transcript: str, hits: list = None) -> list:
+    """
+    Turn regex hits into items shaped like the LLM's output
+    (type action_item / parking_lot / decision)
+    hits: scan_intents() of this transcript, if the caller already has it
+    """
+    items = []
+    general_parked = False
+
+    if hits is None:
+        hits = scan_intents(transcript)
+
+    for intent, match in hits:
+        if intent in ("park", "discuss", "table"):
+            item = match.group(1).strip()
+
+            # Remove "the" prefix
+            if item.lower().startswith("the "):
+                item = item[4:]
+
+            items.append({"type": "parking_lot", "item": item.strip()})
+
+        elif intent == "general":
+            # Only add once even if it's said several times
+            if not general_parked:
+                general_parked = True
+                items.append({"type": "parking_lot", "item": "discussion topic"})
+
+        elif intent == "action":
+            who = match.group(1).strip().capitalize()
+            what = match.group(2).strip()
+            when = match.group(3).strip().capitalize()
+
+            # Clean up
+            when = TRAILING_CONJUNCTION.sub("", when).strip()
+            what = TRAILING_CONJUNCTION.sub("", what).strip()
+
+            items.append({"type": "action_item", "speaker": who, "task": what, "deadline": when})
+
+        elif intent == "decided":
+            # "Mary decided to use frontend"
+            decided = match.group(2).strip().rstrip('.')
+            items.append({
+                "type": "decision",
+                "speaker": match.group(1).capitalize(),
+                "decision": f"use {decided}",
+                "what": decided
+            })
+
+        else:
+            # "we agreed to X", "let's use X"
+            decided = match.group(1).strip().rstrip('.')
+            items.append({"type": "decision", "speaker": "Team", "decision": decided, "what": decided})
+
+    return items
+
+
+def _cue_category(cue: str) -> str:
+    for category, cues in CUE_CATEGORIES.items():
+        if cue in cues or (category == "deadline" and cue.startswith("by ")):
+            return category
+    return None
+
+
+def intent_score(transcript: str, hits: list = None) -> float:
+    """
+    How likely the utterance holds something worth extracting, 0.0 - 1.0
+    A full regex intent match is certain; otherwise cue categories add up
+    ("will" alone is weak, "will ... by Friday" is not)
+    hits: scan_intents() of this transcript, if the caller already has it
+    """
+    if hits is None:
+        hits = scan_intents(transcript)
+    if hits:
+        return 1.0
+
+    categories = set()
+    for cue in INTENT_CUES.finditer(transcript):
+        category = _cue_category(cue.group().lower())
+        if category:
+            categories.add(category)
+
+    return min(1.0, sum(CUE_WEIGHTS[c] for c in categories))
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+
+from outbox import ClientTooSlow, Outbox
+
+logger = logging.getLogger(__name__)
+
+HUB_QUEUE_SIZE = int(os.getenv("HUB_QUEUE_SIZE", "32"))          # frames a viewer may fall behind
+HUB_SEND_TIMEOUT = float(os.getenv("HUB_SEND_TIMEOUT", "10"))    # seconds before a stuck viewer is dropped
+
+
+class Subscriber(Outbox):
+    """
+    One viewer of a meeting: an Outbox of already-serialized frames, drained
+    by the viewer's own task so a slow network only delays itself
+    - More than max_queue frames behind: the backlog is dropped and the
+      viewer gets one fresh snapshot instead (all missed updates coalesced)
+    - A send stuck for send_timeout disconnects the viewer
+    """
+
+    def __init__(self, hub: "MeetingHub", meeting_id: str, websocket, max_queue: int, send_timeout: float):
+        super().__init__(websocket, max_queue, send_timeout)
+        self.hub = hub
+        self.meeting_id = meeting_id
+        self._resync = True      # first thing a viewer gets is the full state
+        self._ready.set()
+
+    def offer(self, frame: str):
+        """Queue a frame without ever waiting on the viewer"""
+        if self._resync:
+            # A snapshot is already due and will include this update
+            self.hub.coalesced += 1
+            return
+        self.put("text", frame)
+
+    def _overflow(self):
+        self.hub.coalesced += len(self._frames) + 1
+        self._frames.clear()
+        self._resync = True
+
+    async def run(self):
+        """Deliver frames until the viewer disconnects or stalls"""
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                if self._resync:
+                    self._resync = False
+                    await self._send("text", self.hub.snapshot_frame(self.meeting_id))
+                await self.flush()
+        except ClientTooSlow:
+            self.hub.dropped += 1
+            logger.warning(f"🐢 Viewer of {self.meeting_id} stalled for {self.send_timeout}s, dropping it")
+
+
+class MeetingHub:
+    """
+    Meeting pub/sub: one producer, any number of dashboards watching
+    - publish() serializes each update once; every viewer gets the same string
+    - Snapshots for new or lagging viewers are serialized once per update
+    - Each viewer has a bounded queue, so none of them can hold up the
+      producer or the other viewers
+    """
+
+    def __init__(self, max_queue: int = HUB_QUEUE_SIZE, send_timeout: float = HUB_SEND_TIMEOUT):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self._subscribers = {}      # meeting_id -> set of Subscriber
+        self._snapshot_fns = {}     # meeting_id -> callable returning the full state
+        self._versions = {}         # meeting_id -> updates published while watched
+        self._snapshots = {}        # meeting_id -> (version, frame)
+
+        self.published = 0
+        self.coalesced = 0     # updates replaced by a snapshot for a lagging viewer
+        self.dropped = 0
+
+    def subscribe(self, meeting_id: str, websocket, snapshot) -> Subscriber:
+        """Watch a meeting; snapshot() gives its full state for (re)syncs"""
+        subscriber = Subscriber(self, meeting_id, websocket, self.max_queue, self.send_timeout)
+        self._subscribers.setdefault(meeting_id, set()).add(subscriber)
+        self._snapshot_fns[meeting_id] = snapshot
+        self._versions.setdefault(meeting_id, 0)
+        logger.info(f"👀 Viewer joined {meeting_id} ({len(self._subscribers[meeting_id])} watching)")
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        meeting_id = subscriber.meeting_id
+        subscribers = self._subscribers.get(meeting_id, set())
+        subscribers.discard(subscriber)
+        if not subscribers:
+            for registry in (self._subscribers, self._snapshot_fns, self._versions, self._snapshots):
+                registry.pop(meeting_id, None)
+
+    def publish(self, meeting_id: str, message: dict) -> int:
+        """Send an update to everyone watching, returns how many viewers got it"""
+        subscribers = self._subscribers.get(meeting_id)
+        if not subscribers:
+            return 0
+
+        self._versions[meeting_id] += 1
+        frame = json.dumps(message)
+        for subscriber in subscribers:
+            subscriber.offer(frame)
+        self.published += 1
+        return len(subscribers)
+
+    def snapshot_frame(self, meeting_id: str) -> str:
+        """Serialized full state, shared by every viewer that needs it now"""
+        version = self._versions.get(meeting_id, 0)
+        cached = self._snapshots.get(meeting_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        frame = json.dumps({
+            "type": "session",
+            "meeting_id": meeting_id,
+            "state": self._snapshot_fns[meeting_id]()
+        })
+        self._snapshots[meeting_id] = (version, frame)
+        return frame
+
+    def stats(self) -> dict:
+        subscribers = [s for group in self._subscribers.values() for s in group]
+        return {
+            "meetings_watched": len(self._subscribers),
+            "viewers": len(subscribers),
+            "published": self.published,
+            "frames_queued": sum(len(s._frames) for s in subscribers),
+            "coalesced": self.coalesced,
+            "dropped_viewers": self.dropped
+        }
+
+
+# Shared hub for the whole process
+hub = MeetingHub()
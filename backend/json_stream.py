@@ -0,0 +1,56 @@
+import json
+
+
+class ArrayItemParser:
+    """
+    Incremental JSON parser for streamed LLM output
+    Feed it text as tokens arrive; every object that sits directly inside an
+    array (e.g. each element of {"items": [...]}) is returned as soon as its
+    closing brace comes in, without waiting for the rest of the document
+    """
+
+    def __init__(self):
+        self._stack = []          # open containers: "{" or "["
+        self._in_string = False
+        self._escaped = False
+        self._capture = None      # text of the object being collected
+        self._capture_depth = 0
+
+    def feed(self, text: str) -> list:
+        """Add a chunk of text, return the objects it completed"""
+        done = []
+        start = 0 if self._capture is not None else None
+
+        for i, char in enumerate(text):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._capture is None and self._stack and self._stack[-1] == "[":
+                    self._capture = ""
+                    self._capture_depth = len(self._stack)
+                    start = i
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._capture is not None and len(self._stack) == self._capture_depth:
+                    raw = self._capture + text[start:i + 1]
+                    self._capture = None
+                    start = None
+                    try:
+                        done.append(json.loads(raw))
+                    except json.JSONDecodeError:
+                        pass   # malformed element, the full parse will catch it
+
+        if self._capture is not None:
+            self._capture += text[start:]
+        return done
@@ -0,0 +1,37 @@
+"""
+Stand-in for ffmpeg in load tests: copies stdin to stdout unchanged
+The load generator sends 16 kHz mono s16le PCM (or WAV, whose header is
+skipped), which is already what the backend asks ffmpeg to produce.
+Takes (and ignores) ffmpeg's arguments:
+
+    FFMPEG_BIN="python loadtest/fake_ffmpeg.py" uvicorn main:app
+"""
+import sys
+
+WAV_HEADER_MAX = 4096
+
+
+def main():
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+
+    first = stdin.read1(WAV_HEADER_MAX) if hasattr(stdin, "read1") else stdin.read(WAV_HEADER_MAX)
+    if first.startswith(b"RIFF"):
+        data = first.find(b"data")
+        first = first[data + 8:] if data >= 0 else b""
+    stdout.write(first)
+    stdout.flush()
+
+    while True:
+        chunk = stdin.read1(65536)
+        if not chunk:
+            break
+        stdout.write(chunk)
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
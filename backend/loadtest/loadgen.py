@@ -0,0 +1,340 @@
+"""
+Load generator: many concurrent /ws (text) and /ws/audio sessions against a
+running backend, with p50/p95/p99 latencies and a JSON report
+
+Offline setup (no Ollama, no real ffmpeg needed):
+
+    python loadtest/mock_ollama.py --port 11435 --latency-ms 800 &
+    OLLAMA_URL=http://127.0.0.1:11435 FFMPEG_BIN="python loadtest/fake_ffmpeg.py" \\
+        uvicorn main:app --port 8000 &
+    python loadtest/loadgen.py --text-sessions 20 --audio-sessions 4 --utterances 10 \\
+        --speed 4 --out results.json --compare previous.json
+
+Audio sessions replay --audio-corpus files (one utterance each; .webm with a
+real ffmpeg, .pcm/.wav 16 kHz mono s16le with fake_ffmpeg) or generate
+speech-like PCM. Transcription still runs the real Whisper model.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import sys
+import time
+import uuid
+
+import httpx
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 16000
+PCM_BYTES_PER_SECOND = SAMPLE_RATE * 2
+WEBM_BYTES_PER_SECOND = 4000          # ~32 kbps Opus, for pacing .webm files
+
+TEXT_CORPUS = [
+    "Sarah will send the report by Friday.",
+    "Can everyone see my screen now or should I share again?",
+    "Let's park the budget discussion for next week.",
+    "The numbers from last quarter look roughly the same as before.",
+    "Mary decided to use React, the team agreed to hire two people.",
+    "Thanks everyone, that was a really useful conversation today.",
+    "John will fix the login bug by next Monday.",
+    "We will discuss it later.",
+    "I was out on Monday so I missed the previous sync.",
+    "Let's go with the managed database.",
+]
+
+METRIC_LINE = re.compile(r'^(sarah_\w+)_bucket\{(.*?)le="([^"]+)"\} (\S+)$')
+
+
+def summarize(samples: list) -> dict:
+    """Latency summary in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    values = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean": round(float(values.mean()), 1),
+        "p50": round(float(np.percentile(values, 50)), 1),
+        "p95": round(float(np.percentile(values, 95)), 1),
+        "p99": round(float(np.percentile(values, 99)), 1),
+        "max": round(float(values.max()), 1),
+    }
+
+
+def synthetic_utterance(seconds: float, seed: int) -> bytes:
+    """Voice-like PCM (harmonics with a syllable rhythm) followed by a pause"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = rng.uniform(110, 220)
+    voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+    syllables = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)
+    speech = 0.25 * voice * syllables + 0.01 * rng.standard_normal(len(t))
+    pause = 0.002 * rng.standard_normal(SAMPLE_RATE)
+    audio = np.concatenate([speech, pause])
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def load_audio_corpus(path: str) -> list:
+    """(name, bytes, bytes per second) for each file in the directory"""
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        with open(os.path.join(path, name), "rb") as f:
+            data = f.read()
+        rate = WEBM_BYTES_PER_SECOND if name.endswith(".webm") else PCM_BYTES_PER_SECOND
+        corpus.append((name, data, rate))
+    return corpus
+
+
+class Results:
+    def __init__(self):
+        self.samples = {"text_result": [], "text_first_intervention": [], "audio_transcription": []}
+        self.errors = {"text_errors": 0, "text_timeouts": 0, "audio_no_response": 0, "connection_errors": 0}
+        self.completed = {"text": 0, "audio": 0}
+
+
+async def wait_for_reply(ws, timeout: float, matches):
+    """Read messages until matches(msg) is true, returns (msg, messages seen)"""
+    seen = []
+    deadline = time.perf_counter() + timeout
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        raw = await asyncio.wait_for(ws.recv(), remaining)
+        if isinstance(raw, bytes):
+            continue   # synthesized voice
+        msg = json.loads(raw)
+        seen.append(msg)
+        if matches(msg):
+            return msg, seen
+
+
+async def text_session(index: int, args, run_id: str, results: Results):
+    url = f"{args.ws_url}/ws?meeting={run_id}-text-{index}&ordered=0"
+    corpus = args.text_corpus
+    gap = args.gap_ms / 1000 / args.speed if args.speed > 0 else 0
+
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            await wait_for_reply(ws, args.timeout, lambda m: m.get("type") == "session")
+
+            for n in range(args.utterances):
+                started = time.perf_counter()
+                await ws.send(json.dumps({"id": n, "transcript": corpus[(index + n) % len(corpus)]}))
+                first = None
+                try:
+                    while True:
+                        msg, _ = await wait_for_reply(ws, args.timeout, lambda m: m.get("id") == n)
+                        if msg.get("type") == "intervention" and first is None:
+                            first = time.perf_counter() - started
+                        if msg.get("type") in ("result", "error"):
+                            break
+                except asyncio.TimeoutError:
+                    results.errors["text_timeouts"] += 1
+                    continue
+
+                if msg["type"] == "error":
+                    results.errors["text_errors"] += 1
+                else:
+                    results.samples["text_result"].append(time.perf_counter() - started)
+                    results.completed["text"] += 1
+                if first is not None:
+                    results.samples["text_first_intervention"].append(first)
+                await asyncio.sleep(gap)
+    except (OSError, websockets.WebSocketException) as e:
+        print(f"text session {index}: {e}", file=sys.stderr)
+        results.errors["connection_errors"] += 1
+
+
+async def audio_session(index: int, args, run_id: str, results: Results):
+    chunk_seconds = args.chunk_ms / 1000
+
+    for n in range(args.utterances):
+        if args.audio_corpus:
+            _, data, rate = args.audio_corpus[(index + n) % len(args.audio_corpus)]
+        else:
+            data, rate = synthetic_utterance(args.utterance_seconds, seed=index * 1000 + n), PCM_BYTES_PER_SECOND
+        chunk_bytes = max(2, int(rate * chunk_seconds) // 2 * 2)
+
+        # One recording per connection, like the browser restarting MediaRecorder
+        url = f"{args.ws_url}/ws/audio?protocol=3&meeting={run_id}-audio-{index}"
+        try:
+            async with websockets.connect(url, max_size=None) as ws:
+                await wait_for_reply(ws, args.timeout, lambda m: m.get("type") == "session")
+
+                for offset in range(0, len(data), chunk_bytes):
+                    await ws.send(data[offset:offset + chunk_bytes])
+                    if args.speed > 0:
+                        await asyncio.sleep(chunk_seconds / args.speed)
+                sent_at = time.perf_counter()
+
+                try:
+                    await wait_for_reply(ws, args.timeout, lambda m: m.get("type") == "transcription")
+                except asyncio.TimeoutError:
+                    results.errors["audio_no_response"] += 1
+                    continue
+                results.samples["audio_transcription"].append(time.perf_counter() - sent_at)
+                results.completed["audio"] += 1
+        except (OSError, websockets.WebSocketException) as e:
+            print(f"audio session {index}: {e}", file=sys.stderr)
+            results.errors["connection_errors"] += 1
+
+
+async def scrape_histograms(http_url: str) -> dict:
+    """{(metric, labels): {le: cumulative count}} from /metrics"""
+    histograms = {}
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            text = (await client.get(f"{http_url}/metrics")).text
+    except httpx.HTTPError as e:
+        print(f"could not scrape /metrics: {e}", file=sys.stderr)
+        return histograms
+
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            name, labels, le, value = match.groups()
+            key = (name, labels.rstrip(","))
+            histograms.setdefault(key, {})[float(le)] = float(value)
+    return histograms
+
+
+def histogram_quantile(q: float, buckets: dict) -> float:
+    """Prometheus-style quantile estimate from cumulative bucket counts"""
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]]
+    if total <= 0:
+        return float("nan")
+    rank = q * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                return previous_bound
+            fraction = (rank - previous_count) / (count - previous_count) if count > previous_count else 0
+            return previous_bound + (bound - previous_bound) * fraction
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def server_stages(before: dict, after: dict) -> dict:
+    """Per-stage percentiles (ms) for the observations made during the run"""
+    stages = {}
+    for key, buckets in after.items():
+        name, labels = key
+        delta = {le: count - before.get(key, {}).get(le, 0) for le, count in buckets.items()}
+        count = delta[max(delta)]
+        if count <= 0:
+            continue
+        label = labels.split('"')[1] if '"' in labels else name.replace("sarah_", "").replace("_seconds", "")
+        stages[label] = {
+            "count": int(count),
+            **{f"p{int(q * 100)}": round(histogram_quantile(q, delta) * 1000, 1) for q in (0.5, 0.95, 0.99)}
+        }
+    return stages
+
+
+def print_report(report: dict, previous: dict = None):
+    def row(name, summary, old=None):
+        if not summary.get("count"):
+            return
+        cells = "  ".join(f"{k} {summary[k]:>8.1f}" for k in ("p50", "p95", "p99"))
+        line = f"  {name:<28} n={summary['count']:<6} {cells}"
+        if old and old.get("count"):
+            line += "   Δp95 " + f"{summary['p95'] - old['p95']:+.1f}"
+        print(line)
+
+    print(f"\n=== {report['label']} ({report['duration_seconds']}s) ===")
+    print("Client latency (ms):")
+    for name, summary in report["client"].items():
+        row(name, summary, (previous or {}).get("client", {}).get(name))
+    print("Server stages (ms, from /metrics histograms):")
+    for name, summary in report["server"].items():
+        row(name, summary, (previous or {}).get("server", {}).get(name))
+    print("Throughput:", ", ".join(f"{k} {v}" for k, v in report["throughput"].items()))
+    print("Errors:", ", ".join(f"{k} {v}" for k, v in report["errors"].items()))
+
+
+async def run(args) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    results = Results()
+    before = await scrape_histograms(args.url)
+
+    started = time.perf_counter()
+    sessions = [text_session(i, args, run_id, results) for i in range(args.text_sessions)]
+    sessions += [audio_session(i, args, run_id, results) for i in range(args.audio_sessions)]
+    await asyncio.gather(*sessions)
+    duration = time.perf_counter() - started
+
+    after = await scrape_histograms(args.url)
+
+    return {
+        "label": args.label,
+        "run_id": run_id,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - duration)),
+        "duration_seconds": round(duration, 2),
+        "config": {
+            "text_sessions": args.text_sessions,
+            "audio_sessions": args.audio_sessions,
+            "utterances": args.utterances,
+            "speed": args.speed,
+            "gap_ms": args.gap_ms,
+            "chunk_ms": args.chunk_ms,
+            "audio_corpus": len(args.audio_corpus) if args.audio_corpus else "synthetic",
+        },
+        "throughput": {
+            "text_per_second": round(results.completed["text"] / duration, 2),
+            "audio_per_second": round(results.completed["audio"] / duration, 2),
+        },
+        "client": {name: summarize(samples) for name, samples in results.samples.items()},
+        "server": server_stages(before, after),
+        "errors": results.errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="backend base URL")
+    parser.add_argument("--text-sessions", type=int, default=10)
+    parser.add_argument("--audio-sessions", type=int, default=0)
+    parser.add_argument("--utterances", type=int, default=10, help="per session")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, 4 = 4x faster, 0 = no pauses")
+    parser.add_argument("--gap-ms", type=float, default=3000, help="pause between typed lines at speed 1")
+    parser.add_argument("--chunk-ms", type=float, default=250, help="audio chunk length (MediaRecorder timeslice)")
+    parser.add_argument("--utterance-seconds", type=float, default=2.0, help="length of generated speech")
+    parser.add_argument("--text-corpus", help="file with one transcript per line")
+    parser.add_argument("--audio-corpus", help="directory of recordings, one utterance per file")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for each reply")
+    parser.add_argument("--label", default="loadtest")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args()
+
+    args.url = args.url.rstrip("/")
+    args.ws_url = "ws" + args.url[len("http"):]
+    if args.text_corpus:
+        with open(args.text_corpus) as f:
+            args.text_corpus = [line.strip() for line in f if line.strip()]
+    else:
+        args.text_corpus = TEXT_CORPUS
+    args.audio_corpus = load_audio_corpus(args.audio_corpus) if args.audio_corpus else None
+
+    report = asyncio.run(run(args))
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(report, previous)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
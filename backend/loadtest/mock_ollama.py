@@ -0,0 +1,113 @@
+"""
+Mock Ollama server for load tests: /api/generate with configurable latency
+and failures, answers built from the regex extractor so they look real
+
+    python loadtest/mock_ollama.py --port 11435 --latency-ms 800 --jitter-ms 200 --fail-rate 0.02
+    OLLAMA_URL=http://localhost:11435 uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from extraction import extract_regex_items  # noqa: E402
+
+NEW_TRANSCRIPT = re.compile(r'NEW transcript:\s*"(.*)"\s*$', re.DOTALL)
+
+app = FastAPI(title="Mock Ollama")
+config = argparse.Namespace(latency_ms=500.0, jitter_ms=100.0, fail_rate=0.0, hang_rate=0.0,
+                            hang_seconds=60.0, chunk_chars=4, seed=None)
+stats = {"requests": 0, "streamed": 0, "failed": 0, "hung": 0}
+
+
+def answer_for(prompt: str) -> str:
+    """JSON the real model would ideally produce for the prompt's transcript"""
+    match = NEW_TRANSCRIPT.search(prompt)
+    items = []
+    for item in extract_regex_items(match.group(1) if match else ""):
+        if item["type"] == "decision":
+            items.append({"type": "decision", "decision": item["decision"]})
+        else:
+            items.append(dict(item))
+    return json.dumps({"items": items})
+
+
+def latency() -> float:
+    return max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+
+    roll = random.random()
+    if roll < config.fail_rate:
+        stats["failed"] += 1
+        await asyncio.sleep(latency() / 4)
+        return JSONResponse({"error": "mock failure"}, status_code=500)
+    if roll < config.fail_rate + config.hang_rate:
+        stats["hung"] += 1
+        await asyncio.sleep(config.hang_seconds)
+
+    # Priming call (num_predict 1): just hand back some context tokens
+    if body.get("options", {}).get("num_predict") == 1:
+        await asyncio.sleep(latency())
+        return {"response": "{", "done": True, "context": list(range(64))}
+
+    text = answer_for(body.get("prompt", ""))
+    delay = latency()
+
+    if not body.get("stream", True):
+        await asyncio.sleep(delay)
+        return {"response": text, "done": True, "context": []}
+
+    stats["streamed"] += 1
+    chunks = [text[i:i + config.chunk_chars] for i in range(0, len(text), config.chunk_chars)]
+
+    async def tokens():
+        # Time to first token is a third of the latency, the rest is spread over the tokens
+        await asyncio.sleep(delay / 3)
+        per_chunk = (delay * 2 / 3) / max(1, len(chunks))
+        for chunk in chunks:
+            yield json.dumps({"response": chunk, "done": False}) + "\n"
+            await asyncio.sleep(per_chunk)
+        yield json.dumps({"response": "", "done": True, "context": []}) + "\n"
+
+    return StreamingResponse(tokens(), media_type="application/x-ndjson")
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=500, help="mean generation time")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="std deviation of the latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests that stall (timeouts)")
+    parser.add_argument("--hang-seconds", type=float, default=60)
+    parser.add_argument("--chunk-chars", type=int, default=4, help="characters per streamed chunk")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    vars(config).update(vars(args))
+    random.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()   # DEBUG shows per-chunk logs
+
+_listener = None
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    """
+    Route all logging through a queue: callers only enqueue the record,
+    a background thread does the actual write to stderr
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
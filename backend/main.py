@@ -1,11 +1,43 @@
-from transcription import transcribe_audio
-from tts import text_to_speech
+from transcription import StreamingDecoder, scheduler, transcribe_pcm, whisper, WHISPER_EAGER_LOAD
+from segmenter import StreamingSegmenter
+from tts import text_to_speech, tts
+import asyncio
 import base64
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from agent import analyze_transcript
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from agent import PRESCREEN_THRESHOLD, analyze_transcript, prescreen_stats
+from analysis_cache import analysis_cache
+from meeting_state import MeetingState, merge_deltas
+from hub import hub
+from outbox import ClientTooSlow, Outbox
+from roster import DEFAULT_ROSTER, Roster
+from sessions import sessions
+from ollama_client import ollama
+from log_config import setup_logging
+from metrics import Counter, Gauge, STAGE_SECONDS, UTTERANCE_SECONDS, WEBSOCKET_CONNECTIONS, render
 import json
+import logging
+import os
+import time
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Highest /ws/audio wire protocol this server speaks
+# v2: audio as binary frames, v3: interventions streamed as they're found,
+# v4: Sarah's voice streamed as PCM chunks while it's being synthesized
+PROTOCOL_VERSION = 4
+
+# Transcripts one /ws connection may have in analysis at the same time
+TEXT_MAX_IN_FLIGHT = int(os.getenv("TEXT_MAX_IN_FLIGHT", "4"))
+
+# Messages a connection may have read but not yet handled; beyond this the
+# reader stops receiving, so a client sending faster than we handle is held
+# back by the socket instead of growing memory
+INBOX_SIZE = int(os.getenv("WS_INBOX_SIZE", "64"))
 
 app = FastAPI(title="Sarah - AI Meeting Facilitator")
 
@@ -17,206 +49,543 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+async def startup():
+    """Start loading Whisper without blocking the server from coming up"""
+    if WHISPER_EAGER_LOAD:
+        app.state.whisper_loader = asyncio.create_task(whisper.load_in_background(scheduler))
+    sessions.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush meetings, release pooled Ollama connections, Whisper/TTS workers and the cache file"""
+    await sessions.shutdown()
+    await ollama.aclose()
+    await scheduler.shutdown()
+    tts.shutdown()
+    analysis_cache.close()
+
+
+async def receive_messages(websocket: WebSocket, inbox: asyncio.Queue):
+    """
+    Read client messages into the inbox until the socket closes
+    Text frames are JSON control messages, binary frames are raw audio
+    """
+    while True:
+        message = await websocket.receive()
+        
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        
+        received_at = time.perf_counter()
+        if message.get("bytes") is not None:
+            await inbox.put({"type": "audio", "bytes": message["bytes"], "received_at": received_at})
+        elif message.get("text") is not None:
+            data = json.loads(message["text"])
+            data["received_at"] = received_at
+            await inbox.put(data)
+
+
+def observe_receive(data: dict):
+    """Record how long a message sat in the inbox before being handled"""
+    received_at = data.pop("received_at", None)
+    if received_at is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - received_at, stage="receive")
+
+
+def negotiate_protocol(websocket: WebSocket) -> int:
+    """
+    Pick the wire protocol for a socket
+    1 = base64 audio inside JSON (original clients)
+    2 = raw audio in binary frames, JSON text frames for everything else
+    """
+    try:
+        requested = int(websocket.query_params.get("protocol", "1"))
+    except ValueError:
+        requested = 1
+    return max(1, min(requested, PROTOCOL_VERSION))
+
+
+async def run_connection(websocket: WebSocket, handler, meeting_state: MeetingState, name: str,
+                         buffered: bool = True):
+    """
+    Run a websocket as three tasks: a reader, a message handler and a sender
+    The reader notices disconnects even while the handler is busy analyzing,
+    so in-flight Ollama/Whisper work gets cancelled instead of running on
+    The handler sends through an Outbox, so a client that reads slowly
+    never holds up ingest (buffered=False: the handler sends directly)
+    """
+    inbox = asyncio.Queue(maxsize=INBOX_SIZE)
+    tasks = {asyncio.create_task(receive_messages(websocket, inbox))}
+    if buffered:
+        outbox = Outbox(websocket)
+        tasks.add(asyncio.create_task(outbox.run()))
+        tasks.add(asyncio.create_task(handler(outbox, inbox, meeting_state)))
+    else:
+        tasks.add(asyncio.create_task(handler(websocket, inbox, meeting_state)))
+    WEBSOCKET_CONNECTIONS.inc(endpoint=name.lower())
+    
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Also when the connection itself is cancelled: no child task outlives it
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        WEBSOCKET_CONNECTIONS.inc(-1, endpoint=name.lower())
+    
+    for task in done:
+        error = task.exception()
+        if isinstance(error, WebSocketDisconnect):
+            logger.info(f"👋 {name} client disconnected")
+        elif isinstance(error, ClientTooSlow):
+            logger.warning(f"🐢 {name} client stopped reading ({error}), closing")
+        elif error is not None:
+            logger.error(f"❌ {name} WebSocket error: {error}", exc_info=error)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """Handle text input from meeting transcript"""
     await websocket.accept()
-    print("💬 Text WebSocket connected")
+    logger.info("💬 Text WebSocket connected")
     
-    meeting_state = {
-        "actions": [],
-        "decisions": [],
-        "parking_lot": [],
-        "participation": {},
-        "sentiment": "neutral",
-        "energy": "medium"
-    }
+    meeting_state = await join_meeting(websocket)
+    try:
+        await run_connection(websocket, handle_text_messages, meeting_state, "Text")
+    finally:
+        sessions.close(meeting_state.meeting_id)
+
+
+async def join_meeting(websocket: WebSocket) -> MeetingState:
+    """
+    Attach the socket to its meeting (?meeting=<id>, a new one if missing)
+    and send the current state so a reconnecting client can catch up
+    """
+    meeting_id, meeting_state = await sessions.open(websocket.query_params.get("meeting"))
+    await websocket.send_json({
+        "type": "session",
+        "meeting_id": meeting_id,
+        "state": meeting_state.snapshot()
+    })
+    return meeting_state
+
+
+def register_roster(meeting_state: MeetingState, data: dict) -> dict:
+    """{"type": "roster", "names": [...]} adds participants for speaker detection"""
+    names = data.get("names") or []
+    participants = meeting_state.register_participants(names)
+    sessions.mark_dirty(meeting_state.meeting_id)
+    logger.info(f"👥 Roster for {meeting_state.meeting_id}: {participants} participants")
+    return {"type": "roster", "id": data.get("id"), "participants": participants}
+
+
+class InterventionStream:
+    """
+    Pushes interventions to the client while the LLM is still generating,
+    and remembers them so the final message only carries the rest
+    """
+
+    def __init__(self, websocket: Outbox, request_id=None, voiced: bool = False):
+        self.websocket = websocket
+        self.request_id = request_id
+        self.voiced = voiced     # the server will stream Sarah saying it, the browser mustn't
+        self.sent = set()
+
+    @staticmethod
+    def _key(intervention: dict):
+        return (intervention.get("type"), intervention.get("content"))
+
+    async def push(self, intervention: dict):
+        self.sent.add(self._key(intervention))
+        message = {"type": "intervention", "intervention": intervention}
+        if self.request_id is not None:
+            message["id"] = self.request_id
+        if self.voiced:
+            message["audio_stream"] = True
+        await self.websocket.send_json(message)
+
+    def remaining(self, interventions: list) -> list:
+        return [i for i in interventions if self._key(i) not in self.sent]
+
+
+class ReplySequencer:
+    """Sends replies in request order, holding back ones that finish early"""
+
+    def __init__(self, websocket: Outbox):
+        self.websocket = websocket
+        self.next_seq = 0
+        self.ready = {}
+        self.lock = asyncio.Lock()
+
+    async def send(self, seq: int, message: dict):
+        self.ready[seq] = message
+        async with self.lock:
+            while self.next_seq in self.ready:
+                await self.websocket.send_json(self.ready.pop(self.next_seq))
+                self.next_seq += 1
+
+
+async def handle_text_messages(websocket: Outbox, inbox: asyncio.Queue, meeting_state: MeetingState):
+    """
+    Multiplexed text session: one socket, many transcripts in flight
+    - Requests: {"id": <any>, "transcript": "..."}; every reply echoes the id
+    - Pipelining: up to TEXT_MAX_IN_FLIGHT transcripts are analyzed at once;
+      beyond that requests wait in the inbox, and once it holds INBOX_SIZE
+      the socket isn't read any more (backpressure)
+    - ?ordered=0 sends each reply as soon as it is ready, otherwise replies
+      come back in request order (streamed interventions are never held back)
+    - "audio": true in a request adds Sarah's voice (base64 WAV) to its reply
+    """
+    ordered = websocket.query_params.get("ordered", "1") != "0"
+    sequencer = ReplySequencer(websocket)
+    slots = asyncio.Semaphore(TEXT_MAX_IN_FLIGHT)
+    in_flight = set()
+    seq = 0
+    
+    async def reply(request_seq: int, message: dict):
+        if ordered:
+            await sequencer.send(request_seq, message)
+        else:
+            await websocket.send_json(message)
+    
+    async def run_request(request_seq: int, request_id, transcript: str, want_audio: bool):
+        try:
+            message = await analyze_text(websocket, request_id, transcript, meeting_state, want_audio)
+        except Exception as e:
+            logger.error(f"❌ Text request {request_id} failed: {e}")
+            message = {"type": "error", "id": request_id, "error": str(e)}
+        finally:
+            slots.release()
+        await reply(request_seq, message)
     
     try:
         while True:
-            data = await websocket.receive_json()
+            data = await inbox.get()
+            observe_receive(data)
+            request_id = data.get("id")
+            
+            if data.get("type") == "roster":
+                await reply(seq, register_roster(meeting_state, data))
+                seq += 1
+                continue
+            
             transcript = data.get("transcript", "")
             
-            if transcript.strip():
-                print(f"📝 Analyzing text: {transcript[:50]}...")
-                
-                # Sarah analyzes
-                result = await analyze_transcript(transcript, meeting_state)
-                
-                # Update meeting state
-                if "state" in result:
-                    meeting_state.update(result.get("state", {}))
-                
-                # Generate voice response for first intervention
-                audio_response = None
-                if result.get("interventions") and len(result["interventions"]) > 0:
-                    first_intervention = result["interventions"][0]
-                    intervention_text = first_intervention.get("content", "")
-                    
-                    print(f"🔊 Generating voice for: {intervention_text[:50]}...")
-                    audio_bytes = await text_to_speech(intervention_text)
-                    
-                    if audio_bytes:
-                        audio_response = base64.b64encode(audio_bytes).decode('utf-8')
-                        print(f"✅ Voice response ready ({len(audio_bytes)} bytes)")
-                
-                # Send live update to dashboard
-                await websocket.send_json({
-                    "interventions": result.get("interventions", []),
-                    "state": meeting_state,
-                    "audio": audio_response
-                })
-                
-    except WebSocketDisconnect:
-        print("👋 Text client disconnected")
-    except Exception as e:
-        print(f"❌ Text WebSocket error: {e}")
-        import traceback
-        traceback.print_exc()
+            if not transcript.strip():
+                if request_id is not None:
+                    await reply(seq, {"type": "result", "id": request_id, "interventions": [], "delta": {}, "audio": None})
+                    seq += 1
+                continue
+            
+            await slots.acquire()
+            task = asyncio.create_task(run_request(seq, request_id, transcript, bool(data.get("audio"))))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            seq += 1
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+async def analyze_text(websocket: Outbox, request_id, transcript: str, meeting_state: MeetingState,
+                       want_audio: bool = False) -> dict:
+    """Analyze one typed transcript, returns the reply for it"""
+    logger.debug(f"📝 Analyzing text: {transcript[:50]}...")
+    
+    # Sarah analyzes (interventions are streamed out as they're found)
+    stream = InterventionStream(websocket, request_id)
+    with STAGE_SECONDS.time(stage="analysis"):
+        result = await analyze_transcript(transcript, meeting_state.context, on_intervention=stream.push)
+    meeting_state.context.add(transcript)
+    
+    # Merge into the meeting (dedupes against earlier utterances); the reply
+    # carries exactly what this transcript changed
+    delta = meeting_state.apply(result)
+    sessions.mark_dirty(meeting_state.meeting_id)
+    
+    # Generate voice response for first intervention (only for clients that play it)
+    audio_response = None
+    if want_audio and result.get("interventions"):
+        first_intervention = result["interventions"][0]
+        intervention_text = first_intervention.get("content", "")
+        
+        logger.info(f"🔊 Generating voice for: {intervention_text[:50]}...")
+        audio_bytes = await text_to_speech(intervention_text)
+        
+        if audio_bytes:
+            audio_response = base64.b64encode(audio_bytes).decode('utf-8')
+            logger.info(f"✅ Voice response ready ({len(audio_bytes)} bytes)")
+    
+    # Live update for the dashboard (only what changed)
+    publish_update(meeting_state, transcript, result.get("interventions", []), delta)
+    return {
+        "type": "result",
+        "id": request_id,
+        "interventions": stream.remaining(result.get("interventions", [])),
+        "delta": delta,
+        "audio": audio_response
+    }
+
+
+def publish_update(meeting_state: MeetingState, transcript: str, interventions: list, delta: dict,
+                   speaker: str = None):
+    """Fan one utterance's result out to the meeting's /ws/watch viewers"""
+    hub.publish(meeting_state.meeting_id, {
+        "type": "update",
+        "meeting_id": meeting_state.meeting_id,
+        "transcript": transcript,
+        "speaker": speaker,
+        "interventions": interventions,
+        "delta": delta
+    })
 
 
 @app.websocket("/ws/audio")
 async def audio_websocket(websocket: WebSocket):
     """Handle audio streaming for voice input"""
     await websocket.accept()
-    print("🎤 Audio WebSocket connected")
+    logger.info("🎤 Audio WebSocket connected")
     
-    meeting_state = {
-        "actions": [],
-        "decisions": [],
-        "parking_lot": [],
-        "participation": {},
-        "sentiment": "neutral",
-        "energy": "medium"
-    }
+    meeting_state = await join_meeting(websocket)
+    try:
+        await run_connection(websocket, handle_audio_messages, meeting_state, "Audio")
+    finally:
+        sessions.close(meeting_state.meeting_id)
+
+
+@app.websocket("/ws/watch")
+async def watch_websocket(websocket: WebSocket):
+    """Read-only view of a meeting (?meeting=<id>) for room displays and extra laptops"""
+    await websocket.accept()
+    logger.info("👀 Watch WebSocket connected")
     
-    # Accumulate audio chunks
-    audio_chunks = []
+    meeting_id, meeting_state = await sessions.open(websocket.query_params.get("meeting"))
+    try:
+        # The hub's Subscriber is this viewer's outbox
+        await run_connection(websocket, handle_watch, meeting_state, "Watch", buffered=False)
+    finally:
+        sessions.close(meeting_id)
+
+
+async def handle_watch(websocket: WebSocket, inbox: asyncio.Queue, meeting_state: MeetingState):
+    """Snapshot first, then every update the meeting's producers publish"""
+    subscriber = hub.subscribe(meeting_state.meeting_id, websocket, meeting_state.snapshot)
+    try:
+        await subscriber.run()
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+async def handle_audio_messages(websocket: Outbox, inbox: asyncio.Queue, meeting_state: MeetingState):
+    """Decode the audio stream, segment it on pauses and push Sarah's analysis back"""
+    # One FFmpeg per socket, fed incrementally
+    decoder = StreamingDecoder()
+    segmenter = StreamingSegmenter()
+    session_id = f"audio-{id(websocket)}"
+    protocol = negotiate_protocol(websocket)
+    chunk_count = 0
     
     try:
         while True:
-            data = await websocket.receive_json()
+            data = await inbox.get()
+            observe_receive(data)
+            
+            if data.get("type") == "hello":
+                # In-band negotiation for clients that can't set query params
+                try:
+                    requested = int(data.get("protocol", 1))
+                except (TypeError, ValueError):
+                    requested = 1
+                protocol = max(1, min(requested, PROTOCOL_VERSION))
+                await websocket.send_json({"type": "hello", "protocol": protocol})
+                logger.info(f"🤝 Audio protocol v{protocol}")
+                continue
+            
+            if data.get("type") == "roster":
+                await websocket.send_json(register_roster(meeting_state, data))
+                continue
             
             if data.get("type") == "audio":
-                import time
-                current_time = time.time()
+                chunk_count += 1
+                logger.debug(f"📥 Received audio chunk #{chunk_count}")
                 
-                print(f"📥 Received audio chunk #{len(audio_chunks) + 1}")
+                # Binary frame (v2) or base64 inside JSON (v1)
+                audio_bytes = data.get("bytes")
+                if audio_bytes is None:
+                    audio_bytes = base64.b64decode(data.get("audio", ""))
                 
-                # Decode base64 audio
-                audio_base64 = data.get("audio", "")
-                audio_bytes = base64.b64decode(audio_base64)
+                # Feed the persistent decoder, run VAD on whatever PCM is out
+                await decoder.feed(audio_bytes)
                 
-                # Add to chunks
-                audio_chunks.append(audio_bytes)
+                utterances = segmenter.feed(decoder.read_pcm())
+                finals = [utterance for utterance in utterances if utterance.final]
+                if not finals:
+                    # Partial transcripts are best-effort: only the newest one
+                    # matters, and none at all if we're behind
+                    if utterances and inbox.qsize() == 0:
+                        await send_partial_transcript(websocket, utterances[-1], session_id)
+                    continue
                 
-                print(f"📊 Total chunks collected: {len(audio_chunks)}")
-                
-                # Wait for 3+ chunks before processing
-                if len(audio_chunks) >= 3:
-                    print(f"🎤 Got {len(audio_chunks)} chunks, transcribing now...")
-                    
-                    # Combine all chunks
-                    combined_audio = b''.join(audio_chunks)
-                    print(f"📊 Combined audio size: {len(combined_audio)} bytes")
-                    
-                    # Reset chunks for next recording
-                    audio_chunks = []
-                    
-                    # Transcribe combined audio with Whisper
-                    result = await transcribe_audio(combined_audio)
-                    transcript = result["text"]
-                    
-                    if transcript.strip():
-                        print(f"📝 Transcribed: {transcript}")
-                        
-                        # EXTRACT SPEAKER NAME
-                        speaker_name = extract_speaker_name(transcript)
-                        
-                        # UPDATE PARTICIPATION TRACKING
-                        if speaker_name:
-                            if speaker_name not in meeting_state["participation"]:
-                                meeting_state["participation"][speaker_name] = {
-                                    "turns": 0,
-                                    "time": 0
-                                }
-                            meeting_state["participation"][speaker_name]["turns"] += 1
-                            print(f"👤 Speaker: {speaker_name} ({meeting_state['participation'][speaker_name]['turns']} turns)")
-                        
-                        # Analyze with Sarah (Ollama + regex)
-                        analysis = await analyze_transcript(transcript, meeting_state)
-                        
-                        # Update state with analysis results
-                        if "state" in analysis:
-                            # Merge participation data (preserve speaker tracking)
-                            analysis_participation = analysis["state"].get("participation", {})
-                            for speaker, stats in meeting_state["participation"].items():
-                                if speaker not in analysis_participation:
-                                    analysis_participation[speaker] = stats
-                            analysis["state"]["participation"] = analysis_participation
-                            
-                            # Update meeting state
-                            meeting_state.update(analysis["state"])
-                        
-                        # GENERATE VOICE RESPONSE
-                        audio_response = None
-                        if analysis.get("interventions") and len(analysis["interventions"]) > 0:
-                            # Get first intervention to speak
-                            first_intervention = analysis["interventions"][0]
-                            intervention_text = first_intervention.get("content", "")
-                            
-                            print(f"🔊 Generating Sarah's voice response...")
-                            audio_bytes = await text_to_speech(intervention_text)
-                            
-                            if audio_bytes:
-                                # Convert to base64 for transmission
-                                audio_response = base64.b64encode(audio_bytes).decode('utf-8')
-                                print(f"✅ Voice response ready ({len(audio_bytes)} bytes)")
-                        
-                        # Send back: transcript + analysis + voice response
-                        await websocket.send_json({
-                            "type": "transcription",
-                            "transcript": transcript,
-                            "confidence": result["confidence"],
-                            "interventions": analysis.get("interventions", []),
-                            "state": meeting_state,
-                            "audio": audio_response  # Sarah's voice!
-                        })
-                        
-                        print(f"📤 Sent complete response to frontend")
-                        
-                    else:
-                        print("⚠️ Empty transcription, skipping")
-                    
-    except WebSocketDisconnect:
-        print("👋 Audio client disconnected")
+                for utterance in finals:
+                    await transcribe_utterance(websocket, utterance, session_id, meeting_state, protocol)
+                continue
+            
+            if data.get("type") == "end":
+                # Recording stopped: decode what FFmpeg still holds and close
+                # the last utterance, then tell the client it can hang up
+                await decoder.close()
+                finals = [utterance for utterance in segmenter.feed(decoder.read_pcm()) if utterance.final]
+                tail = segmenter.flush()
+                if tail is not None:
+                    finals.append(tail)
+                for utterance in finals:
+                    await transcribe_utterance(websocket, utterance, session_id, meeting_state, protocol)
+                await websocket.send_json({"type": "end"})
+    finally:
+        await decoder.close()
+
+
+async def transcribe_utterance(websocket: Outbox, utterance, session_id: str, meeting_state: MeetingState,
+                               protocol: int):
+    """Whisper on a finished utterance, then Sarah's analysis of it"""
+    logger.info(f"🎤 Utterance ended ({utterance.seconds:.1f}s), transcribing now...")
+    ended_at = time.perf_counter()
+    
+    # Transcribe the utterance with Whisper
+    result = await transcribe_pcm(utterance.audio, session_id)
+    transcript = result["text"]
+    
+    if transcript.strip():
+        await respond_to_speech(websocket, transcript, result, meeting_state, protocol)
+        UTTERANCE_SECONDS.observe(time.perf_counter() - ended_at)
+    else:
+        logger.warning("⚠️ Empty transcription, skipping")
+
+
+async def send_partial_transcript(websocket: Outbox, utterance, session_id: str):
+    """Show what's being said while the speaker is still talking"""
+    result = await transcribe_pcm(utterance.audio, session_id)
+    if result["text"].strip():
+        await websocket.send_json({
+            "type": "partial",
+            "transcript": result["text"]
+        })
+
+
+async def respond_to_speech(websocket: Outbox, transcript: str, result: dict, meeting_state: MeetingState,
+                            protocol: int = 1):
+    """Analyze a finished utterance and send transcript + analysis + voice back"""
+    logger.info(f"📝 Transcribed: {transcript}")
+    
+    # EXTRACT SPEAKER NAME
+    speaker_name = extract_speaker_name(transcript, meeting_state.roster)
+    
+    # UPDATE PARTICIPATION TRACKING
+    delta = {}
+    if speaker_name:
+        delta = meeting_state.record_turn(speaker_name)
+        logger.info(f"👤 Speaker: {speaker_name} ({meeting_state.participation[speaker_name]['turns']} turns)")
+    
+    # Analyze with Sarah (Ollama + regex); v3 clients get interventions as they're found
+    # v4 with Piper: the server speaks every intervention after the transcription message
+    stream_audio = protocol >= 4 and tts.enabled
+    stream = InterventionStream(websocket, voiced=stream_audio)
+    on_intervention = stream.push if protocol >= 3 else None
+    with STAGE_SECONDS.time(stage="analysis"):
+        analysis = await analyze_transcript(transcript, meeting_state.context, on_intervention=on_intervention)
+    meeting_state.context.add(transcript, speaker_name)
+    
+    # Merge into the meeting (dedupes against earlier utterances)
+    delta = merge_deltas(delta, meeting_state.apply(analysis))
+    sessions.mark_dirty(meeting_state.meeting_id)
+    
+    interventions = analysis.get("interventions", [])
+    remaining = stream.remaining(interventions)
+    
+    # GENERATE VOICE RESPONSE
+    # Without streaming, one WAV for the first intervention the browser hasn't spoken yet
+    audio_bytes = None
+    if remaining and not stream_audio:
+        intervention_text = remaining[0].get("content", "")
+        if intervention_text.strip():
+            logger.info(f"🔊 Generating Sarah's voice response...")
+            audio_bytes = await text_to_speech(intervention_text)
+        
+        if audio_bytes:
+            logger.info(f"✅ Voice response ready ({len(audio_bytes)} bytes)")
+    
+    # Send back: transcript + analysis + voice response
+    publish_update(meeting_state, transcript, interventions, delta, speaker_name)
+    response = {
+        "type": "transcription",
+        "transcript": transcript,
+        "confidence": result["confidence"],
+        "interventions": remaining,
+        "delta": delta,
+        "audio": None
+    }
+    
+    spoken = [i.get("content", "") for i in interventions if i.get("content", "").strip()] if stream_audio else []
+    if stream_audio:
+        response["audio_stream"] = bool(spoken)
+        await websocket.send_json(response)
+    elif protocol >= 2:
+        # Audio follows as its own binary frame, no base64
+        response["audio_bytes"] = len(audio_bytes) if audio_bytes else 0
+        await websocket.send_json(response)
+        if audio_bytes:
+            await websocket.send_bytes(audio_bytes)
+    else:
+        if audio_bytes:
+            response["audio"] = base64.b64encode(audio_bytes).decode('utf-8')  # Sarah's voice!
+        await websocket.send_json(response)
+    
+    # Pushed and remaining interventions alike, in the order they were found
+    for text in spoken:
+        await stream_voice(websocket, text)
+    
+    logger.debug(f"📤 Sent complete response to frontend")
+
+
+async def stream_voice(websocket: Outbox, text: str):
+    """
+    v4: Sarah's voice as binary PCM frames between audio_start and audio_end,
+    each sent as soon as Piper has synthesized it
+    If synthesis fails before any audio, audio_end carries the text so the
+    browser can speak it instead
+    """
+    started = False
+    try:
+        async for pcm in tts.stream(text):
+            if not started:
+                await websocket.send_json({"type": "audio_start", "format": "s16le", "sample_rate": tts.sample_rate})
+                started = True
+            await websocket.send_bytes(pcm)
     except Exception as e:
-        print(f"❌ Audio WebSocket error: {e}")
-        import traceback
-        traceback.print_exc()
+        if isinstance(e, WebSocketDisconnect):
+            raise
+        logger.warning(f"⚠️ Voice streaming failed: {e}")
+    
+    await websocket.send_json({"type": "audio_end", "fallback_text": None if started else text})
 
 
-def extract_speaker_name(transcript: str) -> str:
+def extract_speaker_name(transcript: str, roster: Roster = None) -> str:
     """
     Extract speaker name from transcript
-    Looks for common names in the transcript
+    Looks for the meeting's participants (or common names) as whole words
     """
     words = transcript.strip().split()
     if len(words) == 0:
         return "Unknown"
     
-    # List of known names that commonly appear
-    known_names = [
-        "Sarah", "Sera", "John", "Mike", "Aviskar", "Tom", 
-        "Alice", "Bob", "Emma", "David", "Lisa", "James",
-        "Maria", "Chris", "Anna", "Peter", "Kate", "Alex"
-    ]
-    
-    # Check if any known name appears in transcript
-    transcript_lower = transcript.lower()
-    for name in known_names:
-        if name.lower() in transcript_lower:
-            return name
+    # First participant mentioned, one dict lookup per word
+    name = (roster or DEFAULT_ROSTER).find(transcript)
+    if name:
+        return name
     
     # Fallback: use first word if it looks like a name (capitalized)
     first_word = words[0]
@@ -242,20 +611,83 @@ async def root():
         ]
     }
 
+class RosterRequest(BaseModel):
+    names: list[str]
+
+
+@app.put("/meetings/{meeting_id}/roster")
+async def put_roster(meeting_id: str, request: RosterRequest):
+    """Register a meeting's participants (e.g. from the calendar invite) before it starts"""
+    meeting_id, meeting_state = await sessions.open(meeting_id)
+    try:
+        return register_roster(meeting_state, {"names": request.names})
+    finally:
+        sessions.close(meeting_id)
+
+
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "ollama": "connected",
-        "whisper": "ready",
-        "tts": "ready"
+    """
+    Health check endpoint (503 until Whisper is loaded and warmed up)
+    With WHISPER_EAGER_LOAD=0 there's nothing to wait for: the model loads
+    on the first utterance, so the pod is ready straight away
+    """
+    ready = whisper.ready or not WHISPER_EAGER_LOAD
+    body = {
+        "status": "healthy" if ready else "starting",
+        "ollama": ollama.health(),
+        "whisper": whisper.health(),
+        "tts": tts.stats(),
+        "transcription": scheduler.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "sessions": sessions.stats(),
+        "hub": hub.stats(),
+        "prescreen": dict(prescreen_stats, threshold=PRESCREEN_THRESHOLD)
     }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+# Scrape-time views of the components' own counters
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+Gauge("sarah_transcription_queue_depth", "Utterances waiting for Whisper",
+      fn=lambda: scheduler.stats()["queue_depth"])
+Gauge("sarah_transcription_busy_workers", "Whisper workers running a batch",
+      fn=lambda: scheduler.stats()["busy_workers"])
+Gauge("sarah_active_meetings", "Meetings held in memory",
+      fn=lambda: sessions.stats()["active_meetings"])
+Gauge("sarah_session_pending_writes", "Meetings changed since the last flush",
+      fn=lambda: sessions.stats()["pending_writes"])
+Counter("sarah_analysis_cache_lookups_total", "Analysis cache lookups by result", ("result",),
+        fn=lambda: {("hit",): analysis_cache.hits, ("disk_hit",): analysis_cache.disk_hits,
+                    ("miss",): analysis_cache.misses})
+Gauge("sarah_analysis_cache_hit_rate", "Share of analysis cache lookups that hit",
+      fn=lambda: analysis_cache.stats()["hit_rate"])
+Counter("sarah_tts_cache_lookups_total", "Rendered voice cache lookups by result", ("result",),
+        fn=lambda: {("hit",): tts.hits, ("miss",): tts.misses})
+Gauge("sarah_hub_viewers", "Dashboards subscribed to a meeting",
+      fn=lambda: hub.stats()["viewers"])
+Counter("sarah_hub_frames_total", "Broadcast frames by outcome", ("outcome",),
+        fn=lambda: {("published",): hub.published, ("coalesced",): hub.coalesced})
+Counter("sarah_hub_dropped_viewers_total", "Viewers disconnected for stalling",
+        fn=lambda: hub.dropped)
+Counter("sarah_prescreen_total", "Pre-screen decisions", ("decision",),
+        fn=lambda: {(decision,): count for decision, count in prescreen_stats.items()})
+Gauge("sarah_ollama_circuit_state", "Breaker per server (0 closed, 1 half-open, 2 open)", ("url",),
+      fn=lambda: {(e["url"],): BREAKER_STATES[e["state"]] for e in ollama.health()["endpoints"]})
+Gauge("sarah_ollama_in_flight", "Ollama requests running or waiting per server", ("url",),
+      fn=lambda: {(e["url"],): e["in_flight"] for e in ollama.health()["endpoints"]})
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of latency histograms, queues and caches"""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
     import uvicorn
-    print("🚀 Starting Sarah AI Meeting Facilitator Backend...")
-    print("📊 Dashboard: http://localhost:5173")
-    print("🔌 Backend API: http://localhost:8000")
+    logger.info("🚀 Starting Sarah AI Meeting Facilitator Backend...")
+    logger.info("📊 Dashboard: http://localhost:5173")
+    logger.info("🔌 Backend API: http://localhost:8000")
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
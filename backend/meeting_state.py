@@ -0,0 +1,160 @@
+from context_window import ContextWindow
+from extraction import normalize_key
+from roster import Roster
+
+LISTS = ("actions", "decisions", "parking_lot")
+ID_PREFIX = {"actions": "act", "decisions": "dec", "parking_lot": "park"}
+
+
+def merge_deltas(older: dict, newer: dict) -> dict:
+    """One delta with the same effect as applying older, then newer"""
+    merged = dict(older)
+    for key, value in newer.items():
+        if key in LISTS:
+            items = {item["id"]: item for item in merged.get(key, [])}
+            for item in value:
+                items[item["id"]] = dict(items.get(item["id"], {}), **item)
+            merged[key] = list(items.values())
+        elif key == "participation":
+            merged[key] = dict(merged.get(key, {}), **value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class MeetingState:
+    """
+    Accumulated state of one meeting
+    - Append-only item logs with stable IDs (act-1, dec-1, park-1, ...)
+    - Cross-utterance dedupe on normalized keys, so repeating an item
+      doesn't add it twice (a new deadline updates the existing action)
+    - apply() and record_turn() return the changes they made, so each
+      caller can send its own delta instead of the full state
+    """
+
+    def __init__(self, meeting_id: str = None):
+        self.meeting_id = meeting_id
+        self.items = {name: {} for name in LISTS}      # list -> id -> item
+        self._index = {name: {} for name in LISTS}     # list -> key -> id
+        self._next_id = {name: 1 for name in LISTS}
+        self.participation = {}
+        self.sentiment = "neutral"
+        self.energy = "medium"
+        self.context = ContextWindow()   # what the LLM sees of earlier utterances
+        self.roster = None               # registered participants (None = common names)
+
+    def _upsert(self, name: str, key: str, item: dict, delta: dict):
+        """Add a new item or update an existing one, recording the change in delta"""
+        item_id = self._index[name].get(key)
+
+        if item_id is None:
+            item_id = f"{ID_PREFIX[name]}-{self._next_id[name]}"
+            self._next_id[name] += 1
+            self._index[name][key] = item_id
+            item = dict(item, id=item_id)
+            self.items[name][item_id] = item
+            delta.setdefault(name, {})[item_id] = dict(item)
+            return
+
+        existing = self.items[name][item_id]
+        changed = {k: v for k, v in item.items() if existing.get(k) != v}
+        if changed:
+            existing.update(changed)
+            delta.setdefault(name, {})[item_id] = dict(existing)
+
+    def apply(self, analysis: dict) -> dict:
+        """
+        Merge one utterance's analysis (agent format) into the meeting
+        Returns what it added or changed (empty parts left out)
+        """
+        state = analysis.get("state", {})
+        delta = {}
+
+        for action in state.get("actions", []):
+            key = normalize_key(f"{action.get('speaker', '')} {action.get('task', '')}")
+            self._upsert("actions", key, {
+                "speaker": action.get("speaker", "Unknown"),
+                "task": action.get("task", ""),
+                "deadline": action.get("deadline", "soon"),
+                "confidence": action.get("confidence", 0.9)
+            }, delta)
+
+        # Decisions/parking are plain strings in the agent output; the speaker
+        # comes from the matching intervention when there is one
+        decision_speakers = {
+            i.get("details", {}).get("what"): i.get("speaker", "Team")
+            for i in analysis.get("interventions", []) if i.get("type") == "decision"
+        }
+        for decision in state.get("decisions", []):
+            self._upsert("decisions", normalize_key(decision), {
+                "what": decision,
+                "speaker": decision_speakers.get(decision, "Team")
+            }, delta)
+
+        for item in state.get("parking_lot", []):
+            self._upsert("parking_lot", normalize_key(item), {"item": item}, delta)
+
+        for speaker, stats in state.get("participation", {}).items():
+            if self.participation.get(speaker) != stats:
+                self.participation[speaker] = dict(stats)
+                delta.setdefault("participation", {})[speaker] = dict(stats)
+
+        for field in ("sentiment", "energy"):
+            value = state.get(field)
+            if value and value != getattr(self, field):
+                setattr(self, field, value)
+                delta[field] = value
+
+        for name in LISTS:
+            if name in delta:
+                delta[name] = list(delta[name].values())
+        return delta
+
+    def register_participants(self, names: list) -> int:
+        """Add people to the meeting's roster for speaker detection, returns its size"""
+        if self.roster is None:
+            self.roster = Roster()
+        self.roster.add(names)
+        return len(self.roster)
+
+    def record_turn(self, speaker: str) -> dict:
+        """Count a speaking turn, returns the delta for it"""
+        stats = self.participation.setdefault(speaker, {"turns": 0, "time": 0})
+        stats["turns"] += 1
+        return {"participation": {speaker: dict(stats)}}
+
+    def snapshot(self) -> dict:
+        """Full state, for new or reconnecting clients and exports"""
+        state = {name: list(self.items[name].values()) for name in LISTS}
+        state["participation"] = self.participation
+        state["sentiment"] = self.sentiment
+        state["energy"] = self.energy
+        return state
+
+    def to_dict(self) -> dict:
+        """Everything needed to rebuild the meeting (for the session store)"""
+        return {
+            "items": self.items,
+            "index": self._index,
+            "next_id": self._next_id,
+            "participation": self.participation,
+            "sentiment": self.sentiment,
+            "energy": self.energy,
+            "context": self.context.to_dict(),
+            "roster": self.roster.names if self.roster is not None else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, meeting_id: str = None) -> "MeetingState":
+        state = cls(meeting_id)
+        for name in LISTS:
+            state.items[name] = data["items"].get(name, {})
+            state._index[name] = data["index"].get(name, {})
+            state._next_id[name] = data["next_id"].get(name, 1)
+        state.participation = data.get("participation", {})
+        state.sentiment = data.get("sentiment", "neutral")
+        state.energy = data.get("energy", "medium")
+        state.context.load(data.get("context", {}))
+        if data.get("roster") is not None:
+            state.roster = Roster(data["roster"])
+        return state
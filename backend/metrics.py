@@ -0,0 +1,131 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; covers a regex pass (~µs) up to a slow LLM call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+REGISTRY = []
+
+
+def _label_text(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self):
+        """(suffix, label text, value) triples for the exposition format"""
+        return []
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {value}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Only goes up; fn= reads the total from elsewhere at scrape time"""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), fn=None):
+        super().__init__(name, help_text, labelnames)
+        self._values = {}
+        self._fn = fn
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        values = self._fn() if self._fn else self._values
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [("", _label_text(self.labelnames, key), value) for key, value in values.items()]
+
+
+class Gauge(Counter):
+    """Current value (set directly, or read through fn= at scrape time)"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Cumulative buckets + sum + count per label set, like Prometheus'"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """with histogram.time(stage="whisper"): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append(("_bucket", _label_text(self.labelnames, key, f'le="{le}"'), cumulative))
+            samples.append(("_sum", _label_text(self.labelnames, key), round(series[-1], 6)))
+            samples.append(("_count", _label_text(self.labelnames, key), cumulative))
+        return samples
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ==========================================
+# METRICS SHARED ACROSS MODULES
+# ==========================================
+# Pipeline stages: receive (wait in the socket inbox), decode (ffmpeg),
+# whisper_queue, whisper, ollama, regex, analysis (whole analyzer), send (one socket write)
+STAGE_SECONDS = Histogram("sarah_stage_seconds", "Time spent per pipeline stage", ("stage",))
+UTTERANCE_SECONDS = Histogram(
+    "sarah_utterance_seconds", "End of speech to response sent (audio path)"
+)
+OLLAMA_REQUESTS = Counter(
+    "sarah_ollama_requests_total", "Ollama calls by outcome", ("outcome",)
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "sarah_websocket_connections", "Open websocket connections", ("endpoint",)
+)
+OUTBOX_FRAMES = Counter(
+    "sarah_outbox_frames_total", "Outbound frames not sent as queued, by reason", ("outcome",)
+)
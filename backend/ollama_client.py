@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import httpx
+
+from circuit_breaker import BREAKER_RESET_SECONDS, CLOSED, CircuitBreaker
+from metrics import OLLAMA_REQUESTS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+# Several servers: comma-separated list, requests go to the least loaded healthy one
+OLLAMA_URLS = [url.strip() for url in os.getenv("OLLAMA_URLS", OLLAMA_URL).split(",") if url.strip()]
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "30"))
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))   # per server
+
+
+class OllamaUnavailable(Exception):
+    """Every Ollama server's circuit is open, use the regex fallback"""
+
+
+class OllamaEndpoint:
+    """One Ollama server: its connection pool, concurrency limit and breaker"""
+
+    def __init__(self, base_url: str, timeout: float, max_concurrency: int):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = CircuitBreaker()
+        self.in_flight = 0           # running + waiting for a slot
+        self.avg_latency = 0.0       # moving average, seconds
+        self.requests = 0
+        self._client = None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+        return self._client
+
+    def record_latency(self, latency: float):
+        self.requests += 1
+        self.avg_latency = latency if self.requests == 1 else 0.8 * self.avg_latency + 0.2 * latency
+
+    def stats(self) -> dict:
+        return dict(
+            self.breaker.stats(),
+            url=self.base_url,
+            in_flight=self.in_flight,
+            requests=self.requests,
+            avg_latency_ms=round(self.avg_latency * 1000, 1)
+        )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class OllamaClient:
+    """
+    Async Ollama client shared by every meeting
+    - Keep-alive connection pool + a semaphore per server so we never flood a model
+    - Circuit breaker per server: while a server is down or too slow, calls
+      fail fast with OllamaUnavailable instead of waiting for the timeout
+    - Several servers (OLLAMA_URLS): each request goes to the healthy one
+      with the fewest requests in flight
+    """
+
+    def __init__(self, urls: list = None, timeout: float = OLLAMA_TIMEOUT,
+                 max_concurrency: int = OLLAMA_MAX_CONCURRENCY):
+        self.endpoints = [
+            OllamaEndpoint(url, timeout, max_concurrency) for url in (urls or OLLAMA_URLS)
+        ]
+        self._prefix_contexts = {}   # (model, prefix) -> evaluated context tokens
+        self._prime_failed = {}      # (model, prefix) -> when priming last failed
+        self._prime_lock = asyncio.Lock()
+
+    def available(self) -> bool:
+        """Is any server accepting requests (open circuits everywhere -> False)"""
+        return any(endpoint.breaker.available() for endpoint in self.endpoints)
+
+    def _pick(self, exclude=()) -> OllamaEndpoint:
+        """Least loaded server whose breaker lets a request through"""
+        candidates = [
+            endpoint for endpoint in self.endpoints
+            if endpoint not in exclude and endpoint.breaker.available()
+        ]
+        for endpoint in sorted(candidates, key=lambda e: (e.in_flight, e.avg_latency)):
+            if endpoint.breaker.acquire():
+                return endpoint
+        OLLAMA_REQUESTS.inc(outcome="circuit_open")
+        raise OllamaUnavailable("all Ollama circuits are open")
+
+    @staticmethod
+    def _payload(prompt: str, model: str, options: dict, stream: bool, extra: dict) -> dict:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": options or {}
+        }
+        payload.update(extra)
+        return payload
+
+    @staticmethod
+    def _timeout(timeout: float):
+        if timeout is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return httpx.Timeout(timeout, connect=5.0)
+
+    async def generate(self, prompt: str, model: str = OLLAMA_MODEL,
+                       options: dict = None, timeout: float = None, **extra) -> dict:
+        """
+        POST /api/generate and return the decoded JSON body
+        Cancelling the calling task aborts the request and frees the slot
+        A server that refuses the connection is skipped for the next healthy one
+        """
+        payload = self._payload(prompt, model, options, False, extra)
+        tried = []
+
+        while True:
+            endpoint = self._pick(exclude=tried)
+            tried.append(endpoint)
+            endpoint.in_flight += 1
+            try:
+                async with endpoint.semaphore:
+                    started = time.monotonic()
+                    response = await endpoint.client().post(
+                        "/api/generate",
+                        json=payload,
+                        timeout=self._timeout(timeout)
+                    )
+                    response.raise_for_status()
+                    body = response.json()
+                latency = time.monotonic() - started
+                endpoint.record_latency(latency)
+                endpoint.breaker.record_success(latency, whole_answer=True)
+                STAGE_SECONDS.observe(latency, stage="ollama")
+                OLLAMA_REQUESTS.inc(outcome="ok")
+                return body
+            except httpx.ConnectError as e:
+                OLLAMA_REQUESTS.inc(outcome="connect_error")
+                endpoint.breaker.record_failure(f"connect: {e}")
+                if not any(ep.breaker.available() for ep in self.endpoints if ep not in tried):
+                    raise
+            except (httpx.HTTPError, ValueError) as e:
+                OLLAMA_REQUESTS.inc(outcome="error")
+                endpoint.breaker.record_failure(f"{type(e).__name__}: {e}")
+                raise
+            except BaseException:
+                endpoint.breaker.release()
+                raise
+            finally:
+                endpoint.in_flight -= 1
+
+    async def generate_stream(self, prompt: str, model: str = OLLAMA_MODEL,
+                              options: dict = None, timeout: float = None, **extra):
+        """
+        POST /api/generate with stream on, yielding each decoded chunk
+        ({"response": "<tokens>", "done": false}, ..., final chunk has done true)
+        The latency SLO applies to the first chunk (time to first token)
+        A server that refuses the connection is skipped for the next healthy
+        one, as long as nothing has been yielded yet
+        """
+        payload = self._payload(prompt, model, options, True, extra)
+        tried = []
+
+        while True:
+            endpoint = self._pick(exclude=tried)
+            tried.append(endpoint)
+            endpoint.in_flight += 1
+            first_chunk = None
+
+            try:
+                async with endpoint.semaphore:
+                    started = time.monotonic()
+                    async with endpoint.client().stream(
+                        "POST",
+                        "/api/generate",
+                        json=payload,
+                        timeout=self._timeout(timeout)
+                    ) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.strip():
+                                continue
+                            chunk = json.loads(line)
+                            if first_chunk is None:
+                                first_chunk = time.monotonic() - started
+                                endpoint.record_latency(first_chunk)
+                                endpoint.breaker.record_success(first_chunk)
+                                STAGE_SECONDS.observe(first_chunk, stage="ollama_first_token")
+                            yield chunk
+                            if chunk.get("done"):
+                                break
+                STAGE_SECONDS.observe(time.monotonic() - started, stage="ollama")
+                OLLAMA_REQUESTS.inc(outcome="ok")
+                return
+            except httpx.ConnectError as e:
+                OLLAMA_REQUESTS.inc(outcome="connect_error")
+                endpoint.breaker.record_failure(f"connect: {e}")
+                if first_chunk is not None or not any(
+                    ep.breaker.available() for ep in self.endpoints if ep not in tried
+                ):
+                    raise
+            except (httpx.HTTPError, ValueError) as e:
+                OLLAMA_REQUESTS.inc(outcome="error")
+                endpoint.breaker.record_failure(f"{type(e).__name__}: {e}")
+                raise
+            except BaseException:
+                endpoint.breaker.release()
+                raise
+            finally:
+                endpoint.in_flight -= 1
+
+    async def prime(self, prefix: str, model: str = OLLAMA_MODEL):
+        """
+        Evaluate a static prompt prefix once and return Ollama's context tokens
+        Passing them as context= on later calls means the prefix isn't
+        re-evaluated; returns None if priming failed (send the full prompt then)
+        - Only primes while some server's breaker is fully closed: a probe
+          request after an outage should be a real call, not the prime
+        - A failed prime isn't retried for a breaker cool-down, so a hung
+          server costs one prime timeout, not one per request
+        """
+        key = (model, prefix)
+        if key in self._prefix_contexts:
+            return self._prefix_contexts[key]
+        if not self._can_prime(key):
+            return None
+
+        async with self._prime_lock:
+            if key in self._prefix_contexts:
+                return self._prefix_contexts[key]
+            if not self._can_prime(key):
+                return None   # failed while we were waiting for the lock
+
+            try:
+                result = await self.generate(prefix, model=model, options={"num_predict": 1, "temperature": 0})
+            except (httpx.HTTPError, ValueError, OllamaUnavailable) as e:
+                self._prime_failed[key] = time.monotonic()
+                logger.warning(f"⚠️ Could not prime prompt prefix: {e}")
+                return None
+            self._prime_failed.pop(key, None)
+            self._prefix_contexts[key] = result.get("context")
+            logger.info(f"🧠 Primed prompt prefix ({len(self._prefix_contexts[key] or [])} context tokens)")
+
+        return self._prefix_contexts[key]
+
+    def _can_prime(self, key) -> bool:
+        failed_at = self._prime_failed.get(key)
+        if failed_at is not None and time.monotonic() - failed_at < BREAKER_RESET_SECONDS:
+            return False
+        return any(endpoint.breaker.state == CLOSED for endpoint in self.endpoints)
+
+    def health(self) -> dict:
+        """Real breaker state for /health: up, degraded (some servers out) or down"""
+        endpoints = [endpoint.stats() for endpoint in self.endpoints]
+        closed = sum(1 for e in endpoints if e["state"] == "closed")
+        if closed == len(endpoints):
+            status = "up"
+        elif self.available():
+            status = "degraded"
+        else:
+            status = "down"
+        return {"status": status, "model": OLLAMA_MODEL, "endpoints": endpoints}
+
+    async def aclose(self):
+        """Close the pooled connections (called on app shutdown)"""
+        for endpoint in self.endpoints:
+            await endpoint.aclose()
+
+
+# Shared client for the whole process
+ollama = OllamaClient()
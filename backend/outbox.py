@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from meeting_state import merge_deltas
+from metrics import OUTBOX_FRAMES, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_MAX_QUEUE = int(os.getenv("OUTBOX_MAX_QUEUE", "256"))         # frames waiting before we give up
+OUTBOX_SEND_TIMEOUT = float(os.getenv("OUTBOX_SEND_TIMEOUT", "10"))  # seconds one send may take
+OUTBOX_COALESCE_AFTER = int(os.getenv("OUTBOX_COALESCE_AFTER", "8"))  # backlog before deltas get merged
+
+
+class ClientTooSlow(Exception):
+    """The client stopped draining its socket, the connection gets closed"""
+
+
+class Outbox:
+    """
+    Outbound side of one websocket: handlers queue, a sender task writes
+    - Same send_json/send_bytes/send_text as the websocket, but they never
+      wait on the client's network, so we keep reading its audio meanwhile
+    - Once coalesce_after frames are waiting, the state delta of a queued
+      message is folded into the newest one (merge_deltas); below that each
+      reply keeps its own delta. Transcripts, interventions and audio are
+      always delivered, best-effort partials are skipped while anything waits
+    - max_queue frames waiting, or one send stuck for send_timeout, means
+      the client is gone
+    """
+
+    def __init__(self, websocket, max_queue: int = OUTBOX_MAX_QUEUE,
+                 send_timeout: float = OUTBOX_SEND_TIMEOUT, coalesce_after: int = OUTBOX_COALESCE_AFTER):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.coalesce_after = coalesce_after
+        self._frames = deque()          # [kind, payload]
+        self._ready = asyncio.Event()
+        self._latest_delta = None       # queued frame holding the pending delta
+        self._too_slow = False
+
+    @property
+    def query_params(self):
+        return self.websocket.query_params
+
+    async def send_json(self, message: dict):
+        self.put("json", message)
+
+    async def send_bytes(self, data: bytes):
+        self.put("bytes", data)
+
+    async def send_text(self, data: str):
+        self.put("text", data)
+
+    def put(self, kind: str, payload):
+        """Queue a frame for the sender task (never waits)"""
+        if kind == "json":
+            if payload.get("type") == "partial" and self._frames:
+                OUTBOX_FRAMES.inc(outcome="partial_skipped")
+                return
+            behind = len(self._frames) >= self.coalesce_after
+            if behind and "delta" in payload and self._latest_delta is not None:
+                older = self._latest_delta
+                payload = dict(payload, delta=merge_deltas(older[1]["delta"], payload["delta"]))
+                older[1] = dict(older[1], delta={})
+                OUTBOX_FRAMES.inc(outcome="delta_coalesced")
+
+        if len(self._frames) >= self.max_queue:
+            self._overflow()
+            self._ready.set()
+            return
+
+        frame = [kind, payload]
+        if kind == "json" and "delta" in payload:
+            self._latest_delta = frame
+        self._frames.append(frame)
+        self._ready.set()
+
+    def _overflow(self):
+        OUTBOX_FRAMES.inc(outcome="client_too_slow")
+        self._too_slow = True
+
+    async def _send(self, kind: str, payload):
+        started = time.perf_counter()
+        try:
+            if kind == "json":
+                await asyncio.wait_for(self.websocket.send_json(payload), self.send_timeout)
+            elif kind == "bytes":
+                await asyncio.wait_for(self.websocket.send_bytes(payload), self.send_timeout)
+            else:
+                await asyncio.wait_for(self.websocket.send_text(payload), self.send_timeout)
+        except asyncio.TimeoutError:
+            OUTBOX_FRAMES.inc(outcome="client_too_slow")
+            raise ClientTooSlow(f"send stuck for {self.send_timeout}s")
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="send")
+
+    async def flush(self):
+        """Send everything queued so far"""
+        while self._frames:
+            frame = self._frames.popleft()
+            if frame is self._latest_delta:
+                self._latest_delta = None
+            await self._send(*frame)
+
+    async def run(self):
+        """Sender task: runs until the client disconnects or falls too far behind"""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._too_slow:
+                raise ClientTooSlow(f"{len(self._frames)} frames waiting")
+            await self.flush()
@@ -0,0 +1,111 @@
+import re
+from itertools import islice
+
+# Speakers we recognize in meetings that haven't registered a roster
+DEFAULT_NAMES = [
+    "Sarah", "Sera", "John", "Mike", "Aviskar", "Tom",
+    "Alice", "Bob", "Emma", "David", "Lisa", "James",
+    "Maria", "Chris", "Anna", "Peter", "Kate", "Alex"
+]
+
+# Names that are also everyday words only count when capitalized
+# ("Will said..." vs "Sarah will send...")
+COMMON_WORD_NAMES = frozenset({
+    "will", "may", "mark", "bill", "grace", "rose", "june", "april", "august",
+    "frank", "hope", "joy", "faith", "art", "sue", "pat", "don", "guy", "ray",
+    "summer", "dawn", "jack", "rob", "sunny", "drew", "wade", "chase", "gene"
+})
+
+WORD = re.compile(r"[^\W_]+")
+
+# Rosters with up to this many distinct first words are checked with a plain
+# substring search first: far cheaper than walking the words when nobody is named
+PRESCAN_MAX_NAMES = 100
+
+
+def tokenize(text: str) -> list:
+    """Lowercased words; apostrophes and hyphens split ("O'Brien" -> o, brien)"""
+    return WORD.findall(text.lower())
+
+
+class Roster:
+    """
+    A meeting's participants, compiled for whole-word speaker lookup
+    - Names are indexed by their first word, so a lookup is one dict hit
+      per transcript word no matter how many people are registered, and it
+      stops at the first participant found
+    - Small rosters skip the word walk entirely when no first name occurs
+      anywhere in the transcript, even as a substring
+    - Whole words only: "Tom" never matches inside "tomorrow"
+    - Multi-word names match in full, and the first name on its own
+      matches too as long as only one participant has it
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self._phrases = {}   # full name's words -> name
+        self._by_first = {}  # first word -> [(words, name)] of full names
+        self._index = {}     # first word -> [(words, name)], longest first
+        self._longest = 1    # words in the longest name
+        self.add(names)
+
+    def add(self, names):
+        """
+        Register more participants (duplicates and blanks are ignored)
+        Only the index entries for the new names' first words are rebuilt
+        """
+        touched = set()
+        for name in names:
+            name = " ".join(str(name).split())
+            words = tuple(tokenize(name))
+            if words and words not in self._phrases:
+                self._phrases[words] = name
+                self._by_first.setdefault(words[0], []).append((words, name))
+                self.names.append(name)
+                touched.add(words[0])
+                self._longest = max(self._longest, len(words))
+
+        for first in touched:
+            self._compile(first)
+
+    def _compile(self, first: str):
+        """Lookup entry for names starting with this word"""
+        candidates = list(self._by_first[first])
+        owners = [name for words, name in candidates if len(words) > 1]
+        if len(owners) == 1 and (first,) not in self._phrases:
+            candidates.append(((first,), owners[0]))
+        candidates.sort(key=lambda candidate: -len(candidate[0]))
+        self._index[first] = candidates
+
+    def find(self, transcript: str):
+        """First participant mentioned in the transcript, or None"""
+        index = self._index
+        if len(index) <= PRESCAN_MAX_NAMES:
+            lowered = transcript.lower()
+            if not any(first in lowered for first in index):
+                return None
+
+        for match in WORD.finditer(transcript):
+            word = match.group().lower()
+            candidates = index.get(word)
+            if candidates is None:
+                continue
+
+            following = None
+            for phrase, name in candidates:
+                if len(phrase) > 1:
+                    if following is None:
+                        rest = islice(WORD.finditer(transcript, match.end()), self._longest - 1)
+                        following = tuple(m.group().lower() for m in rest)
+                    if following[:len(phrase) - 1] != phrase[1:]:
+                        continue
+                elif word in COMMON_WORD_NAMES and not match.group()[0].isupper():
+                    continue
+                return name
+        return None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+DEFAULT_ROSTER = Roster(DEFAULT_NAMES)
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "2"))
+WHISPER_POOL = os.getenv("WHISPER_POOL", "thread")  # "thread" or "process"
+TRANSCRIBE_QUEUE_SIZE = int(os.getenv("TRANSCRIBE_QUEUE_SIZE", "16"))
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+WHISPER_BATCH_WINDOW_MS = float(os.getenv("WHISPER_BATCH_WINDOW_MS", "50"))
+
+
+class TranscriptionJob:
+    def __init__(self, session_id: str, audio):
+        self.session_id = session_id
+        self.audio = audio
+        self.enqueued_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class TranscriptionScheduler:
+    """
+    Runs Whisper off the event loop on a bounded worker pool
+    - Bounded queue: submit() waits when it is full (backpressure)
+    - Fairness: sessions take turns, one busy speaker can't starve the rest
+    - Batching: with a batch_fn, segments from several sessions that arrive
+      within a short window are decoded in one forward pass
+    - Metrics: queue depth and how long jobs waited for a worker
+    """
+
+    def __init__(self, transcribe_fn, workers: int = WHISPER_WORKERS,
+                 max_queue: int = TRANSCRIBE_QUEUE_SIZE, pool: str = WHISPER_POOL,
+                 batch_fn=None, max_batch: int = WHISPER_BATCH_SIZE,
+                 batch_window_ms: float = WHISPER_BATCH_WINDOW_MS):
+        self.transcribe_fn = transcribe_fn
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pool = pool
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch if batch_fn else 1
+        self.batch_window = batch_window_ms / 1000
+
+        self._executor = None
+        self._dispatchers = []
+        self._sessions = {}         # session_id -> deque of jobs
+        self._turns = deque()       # round-robin order of sessions with work
+        self._depth = 0
+        self._changed = None
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.busy_workers = 0
+        self.ready_workers = 0      # workers that have run warm_up's function
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def _start(self):
+        if self.pool == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="whisper")
+
+        self._changed = asyncio.Condition()
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch()) for _ in range(self.workers)
+        ]
+        logger.info(f"🧵 Transcription scheduler started ({self.workers} {self.pool} workers)")
+
+    async def warm_up(self, fn, rounds: int = 50) -> bool:
+        """
+        Run fn (which returns an id for the worker it ran on, e.g. its pid)
+        until every worker has run it; True once all of them have
+        For process pools, where each worker holds its own copy of the model
+        """
+        if self._executor is None:
+            self._start()
+
+        loop = asyncio.get_running_loop()
+        seen = set()
+        for _ in range(rounds):
+            probes = [loop.run_in_executor(self._executor, fn) for _ in range(self.workers)]
+            seen.update(await asyncio.gather(*probes))
+            self.ready_workers = len(seen)
+            if self.ready_workers >= self.workers:
+                return True
+        return False
+
+    async def submit(self, session_id: str, audio) -> dict:
+        """Queue audio for a session and wait for its transcription"""
+        if self._executor is None:
+            self._start()
+
+        job = TranscriptionJob(session_id, audio)
+
+        async with self._changed:
+            # Backpressure: hold the caller until there is room
+            await self._changed.wait_for(lambda: self._depth < self.max_queue)
+
+            if session_id not in self._sessions:
+                self._sessions[session_id] = deque()
+                self._turns.append(session_id)
+            self._sessions[session_id].append(job)
+            self._depth += 1
+            self._changed.notify_all()
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # Caller went away (socket closed); drop the job if it hasn't started
+            job.future.cancel()
+            raise
+
+    def _next_job(self):
+        """Pop the oldest job of the session whose turn it is"""
+        while self._turns:
+            session_id = self._turns.popleft()
+            jobs = self._sessions[session_id]
+            job = jobs.popleft()
+            if jobs:
+                self._turns.append(session_id)
+            else:
+                del self._sessions[session_id]
+            self._depth -= 1
+            if not job.future.cancelled():
+                return job
+        return None
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._depth > 0)
+
+            # Give other sessions a moment to join this batch
+            if self.max_batch > 1 and self._depth < self.max_batch:
+                await asyncio.sleep(self.batch_window)
+
+            async with self._changed:
+                jobs = []
+                while len(jobs) < self.max_batch:
+                    job = self._next_job()
+                    if job is None:
+                        break
+                    jobs.append(job)
+                self._changed.notify_all()
+
+            if not jobs:
+                continue
+
+            now = time.monotonic()
+            for job in jobs:
+                wait = now - job.enqueued_at
+                self.last_wait = wait
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                STAGE_SECONDS.observe(wait, stage="whisper_queue")
+
+            self.busy_workers += 1
+            self.batches += 1
+            started = time.perf_counter()
+            try:
+                if len(jobs) == 1:
+                    results = [await loop.run_in_executor(self._executor, self.transcribe_fn, jobs[0].audio)]
+                else:
+                    results = await loop.run_in_executor(
+                        self._executor, self.batch_fn, [job.audio for job in jobs]
+                    )
+                # Route each result back to the session that asked for it
+                for job, result in zip(jobs, results):
+                    self.completed += 1
+                    if not job.future.done():
+                        job.future.set_result(result)
+            except Exception as e:
+                for job in jobs:
+                    self.failed += 1
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            finally:
+                self.busy_workers -= 1
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="whisper")
+
+    def stats(self) -> dict:
+        started = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "pool": self.pool,
+            "busy_workers": self.busy_workers,
+            "ready_workers": self.ready_workers,
+            "queue_depth": self._depth,
+            "queue_limit": self.max_queue,
+            "active_sessions": len(self._sessions),
+            "completed": self.completed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round(started / self.batches, 2) if self.batches else 0.0,
+            "avg_wait_ms": round(self.total_wait / started * 1000, 1) if started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "last_wait_ms": round(self.last_wait * 1000, 1)
+        }
+
+    async def shutdown(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
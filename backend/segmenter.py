@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+# Tunables (milliseconds unless stated)
+VAD_SILENCE_MS = int(os.getenv("VAD_SILENCE_MS", "600"))        # pause that ends an utterance
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "300"))  # shorter blips are ignored
+VAD_MAX_UTTERANCE_MS = int(os.getenv("VAD_MAX_UTTERANCE_MS", "15000"))
+VAD_PARTIAL_MS = int(os.getenv("VAD_PARTIAL_MS", "1000"))       # partial transcript cadence
+VAD_PREROLL_MS = 200                                            # audio kept before speech onset
+VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", "3.0"))        # speech = energy > noise * threshold
+VAD_NOISE_WINDOW_MS = int(os.getenv("VAD_NOISE_WINDOW_MS", "5000"))  # audio the noise floor is estimated over
+NOISE_PERCENTILE = 10      # quietest 10% of recent frames = background noise
+NOISE_UPDATE_FRAMES = 10   # re-estimate every 300 ms
+MIN_NOISE_FLOOR = 1e-4
+
+
+class Utterance:
+    def __init__(self, audio: np.ndarray, final: bool):
+        self.audio = audio
+        self.final = final
+
+    @property
+    def seconds(self) -> float:
+        return len(self.audio) / SAMPLE_RATE
+
+
+class StreamingSegmenter:
+    """
+    Energy-based voice activity detection on decoded PCM
+    Feed it samples as they come out of the decoder; it hands back
+    partial utterances while someone talks and a final one on each pause
+    (partials=False: finals only, for offline runs nobody watches live)
+    """
+
+    def __init__(self, partials: bool = True):
+        self.partials = partials
+        self._pending = np.zeros(0, dtype=np.float32)   # leftover < 1 frame
+        self._preroll = []
+        self._speech = []
+        self._in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._frames_since_partial = 0
+        self._noise_floor = 1e-3
+        self._energies = np.zeros(max(1, VAD_NOISE_WINDOW_MS // FRAME_MS), dtype=np.float32)
+        self._frames_seen = 0
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        energy = float(np.sqrt(np.mean(frame * frame)))
+
+        # Noise floor = a low percentile of every recent frame, speech included:
+        # it settles on the room's background within a window whatever the
+        # first guess was, and talking for less than the window can't raise it
+        self._energies[self._frames_seen % len(self._energies)] = energy
+        self._frames_seen += 1
+        if (self._frames_seen - 1) % NOISE_UPDATE_FRAMES == 0:
+            recent = self._energies[:min(self._frames_seen, len(self._energies))]
+            self._noise_floor = max(float(np.percentile(recent, NOISE_PERCENTILE)), MIN_NOISE_FLOOR)
+
+        return energy > self._noise_floor * VAD_THRESHOLD
+
+    def feed(self, samples: np.ndarray) -> list:
+        """Add float32 samples, return any utterances that are ready"""
+        ready = []
+        audio = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+
+        usable = len(audio) - len(audio) % FRAME_SAMPLES
+        self._pending = audio[usable:]
+
+        for start in range(0, usable, FRAME_SAMPLES):
+            frame = audio[start:start + FRAME_SAMPLES]
+            speech = self._is_speech(frame)
+
+            if not self._in_speech:
+                if speech:
+                    self._in_speech = True
+                    self._speech = self._preroll + [frame]
+                    self._preroll = []
+                    self._speech_frames = 1
+                    self._silence_frames = 0
+                    self._frames_since_partial = 1
+                else:
+                    self._preroll.append(frame)
+                    if len(self._preroll) > VAD_PREROLL_MS // FRAME_MS:
+                        self._preroll.pop(0)
+                continue
+
+            self._speech.append(frame)
+            self._frames_since_partial += 1
+            if speech:
+                self._speech_frames += 1
+                self._silence_frames = 0
+            else:
+                self._silence_frames += 1
+
+            duration_ms = len(self._speech) * FRAME_MS
+
+            if self._silence_frames * FRAME_MS >= VAD_SILENCE_MS or duration_ms >= VAD_MAX_UTTERANCE_MS:
+                utterance = self._finish()
+                if utterance is not None:
+                    ready.append(utterance)
+            elif self.partials and self._frames_since_partial * FRAME_MS >= VAD_PARTIAL_MS:
+                self._frames_since_partial = 0
+                ready.append(Utterance(np.concatenate(self._speech), final=False))
+
+        return ready
+
+    def _finish(self):
+        """Close the current utterance (None if it was just a blip)"""
+        speech_ms = self._speech_frames * FRAME_MS
+        audio = np.concatenate(self._speech) if self._speech else None
+
+        self._in_speech = False
+        self._speech = []
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._frames_since_partial = 0
+
+        if audio is None or speech_ms < VAD_MIN_SPEECH_MS:
+            return None
+        return Utterance(audio, final=True)
+
+    def flush(self):
+        """End of stream: return whatever speech is still open"""
+        if not self._in_speech:
+            return None
+        return self._finish()
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from meeting_state import MeetingState
+
+logger = logging.getLogger(__name__)
+
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "meetings.db")
+SESSION_FLUSH_SECONDS = float(os.getenv("SESSION_FLUSH_SECONDS", "1.0"))
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "900"))   # unload after this with no sockets
+
+
+class SessionStore:
+    """SQLite table of meeting snapshots (one JSON row per meeting)"""
+
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()   # one connection, used from worker threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meetings "
+            "(meeting_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def load(self, meeting_id: str):
+        with self._lock:
+            row = self._db.execute("SELECT state FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_many(self, rows: list):
+        """Write a batch of (meeting_id, state_json, updated_at) in one transaction"""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO meetings (meeting_id, state, updated_at) VALUES (?, ?, ?)",
+                rows
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class SessionManager:
+    """
+    Meetings keyed by meeting ID, shared by every socket that joins them
+    - Live state stays in memory, so reconnecting picks up where it left off
+    - Write-behind: changed meetings are flushed to the store in batches
+      every SESSION_FLUSH_SECONDS by a background task, never on the hot path
+    - Meetings nobody is connected to are unloaded after SESSION_IDLE_SECONDS
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, flush_seconds: float = SESSION_FLUSH_SECONDS,
+                 idle_seconds: float = SESSION_IDLE_SECONDS):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.idle_seconds = idle_seconds
+        self._store = None
+        self._sessions = {}      # meeting_id -> MeetingState
+        self._connections = {}   # meeting_id -> open sockets
+        self._last_seen = {}
+        self._dirty = set()
+        self._flusher = None
+        self._lock = asyncio.Lock()
+
+        self.flushes = 0
+        self.flushed_meetings = 0
+
+    def start(self):
+        self._store = SessionStore(self.path)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"💾 Meeting sessions stored in {self.path}")
+
+    async def open(self, meeting_id: str = None):
+        """Join a meeting (new ID if none given), returns (meeting_id, state)"""
+        meeting_id = meeting_id or uuid.uuid4().hex
+
+        async with self._lock:
+            state = self._sessions.get(meeting_id)
+            if state is None:
+                saved = None
+                if self._store is not None:
+                    saved = await asyncio.to_thread(self._store.load, meeting_id)
+                state = MeetingState.from_dict(saved, meeting_id) if saved else MeetingState(meeting_id)
+                self._sessions[meeting_id] = state
+                logger.info(f"📂 Meeting {meeting_id} {'restored' if saved else 'started'}")
+
+        self._connections[meeting_id] = self._connections.get(meeting_id, 0) + 1
+        self._last_seen[meeting_id] = time.monotonic()
+        return meeting_id, state
+
+    def mark_dirty(self, meeting_id: str):
+        """The meeting changed; it'll be written on the next flush"""
+        self._dirty.add(meeting_id)
+        self._last_seen[meeting_id] = time.monotonic()
+
+    def close(self, meeting_id: str):
+        """A socket left the meeting (state stays in memory for reconnects)"""
+        self._connections[meeting_id] = self._connections.get(meeting_id, 1) - 1
+        self._last_seen[meeting_id] = time.monotonic()
+
+    async def flush(self):
+        """Write every changed meeting in one batch"""
+        if not self._dirty or self._store is None:
+            return
+        now = time.time()
+        dirty, self._dirty = self._dirty, set()
+        # Serialize here (cheap, consistent snapshot), write in a thread
+        rows = [
+            (meeting_id, json.dumps(self._sessions[meeting_id].to_dict()), now)
+            for meeting_id in dirty if meeting_id in self._sessions
+        ]
+        try:
+            await asyncio.to_thread(self._store.save_many, rows)
+        except asyncio.CancelledError:
+            self._dirty |= dirty   # shutdown() flushes again
+            raise
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Session flush failed, will retry: {e}")
+            self._dirty |= dirty
+            return
+        self.flushes += 1
+        self.flushed_meetings += len(rows)
+
+    def _unload_idle(self):
+        now = time.monotonic()
+        for meeting_id in list(self._sessions):
+            idle = now - self._last_seen.get(meeting_id, now)
+            if self._connections.get(meeting_id, 0) <= 0 and meeting_id not in self._dirty and idle > self.idle_seconds:
+                del self._sessions[meeting_id]
+                self._connections.pop(meeting_id, None)
+                self._last_seen.pop(meeting_id, None)
+                logger.info(f"📦 Meeting {meeting_id} unloaded (idle)")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+            self._unload_idle()
+
+    def stats(self) -> dict:
+        return {
+            "active_meetings": len(self._sessions),
+            "connections": sum(max(0, n) for n in self._connections.values()),
+            "pending_writes": len(self._dirty),
+            "flushes": self.flushes,
+            "flushed_meetings": self.flushed_meetings
+        }
+
+    async def shutdown(self):
+        """Stop the flusher and write whatever is still pending"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+sessions = SessionManager()
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import agent  # noqa: E402
+from analysis_cache import AnalysisCache  # noqa: E402
+
+TRANSCRIPT = "We agreed to hire two people. Let's park the budget discussion for next week."
+FIRST_ITEM = '{"items": [{"type": "decision", "decision": "hire two contractors"}'
+
+
+def fake_ollama(monkeypatch, chunks, error=None):
+    """Ollama that streams chunks, then raises error (if any)"""
+    async def prime(prefix):
+        return None
+
+    async def generate_stream(prompt, **kwargs):
+        for chunk in chunks:
+            yield {"response": chunk}
+        if error is not None:
+            raise error
+
+    monkeypatch.setattr(agent.ollama, "available", lambda: True)
+    monkeypatch.setattr(agent.ollama, "prime", prime)
+    monkeypatch.setattr(agent.ollama, "generate_stream", generate_stream)
+    cache = AnalysisCache(path="")
+    monkeypatch.setattr(agent, "analysis_cache", cache)
+    return cache
+
+
+def analyze(transcript: str) -> tuple:
+    pushed = []
+
+    async def on_intervention(intervention):
+        pushed.append(intervention)
+
+    analysis = asyncio.run(agent.analyze_transcript(transcript, on_intervention=on_intervention))
+    return analysis, pushed
+
+
+def test_stream_broken_after_an_item_keeps_it(monkeypatch):
+    cache = fake_ollama(monkeypatch, [FIRST_ITEM, ', {"type": "parking'], httpx.ReadError("connection reset"))
+    analysis, pushed = analyze(TRANSCRIPT)
+
+    assert [i["content"] for i in pushed] == ["Decision: hire two contractors"]
+    assert "hire two contractors" in analysis["state"]["decisions"]
+    # Regex fallback still adds what the model didn't get to
+    assert "budget" in analysis["state"]["parking_lot"]
+    # A cut-off answer is not cached
+    assert cache.stats()["size"] == 0
+
+
+def test_malformed_tail_keeps_pushed_items(monkeypatch):
+    fake_ollama(monkeypatch, [FIRST_ITEM, "]}}garbage"])
+    analysis, pushed = analyze(TRANSCRIPT)
+
+    assert len(pushed) == 1
+    assert "hire two contractors" in analysis["state"]["decisions"]
+
+
+def test_failure_before_any_item_falls_back_to_regex(monkeypatch):
+    fake_ollama(monkeypatch, ['{"items": ['], httpx.ReadError("connection reset"))
+    analysis, pushed = analyze(TRANSCRIPT)
+
+    assert pushed == []
+    assert analysis["state"]["decisions"] == ["hire two people"]
+
+
+def test_complete_answer_is_cached(monkeypatch):
+    cache = fake_ollama(monkeypatch, [FIRST_ITEM, "]}"])
+    analysis, pushed = analyze(TRANSCRIPT)
+
+    assert len(pushed) == 1
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import analysis_cache  # noqa: E402
+from analysis_cache import AnalysisCache, cache_key  # noqa: E402
+
+MODEL, VERSION = "llama3.2:3b", "2"
+
+
+def test_pronouns_key_on_context():
+    for transcript in ("I will send the deck by Friday", "I'll send the deck by Friday",
+                       "You will review it", "We agreed to ship it", "She will fix the bug by Monday"):
+        sarah = cache_key(transcript, MODEL, VERSION, "- Sarah: hi")
+        tom = cache_key(transcript, MODEL, VERSION, "- Tom: hi")
+        assert sarah != tom, transcript
+
+
+def test_named_speaker_ignores_context():
+    transcript = "Sarah will send the deck by Friday"
+    assert cache_key(transcript, MODEL, VERSION, "- Sarah: hi") == cache_key(transcript, MODEL, VERSION, "- Tom: hi")
+    assert cache_key(transcript, MODEL, VERSION) == cache_key("sarah will send the deck by friday.", MODEL, VERSION)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache.time, "time", clock)
+    cache = AnalysisCache(max_size=4, ttl=60, path="")
+
+    async def run():
+        cache.put("k", [{"type": "decision"}])
+        clock.now += 60
+        fresh = await cache.get("k")
+        clock.now += 1
+        return fresh, await cache.get("k")
+
+    assert asyncio.run(run()) == ([{"type": "decision"}], None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_is_evicted():
+    cache = AnalysisCache(max_size=2, ttl=60, path="")
+
+    async def run():
+        cache.put("a", 1)
+        cache.put("b", 2)
+        await cache.get("a")     # b is now the oldest
+        cache.put("c", 3)
+        return [await cache.get(key) for key in "abc"]
+
+    assert asyncio.run(run()) == [1, None, 3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    async def write():
+        cache = AnalysisCache(path=path)
+        cache.put("k", [{"type": "parking_lot", "item": "budget"}])
+        cache.close()
+
+    async def read():
+        cache = AnalysisCache(path=path)
+        try:
+            return await cache.get("k"), cache.stats()["disk_hits"]
+        finally:
+            cache.close()
+
+    asyncio.run(write())
+    assert asyncio.run(read()) == ([{"type": "parking_lot", "item": "budget"}], 1)
@@ -0,0 +1,91 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import circuit_breaker  # noqa: E402
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(monkeypatch, **kwargs) -> tuple:
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    options = dict(failure_threshold=3, reset_seconds=15, latency_slo=8, generation_slo=25)
+    options.update(kwargs)
+    return CircuitBreaker(**options), clock
+
+
+def test_trips_after_consecutive_failures(monkeypatch):
+    breaker, _ = make_breaker(monkeypatch)
+    breaker.record_failure("boom")
+    breaker.record_failure("boom")
+    breaker.record_success(1.0)
+    breaker.record_failure("boom")
+    breaker.record_failure("boom")
+    assert breaker.state == CLOSED and breaker.available()
+
+    breaker.record_failure("boom")
+    assert breaker.state == OPEN
+    assert not breaker.acquire()
+    assert breaker.stats()["trips"] == 1
+
+
+def test_half_open_lets_one_probe_through(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=1)
+    breaker.record_failure("boom")
+    clock.now += 15
+
+    assert breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.acquire()   # second caller waits for the probe
+
+    breaker.record_success(1.0)
+    assert breaker.state == CLOSED and breaker.acquire()
+
+
+def test_failed_probe_opens_again(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=1)
+    breaker.record_failure("boom")
+    clock.now += 15
+    assert breaker.acquire()
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN and not breaker.available()
+
+    clock.now += 14
+    assert not breaker.available()
+    clock.now += 1
+    assert breaker.available()
+
+
+def test_abandoned_probe_frees_the_slot(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=1)
+    breaker.record_failure("boom")
+    clock.now += 15
+    assert breaker.acquire()
+    breaker.release()
+    assert breaker.acquire()
+
+
+def test_slow_first_token_counts_as_failure(monkeypatch):
+    breaker, _ = make_breaker(monkeypatch, failure_threshold=1)
+    breaker.record_success(9.0)
+    assert breaker.state == OPEN
+    assert breaker.stats()["slow_calls"] == 1
+
+
+def test_whole_answers_have_their_own_slo(monkeypatch):
+    breaker, _ = make_breaker(monkeypatch, failure_threshold=1)
+    # A normal CPU generation takes longer than the first-token SLO
+    breaker.record_success(12.0, whole_answer=True)
+    assert breaker.state == CLOSED
+
+    breaker.record_success(30.0, whole_answer=True)
+    assert breaker.state == OPEN
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import main  # noqa: E402
+from meeting_state import MeetingState  # noqa: E402
+
+
+class FloodingSocket:
+    """Client that sends as fast as it is read"""
+
+    def __init__(self):
+        self.received = 0
+
+    async def receive(self):
+        self.received += 1
+        await asyncio.sleep(0)
+        return {"type": "websocket.receive", "text": json.dumps({"id": self.received, "transcript": "hi"})}
+
+
+async def stuck_handler(websocket, inbox, meeting_state):
+    await asyncio.Event().wait()
+
+
+def test_reader_stops_when_inbox_is_full():
+    websocket = FloodingSocket()
+
+    async def run():
+        connection = main.run_connection(websocket, stuck_handler, MeetingState(meeting_id="flood"), "Test",
+                                         buffered=False)
+        try:
+            await asyncio.wait_for(connection, 0.2)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    # The inbox is full and the reader is parked on the next put
+    assert websocket.received == main.INBOX_SIZE + 1
+
+
+def test_cancelled_connection_cancels_its_tasks():
+    websocket = FloodingSocket()
+
+    async def run():
+        before = asyncio.all_tasks()
+        connection = asyncio.create_task(main.run_connection(
+            websocket, stuck_handler, MeetingState(meeting_id="cancel"), "Test", buffered=False
+        ))
+        await asyncio.sleep(0.05)
+        connection.cancel()
+        await asyncio.gather(connection, return_exceptions=True)
+        return asyncio.all_tasks() - before
+
+    assert asyncio.run(run()) == set()
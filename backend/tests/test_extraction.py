@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent import PRESCREEN_THRESHOLD  # noqa: E402
+from extraction import INTENT_PATTERNS, DedupeIndex, extract_regex_items, intent_score, scan_intents  # noqa: E402
+
+
+def test_single_weak_cue_stays_below_threshold():
+    for small_talk in ("I will grab a coffee", "Due to traffic I was late", "Sorry, can you hear me?"):
+        assert intent_score(small_talk) < PRESCREEN_THRESHOLD, small_talk
+
+
+def test_combined_or_strong_cues_escalate():
+    for utterance in ("We should decide on the vendor", "You'll have it, the deadline is close",
+                      "Sarah will send the deck by Friday", "Let's revisit pricing"):
+        assert intent_score(utterance) >= PRESCREEN_THRESHOLD, utterance
+
+
+def test_dedupe_ignores_case_punctuation_and_articles():
+    index = DedupeIndex(["the Budget review"])
+    assert "budget review." in index
+    assert "A  budget   REVIEW" in index
+    assert "budget" not in index
+    index.add("hiring plan")
+    assert "The hiring plan!" in index
+
+
+def test_single_pass_finds_what_separate_scans_find():
+    transcript = ("Sarah will send the report by Friday. We will discuss it later. Mary decided to use React, "
+                  "the team agreed to hire two people. Let's park the budget discussion for next week. "
+                  "John will fix the login bug by next Monday. Let's table the hiring plan for now. "
+                  "We'll go with Postgres.")
+    expected = sorted(
+        (intent, match.span())
+        for intent, pattern in INTENT_PATTERNS.items()
+        for match in pattern.finditer(transcript)
+    )
+    assert sorted((intent, match.span()) for intent, match in scan_intents(transcript)) == expected
+
+
+def test_regex_items_are_shaped_like_the_llm_output():
+    items = extract_regex_items("Sarah will send the report by Friday. Let's park the budget discussion for later.")
+    assert items == [
+        {"type": "parking_lot", "item": "budget"},
+        {"type": "action_item", "speaker": "Sarah", "task": "send the report", "deadline": "Friday"},
+    ]
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from json_stream import ArrayItemParser  # noqa: E402
+
+ANSWER = '{"items": [{"type": "parking_lot", "item": "budget {draft}"}, {"type": "decision", "decision": "say \\"yes\\""}]}'
+
+
+def feed_in_pieces(text: str, size: int) -> list:
+    parser = ArrayItemParser()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return items
+
+
+def test_items_arrive_as_each_object_closes():
+    parser = ArrayItemParser()
+    first_end = ANSWER.index("\"}") + 2
+    assert parser.feed(ANSWER[:first_end]) == [{"type": "parking_lot", "item": "budget {draft}"}]
+    assert parser.feed(ANSWER[first_end:]) == [{"type": "decision", "decision": 'say "yes"'}]
+
+
+def test_any_chunking_gives_the_same_items():
+    whole = feed_in_pieces(ANSWER, len(ANSWER))
+    assert len(whole) == 2
+    for size in (1, 2, 3, 7):
+        assert feed_in_pieces(ANSWER, size) == whole
+
+
+def test_nested_objects_stay_inside_their_item():
+    text = '{"items": [{"type": "action_item", "details": {"due": "Friday"}}]}'
+    assert feed_in_pieces(text, 4) == [{"type": "action_item", "details": {"due": "Friday"}}]
+
+
+def test_malformed_and_unfinished_items_are_skipped():
+    parser = ArrayItemParser()
+    assert parser.feed('{"items": [{"type": oops}, {"type": "decision", "decision": "ship it"}, {"type": "dec') == [
+        {"type": "decision", "decision": "ship it"}
+    ]
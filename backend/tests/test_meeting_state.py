@@ -0,0 +1,87 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from meeting_state import MeetingState, merge_deltas  # noqa: E402
+
+
+def analysis(actions=(), decisions=(), parking=(), **state) -> dict:
+    return {
+        "interventions": [
+            {"type": "decision", "speaker": "Mary", "details": {"what": d}} for d in decisions
+        ],
+        "state": dict(state, actions=list(actions), decisions=list(decisions), parking_lot=list(parking))
+    }
+
+
+def test_items_get_stable_ids_and_deltas():
+    meeting = MeetingState("m1")
+    delta = meeting.apply(analysis(
+        actions=[{"speaker": "Sarah", "task": "send the deck", "deadline": "Friday"}],
+        decisions=["use React"],
+        parking=["budget"]
+    ))
+
+    assert [a["id"] for a in delta["actions"]] == ["act-1"]
+    assert delta["decisions"] == [{"what": "use React", "speaker": "Mary", "id": "dec-1"}]
+    assert delta["parking_lot"] == [{"item": "budget", "id": "park-1"}]
+    assert meeting.snapshot()["actions"][0]["deadline"] == "Friday"
+
+
+def test_repeats_are_deduped_and_updates_are_deltas():
+    meeting = MeetingState()
+    meeting.apply(analysis(actions=[{"speaker": "Sarah", "task": "send the deck", "deadline": "Friday"}],
+                           parking=["the Budget"]))
+
+    assert meeting.apply(analysis(parking=["the Budget"])) == {}
+    # Same item worded differently: updated in place, not added again
+    assert [p["id"] for p in meeting.apply(analysis(parking=["budget."]))["parking_lot"]] == ["park-1"]
+    delta = meeting.apply(analysis(actions=[{"speaker": "sarah", "task": "Send deck", "deadline": "Monday"}]))
+
+    assert delta["actions"] == [dict(meeting.items["actions"]["act-1"])]
+    assert delta["actions"][0]["deadline"] == "Monday"
+    assert len(meeting.snapshot()["actions"]) == 1
+    assert len(meeting.snapshot()["parking_lot"]) == 1
+
+
+def test_deltas_are_copies():
+    meeting = MeetingState()
+    delta = meeting.apply(analysis(parking=["budget"]))
+    delta["parking_lot"][0]["item"] = "changed"
+    assert meeting.snapshot()["parking_lot"][0]["item"] == "budget"
+
+
+def test_record_turn_and_scalars():
+    meeting = MeetingState()
+    meeting.record_turn("Tom")
+    assert meeting.record_turn("Tom") == {"participation": {"Tom": {"turns": 2, "time": 0}}}
+    assert meeting.apply(analysis(sentiment="positive", energy="medium")) == {"sentiment": "positive"}
+
+
+def test_merge_deltas_matches_applying_both():
+    meeting = MeetingState()
+    first = meeting.apply(analysis(actions=[{"speaker": "Sarah", "task": "send deck", "deadline": "Friday"}],
+                                   sentiment="positive"))
+    second = meeting.apply(analysis(actions=[{"speaker": "Sarah", "task": "send deck", "deadline": "Monday"}],
+                                    parking=["budget"], sentiment="tense"))
+
+    merged = merge_deltas(first, second)
+    assert merged["actions"] == [meeting.items["actions"]["act-1"]]
+    assert merged["parking_lot"] == second["parking_lot"]
+    assert merged["sentiment"] == "tense"
+    assert merge_deltas(first, {}) == first
+
+
+def test_round_trip_through_dict():
+    meeting = MeetingState("m2")
+    meeting.apply(analysis(decisions=["use React"], parking=["budget"]))
+    meeting.record_turn("Tom")
+    meeting.register_participants(["Tom Baker"])
+
+    restored = MeetingState.from_dict(meeting.to_dict(), "m2")
+    assert restored.snapshot() == meeting.snapshot()
+    assert restored.roster.find("thanks Tom") == "Tom Baker"
+    # Dedupe and ID counters carry over
+    assert restored.apply(analysis(parking=["budget"])) == {}
+    assert restored.apply(analysis(parking=["hiring"]))["parking_lot"][0]["id"] == "park-2"
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from outbox import ClientTooSlow, Outbox  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self, stall: bool = False):
+        self.sent = []
+        self.stall = stall
+        self.query_params = {}
+
+    async def send_json(self, message):
+        if self.stall:
+            await asyncio.Event().wait()
+        self.sent.append(message)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+
+def result(n: int) -> dict:
+    return {"type": "result", "id": n, "delta": {"parking_lot": [{"id": f"park-{n}", "item": f"item {n}"}]}}
+
+
+def drain(outbox: Outbox):
+    asyncio.run(outbox.flush())
+
+
+def test_below_the_threshold_each_reply_keeps_its_delta():
+    socket = FakeSocket()
+    outbox = Outbox(socket, coalesce_after=8)
+    for n in range(3):
+        outbox.put("json", result(n))
+    drain(outbox)
+    assert [m["delta"] for m in socket.sent] == [result(n)["delta"] for n in range(3)]
+
+
+def test_backlog_folds_deltas_into_the_newest_reply():
+    socket = FakeSocket()
+    outbox = Outbox(socket, coalesce_after=2)
+    for n in range(4):
+        outbox.put("json", result(n))
+    drain(outbox)
+
+    assert [m["id"] for m in socket.sent] == [0, 1, 2, 3]
+    assert socket.sent[0]["delta"] == result(0)["delta"]
+    assert socket.sent[1]["delta"] == {} and socket.sent[2]["delta"] == {}
+    assert [p["id"] for p in socket.sent[3]["delta"]["parking_lot"]] == ["park-1", "park-2", "park-3"]
+
+
+def test_partials_are_skipped_while_anything_waits():
+    socket = FakeSocket()
+    outbox = Outbox(socket)
+    outbox.put("json", {"type": "partial", "text": "hel"})
+    outbox.put("json", {"type": "partial", "text": "hello"})
+    outbox.put("bytes", b"audio")
+    drain(outbox)
+    assert socket.sent == [{"type": "partial", "text": "hel"}, b"audio"]
+
+
+def test_full_queue_means_client_too_slow():
+    outbox = Outbox(FakeSocket(), max_queue=2)
+    for n in range(3):
+        outbox.put("text", str(n))
+    with pytest.raises(ClientTooSlow):
+        asyncio.run(asyncio.wait_for(outbox.run(), 1))
+
+
+def test_stuck_send_means_client_too_slow():
+    outbox = Outbox(FakeSocket(stall=True), send_timeout=0.05)
+    outbox.put("json", result(1))
+    with pytest.raises(ClientTooSlow):
+        asyncio.run(asyncio.wait_for(outbox.run(), 1))
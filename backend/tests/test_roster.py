@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from roster import PRESCAN_MAX_NAMES, Roster  # noqa: E402
+
+
+def test_whole_words_only():
+    roster = Roster(["Tom", "Anna"])
+    assert roster.find("see you tomorrow") is None
+    assert roster.find("Thanks, Tom!") == "Tom"
+    assert roster.find("hannah and anna") == "Anna"
+
+
+def test_first_participant_mentioned_wins():
+    roster = Roster(["Tom", "Anna"])
+    assert roster.find("Anna asked Tom") == "Anna"
+
+
+def test_multi_word_names():
+    roster = Roster(["Mary Jane Watson", "Peter Parker"])
+    assert roster.find("ask mary jane watson") == "Mary Jane Watson"
+    assert roster.find("ask Peter about it") == "Peter Parker"   # unique first name
+    assert roster.find("ask jane watson") is None                # only the first name stands alone
+
+    roster.add(["Peter Quill"])
+    assert roster.find("ask Peter about it") is None             # now ambiguous
+    assert roster.find("peter quill will do it") == "Peter Quill"
+
+
+def test_common_word_names_need_a_capital():
+    roster = Roster(["Will", "Sarah"])
+    assert roster.find("Sarah will send it") == "Sarah"
+    assert roster.find("it will rain") is None
+    assert roster.find("Will said so") == "Will"
+
+
+def test_add_ignores_blanks_and_duplicates():
+    roster = Roster(["Tom", "  tom  ", "", "Anna"])
+    roster.add(["anna", "Lee  Chen"])
+    assert roster.names == ["Tom", "Anna", "Lee Chen"]
+    assert len(roster) == 3
+
+
+def test_large_rosters_skip_the_prescan():
+    names = [f"Person{i} Surname{i}" for i in range(PRESCAN_MAX_NAMES * 2)]
+    roster = Roster(names)
+    assert roster.find("over to person150 surname150") == "Person150 Surname150"
+    assert roster.find("nobody named here") is None
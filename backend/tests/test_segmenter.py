@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from segmenter import SAMPLE_RATE, StreamingSegmenter, VAD_SILENCE_MS  # noqa: E402
+
+CHUNK = SAMPLE_RATE // 4   # what the decoder hands over per 250 ms webm chunk
+
+
+def noisy_meeting(bursts: int, speech_s: float = 2.0, pause_s: float = 1.5, noise_rms: float = 0.01):
+    """Room noise throughout, with speech-level tone bursts; returns (audio, burst end times)"""
+    rng = np.random.default_rng(0)
+    speech, pause = int(speech_s * SAMPLE_RATE), int(pause_s * SAMPLE_RATE)
+    audio = rng.normal(0, noise_rms, pause + bursts * (speech + pause)).astype(np.float32)
+
+    t = np.arange(speech) / SAMPLE_RATE
+    voice = (0.1 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+    ends = []
+    for n in range(bursts):
+        start = pause + n * (speech + pause)
+        audio[start:start + speech] += voice
+        ends.append((start + speech) / SAMPLE_RATE)
+    return audio, ends
+
+
+def segment(audio: np.ndarray):
+    """Feed in decoder-sized chunks, returns (end time, utterance) for each final"""
+    segmenter = StreamingSegmenter()
+    finals, fed = [], 0
+    for start in range(0, len(audio), CHUNK):
+        chunk = audio[start:start + CHUNK]
+        fed += len(chunk)
+        finals += [(fed / SAMPLE_RATE, u) for u in segmenter.feed(chunk) if u.final]
+    tail = segmenter.flush()
+    if tail is not None:
+        finals.append((fed / SAMPLE_RATE, tail))
+    return finals
+
+
+def test_noisy_room_splits_on_pauses():
+    audio, ends = noisy_meeting(bursts=6)
+    finals = segment(audio)
+
+    assert len(finals) == len(ends)
+    for (emitted_at, utterance), burst_end in zip(finals, ends):
+        # Closed by the pause after its burst, not by the max-length cap
+        assert burst_end + VAD_SILENCE_MS / 1000 <= emitted_at <= burst_end + VAD_SILENCE_MS / 1000 + 0.3
+        assert 2.0 <= utterance.seconds <= 2.0 + (VAD_SILENCE_MS + 500) / 1000
+
+
+def test_quiet_room_still_detects_speech():
+    audio, ends = noisy_meeting(bursts=3, noise_rms=0.0005)
+    assert len(segment(audio)) == len(ends)
+
+
+def test_flush_returns_open_utterance():
+    audio, _ = noisy_meeting(bursts=1)
+    cut = int(2.5 * SAMPLE_RATE)   # mid-burst: the speaker is still talking
+    segmenter = StreamingSegmenter()
+    assert not [u for u in segmenter.feed(audio[:cut]) if u.final]
+    tail = segmenter.flush()
+    assert tail is not None and tail.final
@@ -0,0 +1,47 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from transcription import _window_text  # noqa: E402
+
+T = 1000   # first timestamp token
+
+
+class FakeTokenizer:
+    timestamp_begin = T
+    words = {1: " Send", 2: " the", 3: " deck", 4: " today", 5: " please"}
+
+    def decode(self, tokens):
+        return "".join(self.words.get(token, "") for token in tokens)
+
+
+def result(tokens, avg_logprob=-0.2, no_speech_prob=0.01):
+    # faster-whisper's score is the length-normalized cumulative log prob
+    return SimpleNamespace(
+        sequences_ids=[tokens],
+        scores=[avg_logprob * (len(tokens) + 1) / len(tokens)],
+        no_speech_prob=no_speech_prob
+    )
+
+
+def test_confident_window_gives_its_segments():
+    tokens = [T, 1, 2, 3, T + 50, T + 50, 4, 5, T + 100]
+    assert _window_text(result(tokens), FakeTokenizer(), 250) == "Send the deck  today please"
+
+
+def test_low_logprob_needs_the_fallback():
+    tokens = [T, 1, 2, 3, T + 50]
+    assert _window_text(result(tokens, avg_logprob=-1.5), FakeTokenizer(), 250) is None
+
+
+def test_silence_is_dropped():
+    tokens = [T, 1, 2, T + 20]
+    assert _window_text(result(tokens, avg_logprob=-1.5, no_speech_prob=0.9), FakeTokenizer(), 250) == ""
+
+
+def test_unfinished_window_is_decoded_again():
+    # Ends on a pair of timestamps at 1s of a 5s window: faster-whisper seeks there
+    tokens = [T, 1, 2, T + 50, T + 50, 3]
+    assert _window_text(result(tokens), FakeTokenizer(), 500) is None
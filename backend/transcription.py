@@ -1,157 +1,528 @@
 from faster_whisper import WhisperModel
-import tempfile
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_compression_ratio, get_suppressed_tokens
+import asyncio
+import logging
 import os
-import subprocess
-import base64
+import shlex
+import threading
+import time
+import ctranslate2
+import numpy as np
 
-# Load Whisper model (runs locally, FREE)
-print("🎤 Loading Whisper model...")
-model = WhisperModel("base", device="cpu", compute_type="int8")
-print("✅ Whisper ready!")
+from metrics import STAGE_SECONDS
+from scheduler import TranscriptionScheduler, WHISPER_WORKERS
 
-async def transcribe_audio(audio_bytes: bytes) -> dict:
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+MAX_BATCH_SAMPLES = 30 * SAMPLE_RATE  # Whisper's single-window length
+INITIAL_PROMPT = "This is an English conversation about work meetings and action items."
+
+# Decode settings shared by the single and batched paths (faster-whisper's defaults)
+BEAM_SIZE = 5
+LOG_PROB_THRESHOLD = -1.0           # below this a decode is retried hotter (or dropped as silence)
+NO_SPEECH_THRESHOLD = 0.6
+COMPRESSION_RATIO_THRESHOLD = 2.4   # above this the text is too repetitive, retried hotter
+MAX_INITIAL_TIMESTAMP = 1.0
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")   # model size or path to a shared local copy
+WHISPER_EAGER_LOAD = os.getenv("WHISPER_EAGER_LOAD", "1") == "1"
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))   # per model, 0 = split the cores between workers
+# Decoder command, e.g. a specific build or the load test's stand-in
+FFMPEG_BIN = shlex.split(os.getenv("FFMPEG_BIN", "ffmpeg"))
+
+
+class WhisperManager:
     """
-    Transcribe audio to text using Whisper
-    Converts WebM to WAV first
+    Loads the Whisper model once per process, on first use or in the background
+    - One model is shared by every scheduler thread (num_workers) so weights
+      live in memory once per process
+    - A warm-up decode runs before we report ready, so the first real
+      utterance doesn't pay for lazy kernel/allocator setup
+    """
+
+    def __init__(self, model_name: str = WHISPER_MODEL):
+        self.model_name = model_name
+        self.status = "cold"    # cold -> loading -> ready (or failed)
+        self.error = None
+        self.load_seconds = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get(self) -> WhisperModel:
+        """Return the loaded model, loading it first if needed (thread-safe)"""
+        if self._model is not None:
+            return self._model
+
+        with self._lock:
+            if self._model is None:
+                self._load()
+        return self._model
+
+    def _load(self):
+        self.status = "loading"
+        started = time.monotonic()
+        try:
+            # Load Whisper model (runs locally, FREE)
+            logger.info(f"🎤 Loading Whisper model '{self.model_name}'...")
+            model = WhisperModel(
+                self.model_name,
+                device="cpu",
+                compute_type="int8",
+                cpu_threads=WHISPER_CPU_THREADS or max(1, (os.cpu_count() or 1) // WHISPER_WORKERS),
+                num_workers=WHISPER_WORKERS
+            )
+
+            # Warm-up: one second of silence through the full decode path
+            segments, _ = model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), language="en")
+            list(segments)
+
+            self._model = model
+            self.load_seconds = round(time.monotonic() - started, 2)
+            self.status = "ready"
+            logger.info(f"✅ Whisper ready! ({self.load_seconds}s)")
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"❌ Whisper failed to load: {e}")
+            raise
+
+    async def load_in_background(self, scheduler=None):
+        """
+        Load off the event loop so the server accepts connections meanwhile
+        With a process-pool scheduler the model is loaded in every worker
+        process instead (they decode, this process never needs a copy), and
+        we're only ready once all of them report back
+        """
+        if scheduler is not None and scheduler.pool == "process":
+            await self._load_in_workers(scheduler)
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.get)
+        except Exception:
+            pass  # Already recorded in status/error
+
+    async def _load_in_workers(self, scheduler):
+        self.status = "loading"
+        started = time.monotonic()
+        try:
+            all_ready = await scheduler.warm_up(_load_in_worker)
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"❌ Whisper failed to load in a worker process: {e}")
+            return
+
+        if not all_ready:
+            self.status = "failed"
+            self.error = f"only {scheduler.ready_workers}/{scheduler.workers} workers reported ready"
+            logger.error(f"❌ Whisper workers not ready: {self.error}")
+            return
+
+        self.load_seconds = round(time.monotonic() - started, 2)
+        self.status = "ready"
+        logger.info(f"✅ Whisper ready in {scheduler.workers} worker processes ({self.load_seconds}s)")
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def health(self) -> dict:
+        return {
+            "status": self.status,
+            "model": self.model_name,
+            "load_seconds": self.load_seconds,
+            "error": self.error
+        }
+
+
+whisper = WhisperManager()
+
+
+def _load_in_worker() -> int:
+    """Runs in a pool process: load (and warm up) its own model, returns its pid"""
+    whisper.get()
+    # Hold on briefly so the other probes of this round reach other processes
+    time.sleep(0.1)
+    return os.getpid()
+
+
+class DecodeError(Exception):
+    """FFmpeg could not turn the audio into PCM"""
+
+
+async def decode_audio(audio_bytes: bytes, timeout: float = 15) -> np.ndarray:
     """
-    webm_path = None
-    wav_path = None
-    
+    Decode WebM (or any container FFmpeg understands) fully in memory
+    Bytes go in on stdin, 16 kHz mono s16le PCM comes out on stdout
+    """
+    ffmpeg_cmd = [
+        *FFMPEG_BIN,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-i", "pipe:0",             # Input from stdin
+        "-ar", str(SAMPLE_RATE),    # Sample rate
+        "-ac", "1",                 # Mono
+        "-f", "s16le",              # Raw 16-bit PCM
+        "pipe:1"                    # Output to stdout
+    ]
+
+    process = await asyncio.create_subprocess_exec(
+        *ffmpeg_cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
     try:
-        print(f"🎤 Transcribing {len(audio_bytes)} bytes of audio...")
-        
-        # Create temp directory
-        temp_dir = tempfile.gettempdir()
-        
-        # Generate unique filenames
-        import time
-        timestamp = int(time.time() * 1000)
-        webm_path = os.path.join(temp_dir, f"audio_{timestamp}.webm")
-        wav_path = os.path.join(temp_dir, f"audio_{timestamp}.wav")
-        
-        # Save WebM audio to file
-        with open(webm_path, 'wb') as f:
-            f.write(audio_bytes)
-        
-        print(f"📁 Saved WebM to: {webm_path}")
-        print(f"📊 File size: {os.path.getsize(webm_path)} bytes")
-        
-        # Verify file exists
-        if not os.path.exists(webm_path):
-            print(f"❌ WebM file not created!")
-            return {
-                "text": "",
-                "confidence": 0.0,
-                "error": "Failed to save audio file"
-            }
-        
-        # Build FFmpeg command
+        with STAGE_SECONDS.time(stage="decode"):
+            pcm, stderr = await asyncio.wait_for(process.communicate(audio_bytes), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        raise DecodeError(stderr.decode(errors="replace")[:200])
+
+    return pcm_to_float32(pcm)
+
+
+def pcm_to_float32(pcm: bytes) -> np.ndarray:
+    """Convert s16le PCM bytes to the float32 [-1, 1] array Whisper expects"""
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+WEBM_MAGIC = b"\x1a\x45\xdf\xa3"     # EBML header
+WEBM_CLUSTER = b"\x1f\x43\xb6\x75"   # first block of actual audio
+
+
+def container_header(chunk: bytes) -> bytes:
+    """
+    The part of a stream's first chunk a restarted decoder needs again:
+    everything before the first audio data (WebM: up to the first Cluster,
+    WAV: up to the samples). Unknown containers keep the whole chunk
+    """
+    if chunk.startswith(WEBM_MAGIC):
+        cluster = chunk.find(WEBM_CLUSTER)
+        return chunk[:cluster] if cluster > 0 else chunk
+    if chunk.startswith(b"RIFF"):
+        data = chunk.find(b"data")
+        return chunk[:data + 8] if data >= 0 else chunk
+    return chunk
+
+
+class StreamingDecoder:
+    """
+    One long-lived FFmpeg process per audio websocket
+    MediaRecorder chunks are pieces of a single WebM stream, so we keep
+    feeding them into the same decoder and collect PCM as it comes out
+    """
+
+    def __init__(self):
+        self.process = None
+        self._reader = None
+        self._header = None
+        self._pcm = bytearray()
+        self._fed_at = None     # when input went in that hasn't produced PCM yet
+
+    async def start(self):
         ffmpeg_cmd = [
-            "ffmpeg",
-            "-y",              # Overwrite output
-            "-i", webm_path,   # Input file
-            "-ar", "16000",    # Sample rate
-            "-ac", "1",        # Mono
-            "-f", "wav",       # Output format
-            wav_path           # Output file
+            *FFMPEG_BIN,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-fflags", "nobuffer",      # Don't hold frames back
+            "-probesize", "32768",      # Small probe, the stream starts right away
+            "-analyzeduration", "0",
+            "-i", "pipe:0",
+            "-ar", str(SAMPLE_RATE),
+            "-ac", "1",
+            "-f", "s16le",
+            "-flush_packets", "1",
+            "pipe:1"
         ]
-        
-        print(f"🔄 Running FFmpeg...")
-        print(f"   Input: {webm_path}")
-        print(f"   Output: {wav_path}")
-        
-        # Run FFmpeg
-        result = subprocess.run(
-            ffmpeg_cmd,
-            capture_output=True,
-            text=True,
-            timeout=15
+
+        self.process = await asyncio.create_subprocess_exec(
+            *ffmpeg_cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
         )
-        
-        # Check result
-        if result.returncode != 0:
-            print(f"❌ FFmpeg failed with code: {result.returncode}")
-            print(f"❌ stderr (first 500 chars): {result.stderr[:500]}")
-            
-            # Cleanup
-            if os.path.exists(webm_path):
-                os.unlink(webm_path)
-            
-            return {
-                "text": "",
-                "confidence": 0.0,
-                "error": f"FFmpeg failed: {result.stderr[:200]}"
-            }
-        
-        print(f"✅ FFmpeg conversion successful")
-        
-        # Verify WAV file exists
-        if not os.path.exists(wav_path):
-            print(f"❌ WAV file not created!")
-            if os.path.exists(webm_path):
-                os.unlink(webm_path)
-            return {
-                "text": "",
-                "confidence": 0.0,
-                "error": "WAV file not created"
-            }
-        
-        print(f"📁 WAV file size: {os.path.getsize(wav_path)} bytes")
-        
-        # Transcribe with Whisper
-        print(f"🎤 Starting Whisper transcription...")
-        segments, info = model.transcribe(
-        wav_path, 
-        beam_size=5,
-        language="en",  # ← ADD THIS LINE!
-        initial_prompt="This is an English conversation about work meetings and action items."
-)
-        
-        # Combine segments
-        full_text = " ".join([segment.text for segment in segments])
-        
-        print(f"✅ Transcription: '{full_text}'")
-        
-        # Cleanup
-        if os.path.exists(webm_path):
-            os.unlink(webm_path)
-        if os.path.exists(wav_path):
-            os.unlink(wav_path)
-        
+        self._reader = asyncio.create_task(self._read_pcm())
+        logger.info("🎛️ Streaming decoder started")
+
+    async def _read_pcm(self):
+        """Continuously move decoded PCM from FFmpeg's stdout into the buffer"""
+        while True:
+            data = await self.process.stdout.read(8192)
+            if not data:
+                break
+            if self._fed_at is not None:
+                # Decode latency: chunk written -> its first PCM out
+                STAGE_SECONDS.observe(time.perf_counter() - self._fed_at, stage="decode")
+                self._fed_at = None
+            self._pcm.extend(data)
+
+    async def feed(self, chunk: bytes):
+        """Push the next piece of the WebM stream into the decoder"""
+        first = self._header is None
+        if first:
+            # First chunk starts with the container header, kept to restart a dead decoder
+            self._header = container_header(chunk)
+
+        if self.process is None or self.process.returncode is not None:
+            restarting = self.process is not None
+            await self.start()
+            if restarting and not first:
+                logger.warning("⚠️ Decoder exited, restarting with saved header")
+                self.process.stdin.write(self._header)
+
+        try:
+            if self._fed_at is None:
+                self._fed_at = time.perf_counter()
+            self.process.stdin.write(chunk)
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.warning("⚠️ Decoder pipe closed, chunk dropped")
+
+    def read_pcm(self) -> np.ndarray:
+        """Take everything decoded so far as float32 samples"""
+        usable = len(self._pcm) - len(self._pcm) % 2
+        pcm = bytes(self._pcm[:usable])
+        del self._pcm[:usable]
+        return pcm_to_float32(pcm)
+
+    async def close(self, timeout: float = 2):
+        """
+        Flush and stop FFmpeg (end of stream, or the websocket went away)
+        Whatever it decoded before exiting stays readable via read_pcm()
+        """
+        if self.process is None:
+            return
+
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+                self.process.kill()
+                await self.process.wait()
+
+        if self._reader is not None:
+            # FFmpeg has exited, so its stdout runs dry right after the last PCM
+            try:
+                await asyncio.wait_for(self._reader, timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._reader = None
+
+        self.process = None
+        logger.info("🎛️ Streaming decoder stopped")
+
+
+def _transcribe_sync(audio: np.ndarray) -> dict:
+    """Blocking Whisper decode, runs on a scheduler worker"""
+    model = whisper.get()
+    segments, info = model.transcribe(
+        audio,
+        beam_size=BEAM_SIZE,
+        language="en",
+        initial_prompt=INITIAL_PROMPT,
+        log_prob_threshold=LOG_PROB_THRESHOLD,
+        no_speech_threshold=NO_SPEECH_THRESHOLD,
+        compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD,
+        max_initial_timestamp=MAX_INITIAL_TIMESTAMP
+    )
+
+    # Combine segments
+    full_text = " ".join([segment.text for segment in segments])
+
+    return {
+        "text": full_text.strip(),
+        "confidence": float(info.language_probability),
+        "language": info.language
+    }
+
+
+def _window_text(result, tokenizer, segment_size: int):
+    """
+    Text faster-whisper's transcribe() makes of a single-window decode at
+    temperature 0, or None when it wouldn't stop there: the decode needs a
+    hotter retry, or the window ends mid-sentence and would be decoded again
+    """
+    tokens = result.sequences_ids[0]
+    avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+    compression_ratio = get_compression_ratio(tokenizer.decode(tokens).strip())
+
+    unsure = avg_logprob < LOG_PROB_THRESHOLD
+    silence = result.no_speech_prob > NO_SPEECH_THRESHOLD
+    if (compression_ratio > COMPRESSION_RATIO_THRESHOLD or unsure) and not (silence and unsure):
+        return None
+    if silence and avg_logprob <= LOG_PROB_THRESHOLD:
+        return ""
+
+    timestamp_begin = tokenizer.timestamp_begin
+    single_timestamp_ending = len(tokens) >= 2 and tokens[-2] < timestamp_begin <= tokens[-1]
+    consecutive = [
+        i for i in range(1, len(tokens))
+        if tokens[i] >= timestamp_begin and tokens[i - 1] >= timestamp_begin
+    ]
+
+    if not consecutive:
+        pieces = [tokenizer.decode(tokens)]
+    else:
+        if not single_timestamp_ending:
+            # Seeks to the last timestamp (one per 2 feature frames) and
+            # decodes the rest in a new window
+            if (tokens[consecutive[-1] - 1] - timestamp_begin) * 2 < segment_size:
+                return None
+        else:
+            consecutive.append(len(tokens))
+
+        pieces = []
+        last = 0
+        for end in consecutive:
+            sliced = tokens[last:end]
+            if sliced[0] != sliced[-1]:   # zero-length segments are dropped
+                pieces.append(tokenizer.decode(sliced))
+            last = end
+
+    return " ".join(piece for piece in pieces if piece.strip()).strip()
+
+
+def _transcribe_batch_sync(batch: list) -> list:
+    """
+    Decode several short segments with one batched decoder pass
+    Each segment is encoded exactly as _transcribe_sync would and decoded
+    with the same prompt and options; a result is only kept when it is what
+    _transcribe_sync would return (no temperature fallback, same no-speech
+    filter, one window). Everything else, and anything longer than one 30s
+    window, goes through _transcribe_sync
+    """
+    results = [None] * len(batch)
+    model = whisper.get()
+    extractor = model.feature_extractor
+    encoded = []   # (index, frames, encoder output)
+
+    for i, audio in enumerate(batch):
+        if len(audio) <= MAX_BATCH_SAMPLES:
+            features = extractor(audio)
+            frames = features.shape[-1] - extractor.nb_max_frames
+            if frames > 0:
+                output = np.array(model.encode(features[:, :frames]))
+                if not encoded or output.shape == encoded[0][2].shape:
+                    encoded.append((i, frames, output))
+                    continue
+        results[i] = _transcribe_sync(audio)
+
+    if encoded:
+        tokenizer = Tokenizer(
+            model.hf_tokenizer,
+            model.model.is_multilingual,
+            task="transcribe",
+            language="en"
+        )
+        prompt = model.get_prompt(
+            tokenizer,
+            tokenizer.encode(" " + INITIAL_PROMPT),
+            without_timestamps=False
+        )
+
+        outputs = model.model.generate(
+            ctranslate2.StorageView.from_array(np.ascontiguousarray(np.concatenate([e[2] for e in encoded]))),
+            [prompt] * len(encoded),
+            beam_size=BEAM_SIZE,
+            patience=1,
+            length_penalty=1,
+            repetition_penalty=1,
+            no_repeat_ngram_size=0,
+            max_length=model.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            suppress_tokens=get_suppressed_tokens(tokenizer, [-1]),
+            max_initial_timestamp_index=int(round(MAX_INITIAL_TIMESTAMP / model.time_precision))
+        )
+
+        for (i, frames, _), output in zip(encoded, outputs):
+            text = _window_text(output, tokenizer, frames)
+            if text is None:
+                results[i] = _transcribe_sync(batch[i])
+            else:
+                # language_probability is 1 whenever the language is forced
+                results[i] = {"text": text, "confidence": 1.0, "language": "en"}
+
+    return results
+
+
+# Shared worker pool for every session, batching across sessions
+scheduler = TranscriptionScheduler(_transcribe_sync, batch_fn=_transcribe_batch_sync)
+
+
+async def transcribe_pcm(audio: np.ndarray, session_id: str = "default") -> dict:
+    """
+    Transcribe already-decoded 16 kHz mono float32 audio
+    Queued on the scheduler so the event loop stays free
+    """
+    try:
+        logger.debug(f"🎤 Queueing Whisper transcription ({len(audio) / SAMPLE_RATE:.1f}s)...")
+        result = await scheduler.submit(session_id, audio)
+
+        logger.info(f"✅ Transcription: '{result['text']}'")
+
+        return result
+
+    except asyncio.CancelledError:
+        raise
+
+    except Exception as e:
+        logger.exception(f"❌ Transcription error: {e}")
+
         return {
-            "text": full_text.strip(),
-            "confidence": float(info.language_probability),
-            "language": info.language
+            "text": "",
+            "confidence": 0.0,
+            "error": str(e)
         }
-        
-    except subprocess.TimeoutExpired:
-        print(f"❌ FFmpeg timeout")
-        if webm_path and os.path.exists(webm_path):
-            os.unlink(webm_path)
-        if wav_path and os.path.exists(wav_path):
-            os.unlink(wav_path)
+
+
+async def transcribe_audio(audio_bytes: bytes, session_id: str = "default") -> dict:
+    """
+    Transcribe audio to text using Whisper
+    Decodes WebM to PCM in memory first (no temp files)
+    """
+    try:
+        logger.info(f"🎤 Transcribing {len(audio_bytes)} bytes of audio...")
+
+        audio = await decode_audio(audio_bytes)
+
+        logger.info(f"✅ FFmpeg decoded {len(audio) / SAMPLE_RATE:.1f}s of audio")
+
+        return await transcribe_pcm(audio, session_id)
+
+    except asyncio.TimeoutError:
+        logger.error(f"❌ FFmpeg timeout")
         return {
             "text": "",
             "confidence": 0.0,
             "error": "FFmpeg timeout"
         }
-        
+
+    except DecodeError as e:
+        logger.error(f"❌ FFmpeg failed: {e}")
+        return {
+            "text": "",
+            "confidence": 0.0,
+            "error": f"FFmpeg failed: {e}"
+        }
+
     except Exception as e:
-        print(f"❌ Transcription error: {e}")
-        import traceback
-        traceback.print_exc()
-        
-        # Cleanup
-        try:
-            if webm_path and os.path.exists(webm_path):
-                os.unlink(webm_path)
-            if wav_path and os.path.exists(wav_path):
-                os.unlink(wav_path)
-        except:
-            pass
-        
+        logger.exception(f"❌ Transcription error: {e}")
+
         return {
             "text": "",
             "confidence": 0.0,
             "error": str(e)
-        }
\ No newline at end of file
+        }
@@ -1,9 +1,193 @@
+import asyncio
+import io
+import logging
+import os
+import threading
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import STAGE_SECONDS
+
+try:
+    from piper.voice import PiperVoice
+except ImportError:   # Optional (pip install -r requirements-tts.txt): without it the browser speaks
+    PiperVoice = None
+
+logger = logging.getLogger(__name__)
+
+# Piper voice model (.onnx, with its .onnx.json next to it); empty = browser TTS
+PIPER_VOICE = os.getenv("PIPER_VOICE", "")
+TTS_CACHE_SIZE = int(os.getenv("TTS_CACHE_SIZE", "128"))    # rendered phrases kept
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "1"))            # synthesis threads
+
+
+def phrase_key(text: str) -> str:
+    """Same words, same audio: case and spacing don't change what Piper says"""
+    return " ".join(text.lower().split())
+
+
+def to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap raw s16le mono PCM in a WAV header for one-shot playback"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class TTSEngine:
+    """
+    Local Piper speech synthesis, off the event loop
+    - The voice loads once on first use; synthesis runs on its own small
+      thread pool so it never competes with Whisper's workers
+    - Audio comes out sentence by sentence, so playback can start while the
+      rest of the phrase is still being synthesized
+    - LRU cache of rendered PCM keyed by the normalized text: templated
+      interventions ("Parked for later: ...") repeat all meeting long
+    """
+
+    def __init__(self, voice_path: str = PIPER_VOICE, cache_size: int = TTS_CACHE_SIZE,
+                 workers: int = TTS_WORKERS):
+        self.voice_path = voice_path
+        self.cache_size = cache_size
+        self.status = "disabled" if PiperVoice is None or not voice_path else "cold"
+        self.error = None
+        self.sample_rate = None
+        self._voice = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._cache = OrderedDict()    # phrase key -> PCM bytes
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.status in ("cold", "ready")
+
+    def _load(self):
+        with self._lock:
+            if self._voice is not None:
+                return
+            try:
+                logger.info(f"🔊 Loading Piper voice '{self.voice_path}'...")
+                voice = PiperVoice.load(self.voice_path)
+                self.sample_rate = voice.config.sample_rate
+                self._voice = voice
+                self.status = "ready"
+                logger.info(f"✅ Piper ready ({self.sample_rate} Hz)")
+            except Exception as e:
+                self.status = "failed"
+                self.error = str(e)
+                logger.error(f"❌ Piper failed to load: {e}")
+                raise
+
+    def _synthesize(self, text: str):
+        """Blocking generator of PCM chunks, one per sentence"""
+        self._load()
+        if hasattr(self._voice, "synthesize_stream_raw"):
+            yield from self._voice.synthesize_stream_raw(text)
+        else:
+            for chunk in self._voice.synthesize(text):
+                yield chunk.audio_int16_bytes
+
+    def _remember(self, key: str, pcm: bytes):
+        self._cache[key] = pcm
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def stream(self, text: str):
+        """
+        Yield s16le mono PCM chunks at self.sample_rate as they're synthesized
+        Cached phrases come back as one chunk straight away
+        """
+        key = phrase_key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            yield cached
+            return
+        self.misses += 1
+
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for pcm in self._synthesize(text):
+                    if stop.is_set():
+                        return
+                    loop.call_soon_threadsafe(chunks.put_nowait, pcm)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            loop.call_soon_threadsafe(chunks.put_nowait, done)
+
+        started = time.perf_counter()
+        worker = loop.run_in_executor(self._executor, produce)
+        rendered = []
+        try:
+            while True:
+                pcm = await chunks.get()
+                if pcm is done:
+                    break
+                if isinstance(pcm, Exception):
+                    raise pcm
+                if not rendered:
+                    STAGE_SECONDS.observe(time.perf_counter() - started, stage="tts_first_chunk")
+                rendered.append(pcm)
+                yield pcm
+        finally:
+            # Listener gone or synthesis failed: let the thread stop after its current sentence
+            stop.set()
+
+        await worker
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="tts")
+        self._remember(key, b"".join(rendered))
+
+    async def render(self, text: str) -> bytes:
+        """Whole phrase as a WAV file"""
+        pcm = b"".join([chunk async for chunk in self.stream(text)])
+        return to_wav(pcm, self.sample_rate)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "status": self.status,
+            "voice": self.voice_path or None,
+            "sample_rate": self.sample_rate,
+            "error": self.error,
+            "cached_phrases": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared engine for the whole process
+tts = TTSEngine()
+
+
 async def text_to_speech(text: str) -> bytes:
     """
-    TTS placeholder - actual speech synthesis happens in browser
-    Browser's Web Speech API handles the voice output
-    Returns None so browser takes over
+    Sarah's voice for text as WAV bytes
+    Returns None when Piper isn't set up (or fails) so the browser's
+    Web Speech API takes over
     """
-    print(f"🔊 TTS text prepared for browser: {text[:50]}...")
-    # Return None - browser will handle speech synthesis
-    return None
\ No newline at end of file
+    if not tts.enabled or not text.strip():
+        return None
+    try:
+        return await tts.render(text)
+    except Exception as e:
+        logger.warning(f"⚠️ TTS failed, browser will speak instead: {e}")
+        return None
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { useMeetingStore } from './store.js'
+import { useMeetingStore, isWatching, watchLink } from './store.js'
 import VoiceInput from './VoiceInput.jsx'
 import ActionPanel from './ActionPanel.jsx'
 import DecisionsPanel from './DecisionsPanel.jsx'
@@ -8,8 +8,28 @@ import ExportSummary from './ExportSummary.jsx'
 
 export default function App() {
   const [transcript, setTranscript] = useState('')
-  const [ws, setWs] = useState(null)
   const meetingState = useMeetingStore((state) => state.meetingState)
+  const connect = useMeetingStore((state) => state.connect)
+  const disconnect = useMeetingStore((state) => state.disconnect)
+  const sendTranscript = useMeetingStore((state) => state.sendTranscript)
+  const meetingId = useMeetingStore((state) => state.meetingId)
+  const newMeeting = useMeetingStore((state) => state.newMeeting)
+  const [linkCopied, setLinkCopied] = useState(false)
+
+  const copyWatchLink = () => {
+    navigator.clipboard.writeText(watchLink(meetingId))
+      .then(() => {
+        setLinkCopied(true)
+        setTimeout(() => setLinkCopied(false), 2000)
+      })
+      .catch(error => console.error('❌ Could not copy watch link:', error))
+  }
+
+  const handleNewMeeting = () => {
+    if (window.confirm('Start a new meeting? The current one stays saved under its ID.')) {
+      newMeeting()
+    }
+  }
 
   // VOICE TEST FUNCTION - GUARANTEED TO WORK
   const testVoice = () => {
@@ -28,65 +48,17 @@ export default function App() {
   }
 
   useEffect(() => {
-    // Connect to WebSocket for text input
-    const websocket = new WebSocket('ws://localhost:8000/ws')
-    
-    websocket.onopen = () => {
-      console.log('✅ Text WebSocket connected')
-      setWs(websocket)
-    }
-    
-    websocket.onmessage = (event) => {
-      const data = JSON.parse(event.data)
-      console.log('📥 Received:', data)
-      console.log('  ↳ Actions:', data.state?.actions?.length || 0)
-      console.log('  ↳ Decisions:', data.state?.decisions?.length || 0)
-      console.log('  ↳ Parking:', data.state?.parking_lot?.length || 0)
-      console.log('  ↳ Interventions:', data.interventions?.length || 0)
-      
-      // Use Zustand's setState directly with functional update to avoid stale state
-      useMeetingStore.setState(state => ({
-        meetingState: {
-          ...state.meetingState,
-          // Append new interventions to existing ones
-          interventions: [
-            ...state.meetingState.interventions,
-            ...(data.interventions || [])
-          ],
-          // Replace with new data from backend (backend sends full state)
-          actions: data.state?.actions || state.meetingState.actions,
-          decisions: data.state?.decisions || state.meetingState.decisions,
-          parking_lot: data.state?.parking_lot || state.meetingState.parking_lot,
-          // Merge participation data
-          participation: {
-            ...state.meetingState.participation,
-            ...(data.state?.participation || {})
-          },
-          sentiment: data.state?.sentiment || state.meetingState.sentiment,
-          energy: data.state?.energy || state.meetingState.energy
-        }
-      }))
-      
-      console.log('✅ State updated!')
-    }
-    
-    websocket.onerror = (error) => {
-      console.error('❌ WebSocket error:', error)
-    }
-    
-    websocket.onclose = () => {
-      console.log('👋 WebSocket closed')
-    }
-    
-    return () => {
-      if (websocket) websocket.close()
-    }
-  }, [])
+    // One persistent, multiplexed text connection (lives in the store)
+    connect()
+    return () => disconnect()
+  }, [connect, disconnect])
 
   const handleSend = () => {
-    if (ws && ws.readyState === WebSocket.OPEN && transcript.trim()) {
+    if (transcript.trim()) {
       console.log('📤 Sending:', transcript)
-      ws.send(JSON.stringify({ transcript: transcript.trim() }))
+      sendTranscript(transcript.trim())
+        .then(reply => console.log('✅ Reply for request', reply.id))
+        .catch(error => console.error('❌ Transcript not analyzed:', error))
       setTranscript('')
     }
   }
@@ -121,6 +93,27 @@ export default function App() {
           <p className="text-sm text-white/60 mt-2">
             Powered by Ollama + Whisper + Browser TTS
           </p>
+          <div className="flex items-center justify-center gap-3 mt-4 text-sm">
+            <span className="text-white/60">
+              {isWatching() ? '👀 Watching meeting' : '📂 Meeting'}{' '}
+              <code className="px-2 py-1 bg-white/10 rounded text-white/80" title={meetingId}>{meetingId.slice(0, 8)}</code>
+            </span>
+            {!isWatching() && <>
+              <button
+                onClick={copyWatchLink}
+                className="px-3 py-1 bg-white/10 hover:bg-white/20 text-white rounded-lg transition-all"
+                title={watchLink(meetingId)}
+              >
+                {linkCopied ? '✅ Copied' : '🔗 Copy watch link'}
+              </button>
+              <button
+                onClick={handleNewMeeting}
+                className="px-3 py-1 bg-white/10 hover:bg-white/20 text-white rounded-lg transition-all"
+              >
+                🆕 New meeting
+              </button>
+            </>}
+          </div>
         </div>
       </div>
 
@@ -128,8 +121,8 @@ export default function App() {
       <div className="max-w-7xl mx-auto grid grid-cols-1 lg:grid-cols-4 gap-6">
         {/* Left Column: Input + Sarah Says */}
         <div className="lg:col-span-1 space-y-6">
-          {/* Text Input */}
-          <div className="bg-white/10 backdrop-blur-lg p-6 rounded-2xl border border-white/20 shadow-2xl">
+          {/* Text Input (not on read-only room displays) */}
+          {!isWatching() && <div className="bg-white/10 backdrop-blur-lg p-6 rounded-2xl border border-white/20 shadow-2xl">
             <h3 className="text-white font-semibold mb-4">
               💬 Text Input
             </h3>
@@ -146,10 +139,10 @@ export default function App() {
             >
               Send to Sarah
             </button>
-          </div>
+          </div>}
 
           {/* Voice Input */}
-          <VoiceInput />
+          {!isWatching() && <VoiceInput />}
 
           {/* Sarah Says... */}
           <div className="bg-white/10 backdrop-blur-lg p-6 rounded-2xl border border-white/20 shadow-2xl">
@@ -46,7 +46,7 @@ export default function ExportSummary() {
     summary += `${'-'.repeat(50)}\n`
     if (parking_lot.length > 0) {
       parking_lot.forEach((item, i) => {
-        summary += `${i + 1}. ${item}\n`
+        summary += `${i + 1}. ${typeof item === 'string' ? item : item.item}\n`
       })
     } else {
       summary += `No items parked.\n`
@@ -76,10 +76,10 @@ export default function StatsPanel() {
             <div className="space-y-2 max-h-32 overflow-y-auto">
               {parking_lot.map((item, i) => (
                 <div 
-                  key={i} 
+                  key={item.id || i} 
                   className="text-xs text-white bg-red-500/10 p-2 rounded border border-red-400/20"
                 >
-                  • {item}
+                  • {typeof item === 'string' ? item : item.item}
                 </div>
               ))}
             </div>
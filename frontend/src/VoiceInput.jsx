@@ -1,5 +1,8 @@
 import { useState, useRef, useEffect } from 'react'
-import { useMeetingStore } from './store.js'
+import { useMeetingStore, applyDelta, getMeetingId } from './store.js'
+
+// How long to wait for the server to finish the last utterance after stopping
+const END_OF_STREAM_TIMEOUT_MS = 15000
 
 export default function VoiceInput() {
   const [isRecording, setIsRecording] = useState(false)
@@ -10,6 +13,10 @@ export default function VoiceInput() {
   const wsRef = useRef(null)
   const chunkCountRef = useRef(0)
   const audioRef = useRef(null)
+  const audioContextRef = useRef(null)
+  const voiceRef = useRef(null)
+  const voiceEndRef = useRef(0)
+  const voicePlayingRef = useRef(0)
   
   // Load voices for speech synthesis
   useEffect(() => {
@@ -47,43 +54,80 @@ export default function VoiceInput() {
       mediaRecorderRef.current = mediaRecorder
       chunkCountRef.current = 0
       
-      const ws = new WebSocket('ws://localhost:8000/ws/audio')
+      // Protocol v2: raw audio in binary frames, JSON text frames for the rest
+      // v4: Sarah's voice arrives as PCM chunks while it's being synthesized
+      const ws = new WebSocket(`ws://localhost:8000/ws/audio?protocol=4&meeting=${getMeetingId()}`)
+      ws.binaryType = 'arraybuffer'
       wsRef.current = ws
       
       ws.onopen = () => {
         console.log('🎤 Audio WebSocket connected')
         setIsRecording(true)
-        setStatus('🎤 Listening... (speak for 9+ seconds)')
+        setStatus('🎤 Listening... (pause to let Sarah respond)')
       }
       
       ws.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+          // Sarah's synthesized voice: a streamed chunk, or a whole WAV file
+          if (voiceRef.current) {
+            playVoiceChunk(event.data)
+          } else {
+            playServerAudio(event.data)
+          }
+          return
+        }
+        
         const data = JSON.parse(event.data)
         console.log('📥 FULL DATA RECEIVED:', data)
         
+        if (data.type === 'partial') {
+          // Live words while the speaker is still talking
+          setTranscript(data.transcript)
+          setStatus('🎤 Hearing you...')
+          return
+        }
+        
+        if (data.type === 'intervention') {
+          // Streamed while Sarah is still analyzing; the final message won't repeat it
+          console.log('⚡ Early intervention:', data.intervention.content)
+          useMeetingStore.setState(state => ({
+            meetingState: applyDelta(state.meetingState, {}, [data.intervention])
+          }))
+          if (!data.audio_stream) {
+            // Otherwise the server streams Sarah saying it after the transcription
+            playSpeechSynthesisWithText(data.intervention.content)
+          }
+          return
+        }
+        
+        if (data.type === 'audio_start') {
+          startVoiceStream(data.sample_rate)
+          return
+        }
+        
+        if (data.type === 'audio_end') {
+          finishVoiceStream(data.fallback_text)
+          return
+        }
+        
+        if (data.type === 'end') {
+          // Server has handled the last utterance, safe to hang up
+          ws.close()
+          return
+        }
+        
         if (data.type === 'transcription') {
           console.log('✅ Transcription:', data.transcript)
           console.log('✅ Interventions:', data.interventions)
-          console.log('✅ State:', data.state)
+          console.log('✅ Delta:', data.delta)
           
           // Update transcript
           setTranscript(data.transcript)
           setStatus('✅ Transcription complete!')
           
-          // Update meeting state
+          // Merge the state delta into the meeting
           useMeetingStore.setState(state => ({
-            meetingState: {
-              ...state.meetingState,
-              interventions: [
-                ...state.meetingState.interventions,
-                ...(data.interventions || [])
-              ],
-              actions: data.state?.actions || state.meetingState.actions,
-              decisions: data.state?.decisions || state.meetingState.decisions,
-              parking_lot: data.state?.parking_lot || state.meetingState.parking_lot,
-              participation: data.state?.participation || state.meetingState.participation,
-              sentiment: data.state?.sentiment || state.meetingState.sentiment,
-              energy: data.state?.energy || state.meetingState.energy
-            }
+            meetingState: applyDelta(state.meetingState, data.delta, data.interventions || [])
           }))
           
           console.log('✅ State updated')
@@ -92,7 +136,9 @@ export default function VoiceInput() {
           const newInterventions = data.interventions || []
           console.log('🎯 Interventions to process:', newInterventions.length)
           
-          if (newInterventions.length > 0) {
+          if (data.audio_stream || data.audio_bytes > 0) {
+            console.log('🔊 Server audio follows as binary frames')
+          } else if (newInterventions.length > 0) {
             // Speak ALL interventions (in case there are multiple)
             newInterventions.forEach((intervention, index) => {
               console.log(`🔊 Intervention ${index + 1}:`, intervention.content)
@@ -124,19 +170,13 @@ export default function VoiceInput() {
           chunkCountRef.current += 1
           console.log(`🎤 Sending chunk #${chunkCountRef.current}: ${event.data.size} bytes`)
           
-          const reader = new FileReader()
-          reader.onload = () => {
-            const base64Audio = reader.result.split(',')[1]
-            ws.send(JSON.stringify({
-              type: 'audio',
-              audio: base64Audio
-            }))
-          }
-          reader.readAsDataURL(event.data)
+          // Send the blob as-is, no base64
+          ws.send(event.data)
         }
       }
       
-      mediaRecorder.start(3000)
+      // Small timeslices: the backend segments speech on pauses itself
+      mediaRecorder.start(250)
       
     } catch (error) {
       console.error('❌ Microphone error:', error)
@@ -148,13 +188,22 @@ export default function VoiceInput() {
   const stopRecording = () => {
     setStatus('⏹️ Stopping...')
     
-    if (mediaRecorderRef.current) {
-      mediaRecorderRef.current.stop()
-      mediaRecorderRef.current.stream.getTracks().forEach(track => track.stop())
+    const ws = wsRef.current
+    const endStream = () => {
+      if (!ws || ws.readyState !== WebSocket.OPEN) return
+      // Ask the server to finish the last utterance; it replies 'end' when done
+      ws.send(JSON.stringify({ type: 'end' }))
+      setTimeout(() => ws.close(), END_OF_STREAM_TIMEOUT_MS)
     }
     
-    if (wsRef.current) {
-      wsRef.current.close()
+    if (mediaRecorderRef.current) {
+      const recorder = mediaRecorderRef.current
+      // The final chunk is delivered before 'stop' fires
+      recorder.onstop = endStream
+      recorder.stop()
+      recorder.stream.getTracks().forEach(track => track.stop())
+    } else {
+      endStream()
     }
     
     setIsRecording(false)
@@ -167,6 +216,82 @@ export default function VoiceInput() {
     setStatus('Ready')
   }
   
+  // Play audio rendered by the backend
+  const playServerAudio = (buffer) => {
+    const url = URL.createObjectURL(new Blob([buffer], { type: 'audio/wav' }))
+    const audio = new Audio(url)
+    audioRef.current = audio
+    
+    setIsSarahSpeaking(true)
+    setStatus('🔊 Sarah is speaking...')
+    
+    audio.onended = () => {
+      URL.revokeObjectURL(url)
+      setIsSarahSpeaking(false)
+      setStatus('✅ Ready')
+    }
+    audio.play().catch(error => {
+      console.error('❌ Audio playback failed:', error)
+      setIsSarahSpeaking(false)
+    })
+  }
+  
+  // Streamed voice (v4): schedule each PCM chunk right after the previous one
+  const startVoiceStream = (sampleRate) => {
+    if (!audioContextRef.current) {
+      audioContextRef.current = new AudioContext()
+    }
+    const context = audioContextRef.current
+    // Several interventions arrive as back-to-back streams: queue this one after the last
+    voiceRef.current = { sampleRate, nextTime: Math.max(context.currentTime, voiceEndRef.current) }
+    
+    setIsSarahSpeaking(true)
+    setStatus('🔊 Sarah is speaking...')
+  }
+  
+  const playVoiceChunk = (buffer) => {
+    const voice = voiceRef.current
+    const context = audioContextRef.current
+    const samples = new Int16Array(buffer)
+    const audioBuffer = context.createBuffer(1, samples.length, voice.sampleRate)
+    const channel = audioBuffer.getChannelData(0)
+    for (let i = 0; i < samples.length; i++) {
+      channel[i] = samples[i] / 32768
+    }
+    
+    const source = context.createBufferSource()
+    source.buffer = audioBuffer
+    source.connect(context.destination)
+    const startAt = Math.max(voice.nextTime, context.currentTime)
+    source.start(startAt)
+    voice.nextTime = startAt + audioBuffer.duration
+    voiceEndRef.current = voice.nextTime
+    voicePlayingRef.current += 1
+    
+    source.onended = () => {
+      voicePlayingRef.current -= 1
+      if (!voiceRef.current && voicePlayingRef.current === 0) {
+        setIsSarahSpeaking(false)
+        setStatus('✅ Ready')
+      }
+    }
+  }
+  
+  const finishVoiceStream = (fallbackText) => {
+    voiceRef.current = null
+    
+    if (fallbackText) {
+      // Server synthesis failed, the browser speaks instead
+      playSpeechSynthesisWithText(fallbackText)
+      return
+    }
+    
+    if (voicePlayingRef.current === 0) {
+      setIsSarahSpeaking(false)
+      setStatus('✅ Ready')
+    }
+  }
+  
   // Speech synthesis with text parameter
   const playSpeechSynthesisWithText = (textToSpeak) => {
     try {
@@ -1,64 +1,200 @@
 import { create } from 'zustand'
 
+// Upsert items by id: the backend only sends what was added or changed
+const mergeItems = (current, changed) => {
+  if (!changed || changed.length === 0) return current
+  const byId = new Map(current.map(item => [item.id, item]))
+  changed.forEach(item => byId.set(item.id, { ...byId.get(item.id), ...item }))
+  return Array.from(byId.values())
+}
+
+// Apply a backend state delta to the dashboard's meeting state
+export const applyDelta = (meetingState, delta = {}, interventions = []) => ({
+  ...meetingState,
+  interventions: [...meetingState.interventions, ...interventions],
+  actions: mergeItems(meetingState.actions, delta.actions),
+  decisions: mergeItems(meetingState.decisions, delta.decisions),
+  parking_lot: mergeItems(meetingState.parking_lot, delta.parking_lot),
+  participation: { ...meetingState.participation, ...(delta.participation || {}) },
+  sentiment: delta.sentiment || meetingState.sentiment,
+  energy: delta.energy || meetingState.energy
+})
+
+const pageParams = new URLSearchParams(window.location.search)
+
+// ?watch&meeting=<id>: read-only dashboard (room display) following someone else's meeting
+export const isWatching = () => pageParams.has('watch')
+
+// Meeting ID survives page reloads, so reconnecting sockets rejoin the same meeting
+export const getMeetingId = () => {
+  if (pageParams.get('meeting')) return pageParams.get('meeting')
+  let meetingId = localStorage.getItem('sarahMeetingId')
+  if (!meetingId) {
+    meetingId = crypto.randomUUID().replace(/-/g, '')
+    localStorage.setItem('sarahMeetingId', meetingId)
+  }
+  return meetingId
+}
+
+// Forget the current meeting; the next getMeetingId() starts a fresh one
+const clearMeetingId = () => {
+  localStorage.removeItem('sarahMeetingId')
+  if (pageParams.has('meeting')) {
+    pageParams.delete('meeting')
+    const query = pageParams.toString()
+    window.history.replaceState(null, '', window.location.pathname + (query ? `?${query}` : ''))
+  }
+}
+
+// Link for a read-only room display following this meeting
+export const watchLink = (meetingId) =>
+  `${window.location.origin}${window.location.pathname}?watch&meeting=${meetingId}`
+
+// Replace the lists with the backend's full state (sent when a socket joins)
+export const applySnapshot = (meetingState, snapshot = {}) => ({
+  ...meetingState,
+  actions: snapshot.actions || [],
+  decisions: snapshot.decisions || [],
+  parking_lot: snapshot.parking_lot || [],
+  participation: snapshot.participation || {},
+  sentiment: snapshot.sentiment || meetingState.sentiment,
+  energy: snapshot.energy || meetingState.energy
+})
+
+// One long-lived text socket for the whole page, shared by every sendTranscript call
+let socket = null
+let nextRequestId = 1
+let reconnectDelay = 500
+const pending = new Map()   // request id -> { resolve, reject }
+const outbox = []           // requests typed while (re)connecting
+
+const emptyMeetingState = () => ({
+  interventions: [],
+  actions: [],
+  decisions: [],
+  parking_lot: [],
+  participation: {},
+  sentiment: 'neutral',
+  energy: 'medium'
+})
+
 export const useMeetingStore = create((set, get) => ({
   isConnected: false,
-  meetingState: {
-    interventions: [],
-    actions: [],
-    decisions: [],
-    parking_lot: [],
-    participation: {},
-    sentiment: 'neutral',
-    energy: 'medium'
-  },
+  meetingId: getMeetingId(),
+  meetingState: emptyMeetingState(),
   setMeetingState: (newState) => {
     console.log('📊 Updating meeting state:', newState)
     set({ meetingState: newState })
   },
-  sendTranscript: async (transcript) => {
-    try {
-      const ws = new WebSocket('ws://localhost:8000/ws')
+  connect: () => {
+    if (socket && socket.readyState <= WebSocket.OPEN) return
+    
+    // Replies may arrive out of order; they're matched to requests by id
+    const ws = isWatching()
+      ? new WebSocket(`ws://localhost:8000/ws/watch?meeting=${getMeetingId()}`)
+      : new WebSocket(`ws://localhost:8000/ws?meeting=${getMeetingId()}&ordered=0`)
+    socket = ws
+    
+    ws.onopen = () => {
+      console.log('✅ Connected to Sarah backend')
+      reconnectDelay = 500
+      set({ isConnected: true })
+      while (outbox.length > 0) ws.send(outbox.shift())
+    }
+    
+    ws.onmessage = (event) => {
+      const data = JSON.parse(event.data)
+      console.log('📥 Received from Sarah:', data)
       
-      ws.onopen = () => {
-        console.log('✅ Connected to Sarah backend')
-        set({ isConnected: true })
-        ws.send(JSON.stringify({ transcript }))
+      if (data.type === 'session') {
+        // Joined (or rejoined) the meeting: start from the backend's state
+        console.log('📂 Meeting:', data.meeting_id)
+        set({ meetingState: applySnapshot(get().meetingState, data.state) })
+        return
       }
       
-      ws.onmessage = (event) => {
-        const data = JSON.parse(event.data)
-        console.log('📥 Received from Sarah:', data)
-        
-        set({ 
-          meetingState: { 
-            ...get().meetingState, 
-            interventions: [
-              ...get().meetingState.interventions,
-              ...(data.interventions || [])
-            ],
-            actions: data.state?.actions || get().meetingState.actions,
-            decisions: data.state?.decisions || get().meetingState.decisions,
-            parking_lot: data.state?.parking_lot || get().meetingState.parking_lot,
-            participation: data.state?.participation || get().meetingState.participation,
-            sentiment: data.state?.sentiment || get().meetingState.sentiment,
-            energy: data.state?.energy || get().meetingState.energy
-          }
-        })
-        
-        ws.close()
+      if (data.type === 'update') {
+        // Someone else's utterance in the meeting we're watching
+        set({ meetingState: applyDelta(get().meetingState, data.delta, data.interventions || []) })
+        return
       }
       
-      ws.onerror = (error) => {
-        console.error('❌ WebSocket error:', error)
-        set({ isConnected: false })
+      if (data.type === 'intervention') {
+        // Streamed while Sarah is still analyzing; the final reply won't repeat it
+        set({ meetingState: applyDelta(get().meetingState, {}, [data.intervention]) })
+        return
       }
       
-      ws.onclose = () => {
-        set({ isConnected: false })
+      if (data.type === 'result') {
+        // Backend sends deltas: new/changed items are merged by id
+        set({
+          meetingState: applyDelta(get().meetingState, data.delta, data.interventions || [])
+        })
       }
-    } catch (error) {
-      console.error('❌ Failed to connect to backend:', error)
+      
+      const request = pending.get(data.id)
+      if (request) {
+        pending.delete(data.id)
+        if (data.type === 'error') request.reject(new Error(data.error))
+        else request.resolve(data)
+      }
+    }
+    
+    ws.onerror = (error) => {
+      console.error('❌ WebSocket error:', error)
+    }
+    
+    ws.onclose = () => {
+      // A socket we already replaced (disconnect, new meeting) closes quietly
+      if (socket !== ws) return
+      console.log('👋 WebSocket closed, reconnecting...')
       set({ isConnected: false })
+      socket = null
+      
+      // Requests that were in flight won't get a reply on a new socket
+      pending.forEach(request => request.reject(new Error('connection lost')))
+      pending.clear()
+      
+      setTimeout(() => get().connect(), reconnectDelay)
+      reconnectDelay = Math.min(reconnectDelay * 2, 10000)
+    }
+  },
+  disconnect: () => {
+    const ws = socket
+    socket = null
+    set({ isConnected: false })
+    if (ws) ws.close()
+  },
+  newMeeting: () => {
+    if (isWatching()) return
+    
+    // Leave the old meeting (its state stays on the backend) and join a fresh one
+    get().disconnect()
+    pending.forEach(request => request.reject(new Error('meeting changed')))
+    pending.clear()
+    outbox.length = 0
+    
+    clearMeetingId()
+    const meetingId = getMeetingId()
+    console.log('🆕 New meeting:', meetingId)
+    set({ meetingId, meetingState: emptyMeetingState() })
+    get().connect()
+  },
+  sendTranscript: (transcript) => {
+    if (isWatching()) return Promise.reject(new Error('read-only meeting view'))
+    
+    // Pipelined: no need to wait for the previous reply before sending the next
+    const id = nextRequestId++
+    const message = JSON.stringify({ id, transcript })
+    
+    const reply = new Promise((resolve, reject) => pending.set(id, { resolve, reject }))
+    
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(message)
+    } else {
+      outbox.push(message)
+      get().connect()
     }
+    return reply
   }
-}))
\ No newline at end of file
+}))